@@ -0,0 +1,48 @@
+"""
+Compares the Outlook scan modes of resume_checker.py against the fake inbox of tests/fake_outlook.py, on machines
+with or without Outlook. Not needed to run the resume checker itself.
+
+    python bench_outlook_scan.py --messages 2000 --latency-ms 0.5 --stores 3
+"""
+import argparse
+import time
+
+from resume_checker import (
+    INBOX_FOLDER, OUTLOOK_MAILBOX_NAME, RESUME_ATTACHMENT_EXTENSIONS, RESUME_KEYWORDS_IN_ATTACHMENT_NAME,
+    RESUME_KEYWORDS_IN_BODY, RESUME_KEYWORDS_IN_SUBJECT, download_resumes_from_outlook, log, resume_download_folder
+)
+from tests.fake_outlook import FakeOutlookNamespace, build_fake_inbox_messages, build_fake_store_layout
+
+def run_outlook_scan_benchmark(message_count=2000, latency_ms=0.0, store_count=1):
+    """
+    Runs both Outlook scan modes against the same fake inbox and prints time and COM round-trips. With store_count > 1
+    the emails are spread over that many mailboxes (see build_fake_store_layout), scanned one store at a time and then
+    one thread per store.
+    """
+    messages = build_fake_inbox_messages(message_count)
+    print(f"  ⏱️ Benchmarking Outlook scan over {message_count} fake email(s) in {store_count} mailbox(es), {latency_ms} ms per COM call")
+    stores, folder_specs = build_fake_store_layout(messages, store_count) if store_count > 1 else (None, ["Fake Mailbox/Inbox"])
+    for scan_mode in ("items", "table"):
+        for store_threads in ((1, store_count) if store_count > 1 else (1,)):
+            namespace = FakeOutlookNamespace(messages if stores is None else [], latency_seconds=latency_ms / 1000.0, stores=stores)
+            started = time.perf_counter()
+            log.disabled = True # Only the timings are of interest here
+            try:
+                found = download_resumes_from_outlook(
+                    resume_download_folder, OUTLOOK_MAILBOX_NAME, INBOX_FOLDER,
+                    RESUME_KEYWORDS_IN_SUBJECT, RESUME_KEYWORDS_IN_BODY, RESUME_KEYWORDS_IN_ATTACHMENT_NAME,
+                    RESUME_ATTACHMENT_EXTENSIONS, in_memory=True, scan_mode=scan_mode, outlook_namespace=namespace,
+                    folder_specs=folder_specs, store_threads=store_threads)
+            finally:
+                log.disabled = False
+            elapsed = time.perf_counter() - started
+            label = scan_mode if store_count == 1 else f"{scan_mode}, {store_threads} thread(s)"
+            print(f"    {label:>18}: {elapsed:8.3f}s, {namespace.counter.calls:7d} COM calls, {len(found)} resume attachment(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Outlook scan modes against a fake inbox.")
+    parser.add_argument("--messages", type=int, default=2000, help="Number of fake emails in the inbox")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per COM call")
+    parser.add_argument("--stores", type=int, default=1, help="Spread the emails over this many fake mailboxes")
+    args = parser.parse_args()
+    run_outlook_scan_benchmark(args.messages, args.latency_ms, args.stores)
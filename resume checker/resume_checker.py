@@ -1,24 +1,96 @@
 import os
+import io
+import glob
 import re
+import json
+import html
+import math
+import numbers
+import shutil
 import pandas as pd
-from docx import Document
+import numpy as np
 import pypdf
 import spacy
 import warnings
 from pyresparser import ResumeParser
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta, timezone
 import time
-import traceback
+import logging
+import logging.handlers
+import atexit
+import sys
 import hashlib
+import zlib
+import gzip
+import stat
+import sqlite3
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape as xml_escape
+import tarfile
+import tempfile
+import argparse
+import asyncio
+import imaplib
+import mailbox
+from email import policy
+from email.parser import BytesParser
+from email.utils import parseaddr, parsedate_to_datetime
+import multiprocessing
+import threading
+import queue
+import heapq
+import gc
+import random
+import mmap
+import tracemalloc
+from collections import deque, Counter
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from contextlib import closing
+from itertools import islice
 from fuzzywuzzy import fuzz
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter, column_index_from_string
 
 # --- Outlook specific imports ---
 try:
     import win32com.client # Requires pywin32, Windows only
+    import pythoncom
 except ImportError:
     print("⚠️ WARNING: 'pywin32' library not found. Outlook integration will not work.")
     print("   Please install it using: pip install pywin32")
     win32com = None
+    pythoncom = None
+
+# --- Watch-folder imports (optional) ---
+try:
+    from watchdog.observers import Observer # inotify on Linux, ReadDirectoryChangesW on Windows
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None # 'watch' falls back to polling the drop folders
+    FileSystemEventHandler = object
+
+# --- OCR imports (optional) ---
+try:
+    import pytesseract # Also needs the Tesseract program installed (https://github.com/tesseract-ocr/tesseract)
+    from PIL import Image
+except ImportError:
+    pytesseract = None # Scanned PDF pages stay without text
+
+# --- Parquet export imports (optional) ---
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None # 'export-parquet' explains how to install it; the JSONL change feed works without it
+
+# --- Memory monitoring imports (optional) ---
+try:
+    import psutil # Process RSS on every platform; without it RSS is read from /proc where available
+except ImportError:
+    psutil = None
 
 # Suppress specific future warnings from pandas or openpyxl if they occur
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -30,7 +102,7 @@ warnings.filterwarnings("ignore", message=r"\[W094\].*", module="spacy")
 # --- Configuration Section: PLEASE EDIT THESE VARIABLES ---
 # ==============================================================================
 # 1. REPLACE THIS WITH THE ACTUAL PATH TO YOUR FOLDER CONTAINING RESUMES
-#    This will now be used as a temporary folder for downloaded resumes.
+#    This will now be used as a temporary folder for downloaded resumes (only when ATTACHMENTS_IN_MEMORY is False).
 #    IMPORTANT: Use a raw string (r"...") or forward slashes ("/")
 resume_download_folder = r"C:\Users\nanda\Desktop\sai pro\downloaded_resumes" # <--- IMPORTANT: CHANGE THIS PATH!
 
@@ -46,16 +118,266 @@ output_directory = r"C:\Users\nanda\Desktop\sai pro" # <--- IMPORTANT: CHANGE TH
 # 5. Construct the full path for the primary output Excel file
 output_excel_file = os.path.join(output_directory, excel_file_name)
 
+# 6. Name of the candidate database (SQLite) kept next to the Excel files. Every parsed candidate is
+#    recorded here, including historical resumes imported with the 'backfill' command.
+CANDIDATE_DB_FILE_NAME = "candidates.db"
+
+# 7. Gazetteer of first names and surnames for the fast-path name recognizer (a plain text file next to this script).
+#    Resumes whose top lines hold a name made of known names skip spaCy NER; set to "" to always use NER.
+NAME_GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_gazetteer.txt")
+
+# 8. Parser cascade. The in-house parser always runs first; the heavier parsers listed after it only run
+#    when one of the fields below comes out under its minimum confidence (see basic_field_confidences).
+PARSER_CASCADE = ["basic", "pyresparser"] # Remove "pyresparser" to never run it
+PARSER_CASCADE_ALWAYS_RUN_ALL = False # True: run every parser on every resume (slowest, previous behaviour)
+PARSER_SKILLS_FOR_FULL_CONFIDENCE = 3 # Taxonomy skills at which the skills confidence reaches 1.0
+PARSER_CASCADE_MIN_CONFIDENCE = {
+    "name": 5.0, # get_name_confidence scale: a multi-word name from the resume text scores 5.2, a gazetteer name 5.5
+    "email": 1.0, # 0-1 for the rest
+    "phone": 1.0,
+    "skills": 1 / PARSER_SKILLS_FOR_FULL_CONFIDENCE, # At least one taxonomy skill
+    "experience": 0.0, # Not gated by default; raise to 1.0 to also run pyresparser for missing experience
+}
+
+# 9. Near-duplicate detection: resumes whose text overlaps an earlier one by at least this much (estimated
+#    Jaccard similarity of word shingles) are marked 'Near Duplicate' and linked to the earlier candidate.
+NEAR_DUPLICATE_THRESHOLD = 0.85
+MINHASH_NUM_PERM = 128 # Signature length; changing it invalidates the stored signatures
+MINHASH_SHINGLE_WORDS = 5 # Words per shingle
+MINHASH_MAX_SHINGLES = 2000 # Caps the signature cost per resume (the first N distinct shingles are used)
+
+# 10. Excel export. New candidates are appended to the existing workbooks and the rows already there are matched by
+#     a hidden 'Row Key' column. Only the columns below are ever rewritten in those rows (and Skill, by 'retag'), so recruiter
+#     edits and formatting stay.
+EXCEL_PIPELINE_UPDATED_COLUMNS = ["Status"]
+
+# 11. Time partitions. The primary workbook keeps only the most recent months (by Year/Month) as the hot working set.
+#     Older months move to read-only, gzip-compressed archive partitions (one per month, under output_directory) and
+#     are checked for duplicates through an index in the candidate database, so a cycle only reads the hot months.
+HOT_PARTITION_MONTHS = 3 # The current month and the two before it
+ARCHIVE_FOLDER_NAME = "candidate_archive"
+
 # --- Outlook Specific Configurations ---
 OUTLOOK_MAILBOX_NAME = "nanda" # <--- IMPORTANT: Your Outlook mailbox name if different from default "Mailbox - YourName"
 INBOX_FOLDER = "Inbox" # <--- Or "Mailbox", "Personal Folders", etc.
+# Folders to scan as "Mailbox/Folder/Subfolder", e.g. ["nanda/Inbox", "Recruiting Shared/Inbox", "careers@example.com/Inbox/Req-1042"].
+# Empty: OUTLOOK_MAILBOX_NAME/INBOX_FOLDER (or the default Inbox if that mailbox is not found). Each mailbox is scanned on its
+# own thread, and an email found in several folders (same Message-ID) is only read once.
+OUTLOOK_SCAN_FOLDERS = []
 RESUME_KEYWORDS_IN_SUBJECT = ["resume", "cv", "application", "job application", "c.v.", "bio-data"] # Keywords to look for in email subject
 RESUME_KEYWORDS_IN_BODY = ["resume", "cv", "curriculum vitae", "job application", "attached my resume", "see my attached cv", "application for the position of", "applying for"] # Keywords to look for in email body
 RESUME_KEYWORDS_IN_ATTACHMENT_NAME = ["resume", "cv", "application", "profile", "bio", "curriculum_vitae", "cv_"] # Keywords to look for in attachment filenames
 RESUME_ATTACHMENT_EXTENSIONS = [".pdf", ".docx", ".doc"] # Allowed resume file extensions
+ATTACHMENTS_IN_MEMORY = True # Keep attachments as in-memory bytes end to end; False saves them to resume_download_folder
+OUTLOOK_SCAN_MODE = "table" # "table": bulk-read properties via Folder.GetTable and open only candidate emails; "items": read every email
+OUTLOOK_TABLE_ROWS_PER_READ = 500 # Rows fetched per Table.GetArray call
+OUTLOOK_TABLE_REQUIRE_SUBJECT_MATCH = False # True: only open emails whose subject has a resume keyword (fastest, but misses
+                                            # resumes sent with a generic subject that the attachment name or body would catch)
+
+# --- Mail Source Configurations ---
+# Where run_automation_cycle pulls resume emails from. Everything other than "outlook" runs headless on any OS.
+MAIL_SOURCE = "outlook" # "outlook", "eml" (folder of .eml files), "mbox", "maildir" or "imap"
+MAIL_SOURCE_PATH = "" # Folder of .eml files, mbox file or Maildir folder for the file-based sources
+MAIL_LOOKBACK_DAYS = 1 # Only emails received within this many days are checked
+IMAP_HOST = "" # e.g. "imap.example.com"
+IMAP_PORT = 993
+IMAP_USE_SSL = True
+IMAP_USERNAME = ""
+IMAP_PASSWORD_ENV_VAR = "RESUME_IMAP_PASSWORD" # The password is read from this environment variable, never stored here
+IMAP_MAILBOXES = ["INBOX"] # Folders searched, e.g. ["INBOX", "Careers", "INBOX/Req-1042"]; an email in several is fetched once
+IMAP_CONNECTIONS = 4 # Parallel IMAP connections used to fetch candidate emails
+IMAP_FETCH_CHUNK_SIZE = 20 # Emails fetched per UID FETCH command
+
+# --- Pre-parse Triage Configurations ---
+# Every attachment gets a cheap score (size, magic bytes, page count, first-page text) before any NLP runs.
+TRIAGE_ENABLED = True
+TRIAGE_ACCEPT_SCORE = 3 # Attachments scoring at least this go through the full parse
+TRIAGE_REJECT_SCORE = 0 # Attachments scoring at or below this are dropped; scores in between are deferred
+TRIAGE_MIN_FILE_BYTES = 4 * 1024 # Smaller files are rarely real resumes
+TRIAGE_MAX_FILE_BYTES = 10 * 1024 * 1024
+TRIAGE_MAX_PDF_PAGES = 8 # Longer PDFs are usually reports, theses or certificate bundles
+TRIAGE_MIN_FIRST_PAGE_CHARS = 200 # A PDF with less text than this on page one is a scan or an image-only document
+TRIAGE_NEGATIVE_KEYWORDS = ["offer letter", "appointment letter", "payslip", "pay slip", "salary slip", "relieving letter",
+                            "experience letter", "cover letter", "aadhaar", "aadhar", "pan card", "passport", "invoice",
+                            "marksheet", "mark sheet", "certificate", "id card"]
+DEFERRED_FOLDER_NAME = "deferred_resumes" # Under output_directory; reprocess with: python resume_checker.py process-deferred
+
+# --- Priority Scheduling Configurations ---
+# With a backlog, attachments are parsed in priority order instead of arrival order, in two lanes so that slow
+# .doc conversions and scanned PDFs do not hold up the quick text resumes queued behind them.
+PRIORITY_OPEN_ROLE_KEYWORDS = [] # Words of requisitions being hired for now (e.g. "Req-1042", "DFT"), matched in subject, body and file name
+PRIORITY_SENDER_KEYWORDS = [] # Sender name fragments whose resumes go first (e.g. a referral mailbox or a trusted agency)
+PRIORITY_SKILL_KEYWORDS = [] # Skills wanted now, counted on the first page; empty counts every taxonomy skill
+PRIORITY_WEIGHTS = {'open_role': 8, 'sender': 4, 'skill_hit': 1, 'stale': -4} # Score added per rule; higher scores are parsed first
+PRIORITY_MAX_SKILL_HITS = 5
+PRIORITY_STALE_AFTER_HOURS = 72 # Older emails get the 'stale' weight; equal scores are parsed oldest email first
+HEAVY_LANE_MIN_BYTES = 2 * 1024 * 1024 # Larger files, .doc files (Word conversion) and scanned PDFs (OCR) go to the heavy lane
+HEAVY_LANE_EVERY = 5 # While both lanes have work, one heavy job is taken after this many light ones
+
+# --- OCR Configurations ---
+# PDF pages without a text layer (scans) are read with Tesseract, if 'pytesseract', 'Pillow' and the Tesseract program are
+# installed. Triage defers scans, so by default this happens in 'process-deferred' and never holds up text-native resumes.
+OCR_ENABLED = True
+OCR_LANGUAGE = "eng"
+OCR_WORKERS = 2 # Tesseract processes running at once
+OCR_PAGE_TIMEOUT_SECONDS = 20 # A page taking longer is given up (Tesseract is killed)
+OCR_MAX_PAGES = 4 # At most this many pages per PDF are OCRed; OCR also stops once header, contact and skills are found
+OCR_PAGE_MIN_TEXT_CHARS = 20 # Pages with less extractable text than this count as scanned
+OCR_MIN_SKILL_HITS = 3 # Without a skills section, this many taxonomy skills mark the skills region as recovered
+
+# --- Backfill Configurations (python resume_checker.py backfill <folders/archives>) ---
+BACKFILL_BATCH_SIZE = 200 # Resumes parsed and committed to the candidate database per transaction
+BACKFILL_PROGRESS_INTERVAL_SECONDS = 5 # How often throughput and ETA are printed
+BACKFILL_CHECKPOINT_FILE_NAME = "backfill_checkpoint.txt" # Sources already imported, so a rerun resumes where it stopped
+
+# --- Parse Service Configurations (python resume_checker.py serve) ---
+SERVICE_HOST = "127.0.0.1" # Local only; put a reverse proxy in front if other machines need it
+SERVICE_PORT = 8765
+SERVICE_MAX_BATCH_SIZE = 16 # Uploads parsed together in one spaCy nlp.pipe call
+SERVICE_MAX_BATCH_WAIT_MS = 20 # How long the first upload of a batch waits for others to join it
+SERVICE_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+SERVICE_LATENCY_WINDOW = 2000 # Most recent requests used for the /stats percentiles and throughput
+
+# --- Long-running Mode Configurations (python resume_checker.py loop) ---
+# spaCy keeps every new string it sees in its shared vocab, so a process that parses resumes for days slowly grows.
+# The shared pipeline is reloaded every so often, and 'loop' hands over to a fresh worker process when that is not enough.
+LOOP_INTERVAL_SECONDS = 300 # Pause between processing cycles in 'loop'
+NLP_RELOAD_EVERY_DOCUMENTS = 2000 # Reload the spaCy pipeline after this many parsed resumes (0 = never)...
+NLP_RELOAD_GROWTH_MB = 256 # ...or once RSS has grown this much since the last reload (0 = never)
+MEMORY_RSS_CEILING_MB = 1536 # A 'loop' worker still above this after a reload is replaced by a fresh process (0 = no ceiling)
+WORKER_RECYCLE_EVERY_DOCUMENTS = 50000 # Replace the 'loop' worker after this many resumes regardless (0 = never)
+BACKFILL_WORKER_MAX_TASKS = 2000 # Backfill worker processes are replaced after this many resumes each (0 = never)
+
+# --- Watch-folder Configurations (python resume_checker.py watch [folders]) ---
+WATCH_FOLDERS = [] # Drop folders to watch; empty means resume_download_folder
+WATCH_DEBOUNCE_SECONDS = 0.4 # A file must keep the same size and modified time this long before it is parsed
+WATCH_POLL_INTERVAL_SECONDS = 0.25 # Folder rescan interval when the 'watchdog' package is not installed
+WATCH_MANIFEST_FILE_NAME = "watch_manifest.jsonl" # Under output_directory; files already parsed, by path, size and mtime
+
+# --- Ingestion Latency Configurations ---
+# Every committed row records when its email arrived and when each stage (schedule wait, download, queue, .doc
+# conversion, parsing, database commit, Excel export) finished; see 'python resume_checker.py latency'.
+INGEST_SLO_SECONDS = 15 * 60 # Promise: a resume is a committed row within this long of the email arriving...
+INGEST_SLO_PERCENTILE = 95 # ...for this percentage of resumes; a cycle or day above it is flagged
+
+# --- Reporting Rollup Configurations (python resume_checker.py report) ---
+# Candidate counts by Year/Month, skill family, Status and experience band are kept up to date in candidates.db as
+# rows are committed, so the weekly numbers come straight from there instead of pivot tables over the workbook.
+SKILL_FAMILY_PRECEDENCE = ["DV", "DFT", "PD", "Analog", "FPGA", "IP", "Silicon", "DD"] # A candidate counts under the family
+# (SKILL_TAXONOMY key) holding most of their skills; ties go to the family listed first, so broad Digital Design comes last
+EXPERIENCE_BANDS = [(0, "0-2 yrs"), (2, "2-5 yrs"), (5, "5-8 yrs"), (8, "8-12 yrs"), (12, "12+ yrs")] # (from years, label)
+REPORT_WORKBOOK_NAME = "Sourcing_Summary.xlsx" # Under output_directory
+REPORT_MONTHS = 12 # Months shown by 'report' unless --months says otherwise
+
+# --- Columnar Export Configurations (python resume_checker.py export-parquet / export-changes) ---
+# A typed copy of candidates.db for analytics and the ATS import: Parquet partitioned by year and month (needs 'pyarrow'),
+# and a JSON-lines feed of the rows changed since a watermark.
+PARQUET_EXPORT_FOLDER_NAME = "candidate_parquet" # Under output_directory; year=YYYY/month=M/candidates.parquet
+PARQUET_EXPORT_AFTER_CYCLE = True # Refresh the partitions changed by each processing cycle and backfill (when pyarrow is installed)
+PARQUET_COMPRESSION = "zstd"
+CHANGES_FEED_FILE_NAME = "candidate_changes.jsonl" # Default 'export-changes' output under output_directory
+
+# --- Skill Re-tagging Configurations (python resume_checker.py retag) ---
+# After SKILL_TAXONOMY changes, 'retag' updates the Skill of the stored candidates from their kept resume text,
+# scanning only for the skills added since the last retag instead of reparsing every resume.
+SKILL_RENAMES = {} # Old taxonomy name -> new name (e.g. {"PnR": "Place and Route"}): the tag moves instead of being dropped
+RETAG_CHUNK_SIZE = 2000 # Stored resume texts scanned per worker task
+RETAG_MIN_PARALLEL_TEXTS = 5000 # Fewer stored texts than this are scanned in-process
+
+# --- Excel Export Configurations ---
+# Parsed rows are journaled first and written to the workbooks by a background thread, so a workbook left open
+# in Excel delays the export instead of losing it.
+EXPORT_JOURNAL_FILE_NAME = "export_journal.jsonl" # Under output_directory; exports not yet in both workbooks
+EXPORT_RETRY_INITIAL_SECONDS = 5 # First retry delay for a locked workbook; doubles on every failure
+EXPORT_RETRY_MAX_SECONDS = 300
+EXPORT_SHUTDOWN_WAIT_SECONDS = 30 # How long a one-off run waits for pending exports before exiting (the rest replay next run)
+
+# --- Logging Configurations ---
+# Messages go through a queue to a background thread that formats and writes them, so console and file I/O never
+# hold up parsing. Per-email, per-attachment and per-file detail is logged at DEBUG and is off unless enabled here
+# (or with --log-level DEBUG).
+LOG_CONSOLE_LEVEL = "INFO"
+LOG_FILE_NAME = "resume_checker_log.jsonl" # Under output_directory: JSON lines with context fields (file, sender, stage, ...); "" for none
+LOG_FILE_LEVEL = "INFO"
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024 # The JSON log rotates at this size...
+LOG_FILE_BACKUP_COUNT = 5 # ...keeping this many old files
 # ==============================================================================
 
 
+# --- Logging ---
+log = logging.getLogger("resume_checker")
+_log_listener = None
+
+def log_fields(**fields):
+    """extra= for a log call: context fields (file_name, file_hash, sender, stage, duration_ms, ...) for the JSON log."""
+    return {'fields': fields}
+
+class JsonLinesLogFormatter(logging.Formatter):
+    """One JSON object per record: time, level, message and the record's context fields."""
+
+    def format(self, record):
+        entry = {'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                 'level': record.levelname, 'message': record.getMessage().strip()}
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ConsoleLogHandler(logging.StreamHandler):
+    """Writes the plain message, replacing characters the console encoding cannot show (emoji on cp1252 consoles)."""
+
+    def format(self, record):
+        message = super().format(record)
+        encoding = getattr(self.stream, 'encoding', None) or 'utf-8'
+        return message.encode(encoding, errors='replace').decode(encoding)
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """Queues the record as is: message formatting happens on the listener thread, not the caller's."""
+
+    def prepare(self, record):
+        return record
+
+def setup_logging(console_level=None, log_file_path=None):
+    """
+    Routes the 'resume_checker' logger through a queue to the console and the JSON-lines log file, both written
+    by a QueueListener thread. Safe to call again (e.g. with a different level); the listener is stopped at exit.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        log.handlers.clear()
+    console_level = logging.getLevelName((console_level or LOG_CONSOLE_LEVEL).upper())
+    handlers = []
+    console_handler = ConsoleLogHandler(sys.stdout)
+    console_handler.setLevel(console_level)
+    handlers.append(console_handler)
+    if log_file_path is None and LOG_FILE_NAME:
+        log_file_path = os.path.join(output_directory, LOG_FILE_NAME)
+    file_level = console_level
+    if log_file_path:
+        file_handler = logging.handlers.RotatingFileHandler(log_file_path, maxBytes=LOG_FILE_MAX_BYTES,
+                                                            backupCount=LOG_FILE_BACKUP_COUNT, encoding='utf-8')
+        file_level = logging.getLevelName(LOG_FILE_LEVEL.upper())
+        file_handler.setLevel(file_level)
+        file_handler.setFormatter(JsonLinesLogFormatter())
+        handlers.append(file_handler)
+    log_queue = queue.SimpleQueue()
+    log.addHandler(DeferredFormatQueueHandler(log_queue))
+    log.setLevel(min(console_level, file_level)) # DEBUG calls return immediately unless some handler wants them
+    log.propagate = False
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+
+def stop_logging():
+    """Flushes queued log records and stops the listener thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+atexit.register(stop_logging)
+
+
 # --- Initialize spaCy ---
 try:
     nlp = spacy.load("en_core_web_sm")
@@ -72,42 +394,385 @@ except OSError:
         print("   Exiting script. Please resolve SpaCy model issue.")
         exit()
 
+# Docs computed ahead of time in one nlp.pipe call (see prime_nlp_docs); keyed by text
+_prefetched_nlp_docs = {}
+
+def nlp_doc(text):
+    """spaCy Doc for text, reusing one prepared by prime_nlp_docs when available."""
+    doc = _prefetched_nlp_docs.get(text)
+    return doc if doc is not None else nlp(text)
+
+def prime_nlp_docs(texts, batch_size=32):
+    """Runs spaCy over many texts in one nlp.pipe call so the following nlp_doc() lookups are free."""
+    _prefetched_nlp_docs.clear()
+    unique_texts = [text for text in dict.fromkeys(texts) if text]
+    nlp_memory_guard.maybe_reload_nlp() # Nothing is primed at this point, so the pipeline can be swapped
+    _prefetched_nlp_docs.update(zip(unique_texts, nlp.pipe(unique_texts, batch_size=batch_size)))
+
+def reload_nlp():
+    """Replaces the shared spaCy pipeline with a freshly loaded one, dropping the vocab it has accumulated."""
+    global nlp
+    _prefetched_nlp_docs.clear()
+    nlp = spacy.load("en_core_web_sm")
+    gc.collect()
+
+
+# --- Memory Guard for Long-running Processes ---
+_rss_warning_shown = False
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None when it cannot be measured."""
+    global _rss_warning_shown
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        if not _rss_warning_shown:
+            _rss_warning_shown = True
+            log.warning("⚠️ Process memory cannot be measured; install 'psutil' (pip install psutil). "
+                        "spaCy is still reloaded every %d resumes.", NLP_RELOAD_EVERY_DOCUMENTS)
+        return None
+
+class NlpMemoryGuard:
+    """
+    Counts the resumes a process parses and reloads the shared spaCy pipeline after reload_every of them or once RSS
+    has grown by reload_growth_mb, so its vocab cannot grow without bound. should_recycle() tells a long-running
+    worker that a fresh process is due.
+    """
+
+    def __init__(self, reload_every=NLP_RELOAD_EVERY_DOCUMENTS, reload_growth_mb=NLP_RELOAD_GROWTH_MB,
+                 rss_ceiling_mb=MEMORY_RSS_CEILING_MB, recycle_every=WORKER_RECYCLE_EVERY_DOCUMENTS):
+        self.reload_every = reload_every
+        self.reload_growth_mb = reload_growth_mb
+        self.rss_ceiling_mb = rss_ceiling_mb
+        self.recycle_every = recycle_every
+        self.restart()
+
+    def restart(self):
+        """Starts counting afresh, e.g. in a newly started worker process."""
+        self.documents = 0
+        self.documents_since_reload = 0
+        self.reloads = 0
+        self.baseline_mb = None # RSS right after the last reload; measured with the first resume
+        self.peak_mb = None
+
+    def count_document(self, reload_allowed=True):
+        """Called before each resume is parsed; reloads spaCy first when one is due and reload_allowed."""
+        if reload_allowed:
+            self.maybe_reload_nlp()
+        self.documents += 1
+        self.documents_since_reload += 1
+
+    def reload_due(self):
+        if self.reload_every and self.documents_since_reload >= self.reload_every:
+            return True
+        if not self.reload_growth_mb or self.documents_since_reload == 0:
+            return False
+        rss = current_rss_mb()
+        if rss is None:
+            return False
+        self.peak_mb = max(self.peak_mb or rss, rss)
+        if self.baseline_mb is None:
+            self.baseline_mb = rss
+        return rss - self.baseline_mb >= self.reload_growth_mb
+
+    def maybe_reload_nlp(self):
+        if self.reload_due():
+            self.reload_nlp()
+
+    def reload_nlp(self):
+        started = time.perf_counter()
+        reload_nlp()
+        rss = current_rss_mb()
+        log.debug("  🧠 Reloaded spaCy after %d resume(s) in %.2fs (RSS %s MB).", self.documents_since_reload,
+                  time.perf_counter() - started, f"{rss:.0f}" if rss is not None else "?")
+        self.reloads += 1
+        self.documents_since_reload = 0
+        self.baseline_mb = rss
+
+    def should_recycle(self):
+        """True once this process has parsed recycle_every resumes, or stays above the RSS ceiling after a reload."""
+        if self.recycle_every and self.documents >= self.recycle_every:
+            return True
+        rss = current_rss_mb()
+        if not self.rss_ceiling_mb or rss is None or rss <= self.rss_ceiling_mb:
+            return False
+        if self.documents_since_reload: # A reload is cheaper than a new process; try it first
+            self.reload_nlp()
+            rss = current_rss_mb()
+        return rss is not None and rss > self.rss_ceiling_mb
+
+    def stats(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb or rss, rss)
+        return {'rss_mb': round(rss, 1) if rss is not None else None,
+                'peak_rss_mb': round(self.peak_mb, 1) if self.peak_mb is not None else None,
+                'documents': self.documents, 'nlp_reloads': self.reloads}
+
+nlp_memory_guard = NlpMemoryGuard()
+
 
 # --- Helper Functions ---
-def sanitize_string_for_print(s):
-    """Removes or replaces characters that might cause encoding errors during printing."""
-    if not isinstance(s, str):
-        return str(s) # Convert to string if not already
-    return s.encode('utf-8', errors='replace').decode('utf-8')
+def source_display_name(source):
+    """Basename of a path, or the name attached to an in-memory stream."""
+    if isinstance(source, str):
+        return os.path.basename(source)
+    return getattr(source, 'name', '<in-memory file>')
 
 def extract_text_from_pdf(pdf_path):
-    text = ""
+    page_texts = []
     try:
         reader = pypdf.PdfReader(pdf_path)
-        for page_num in range(len(reader.pages)):
-            page = reader.pages[page_num]
-            text += page.extract_text()
+        for page in reader.pages:
+            page_texts.append(page.extract_text() or "")
+        if any(len(page_text.strip()) < OCR_PAGE_MIN_TEXT_CHARS for page_text in page_texts) and ocr_available():
+            page_texts = ocr_pdf_pages(reader, page_texts, source_display_name(pdf_path))
     except pypdf.errors.PdfReadError as e:
-        print(f"  ❌ PDF Read Error: {os.path.basename(pdf_path)} - {e}")
-        print("     This might indicate a corrupted or unreadable PDF file.")
+        log.error("  ❌ PDF Read Error: %s - %s (the PDF may be corrupted or unreadable)", source_display_name(pdf_path), e,
+                  extra=log_fields(file_name=source_display_name(pdf_path), stage="extract"))
     except Exception as e:
-        print(f"  ❌ Unexpected Error reading PDF {os.path.basename(pdf_path)}: {e}")
-    return text
+        log.error("  ❌ Unexpected Error reading PDF %s: %s", source_display_name(pdf_path), e,
+                  extra=log_fields(file_name=source_display_name(pdf_path), stage="extract"))
+    return "".join(page_texts)
+
+
+# --- OCR Fallback for Scanned PDFs ---
+# Only pages without a text layer are OCRed, in page order, a few at a time in a process pool. OCR stops as soon as the
+# text has a header, contact details and skills, and each page's result is cached by a hash of its images.
+_ocr_pool = None
+_ocr_status = None # None until checked, then True/False
+_ocr_page_cache = threading.local() # Per thread: (process id, database path) and the page-cache connection
+
+def ocr_available():
+    """True if OCR is enabled and pytesseract, Pillow and the Tesseract program are all present (checked once)."""
+    global _ocr_status
+    if _ocr_status is None:
+        _ocr_status = False
+        if OCR_ENABLED and pytesseract is not None:
+            try:
+                pytesseract.get_tesseract_version()
+                _ocr_status = True
+            except Exception as e:
+                log.warning("  ⚠️ OCR disabled: Tesseract is not available (%s). Scanned PDF pages will stay empty.", e)
+    return _ocr_status
+
+def get_ocr_pool():
+    """The OCR process pool, started on first use. Processes that are pool workers themselves OCR inline (None)."""
+    global _ocr_pool
+    if multiprocessing.current_process().daemon: # e.g. a backfill worker, which may not start child processes
+        return None
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+    return _ocr_pool
+
+def get_ocr_page_cache():
+    """
+    This thread's connection to the OCR page cache (ocr_pages in the candidate database), opened on first use and
+    kept, so a worker sets up the database once instead of once per scanned PDF. A forked process opens its own.
+    """
+    db_path = os.path.join(output_directory, CANDIDATE_DB_FILE_NAME)
+    key = (os.getpid(), db_path)
+    if getattr(_ocr_page_cache, 'key', None) != key:
+        if getattr(_ocr_page_cache, 'key', (None,))[0] == os.getpid():
+            _ocr_page_cache.conn.close() # Output folder changed; a connection inherited from the parent is left alone
+        _ocr_page_cache.conn = open_candidate_store(db_path)
+        _ocr_page_cache.key = key
+    return _ocr_page_cache.conn
+
+def _ocr_page_images(image_blobs, language, timeout_seconds):
+    """Runs Tesseract over the images of one page (in a pool process). Returns their text."""
+    texts = []
+    for blob in image_blobs:
+        with Image.open(io.BytesIO(blob)) as image:
+            texts.append(pytesseract.image_to_string(image, lang=language, timeout=timeout_seconds))
+    return "\n".join(text.strip() for text in texts if text.strip()) + "\n"
+
+def ocr_regions_recovered(text):
+    """True once the text has a header block, an email or phone number, and skills: later pages need no OCR."""
+    if not (EMAIL_PATTERN.search(text) or PHONE_PATTERNS[1].search(text) or PHONE_PATTERNS[2].search(text)):
+        return False
+    document = segment_resume_text(text)
+    if not document.section('header').strip():
+        return False
+    if 'skills' in document.spans:
+        return True
+    text_lower = text.lower() # a job title alone can name a skill, so without a skills section ask for a few
+    return sum(1 for _, pattern in TAXONOMY_SKILL_PATTERNS if pattern.search(text_lower)) >= OCR_MIN_SKILL_HITS
+
+def ocr_pdf_pages(reader, page_texts, source_name):
+    """
+    Fills in the pages of a pypdf reader that have (almost) no text layer with OCR text, up to OCR_MAX_PAGES of
+    them. Pages are OCRed in order with up to OCR_WORKERS in flight; returns the updated list of page texts.
+    """
+    page_texts = list(page_texts)
+    if ocr_regions_recovered("".join(page_texts)):
+        return page_texts
+    scanned_pages = iter([index for index, page_text in enumerate(page_texts)
+                          if len(page_text.strip()) < OCR_PAGE_MIN_TEXT_CHARS][:OCR_MAX_PAGES])
+    pool = get_ocr_pool()
+    started = time.perf_counter()
+    counts = {'ocr': 0, 'cached': 0, 'failed': 0}
+    in_flight = deque() # (page index, page hash, future or None, cached text or None), in page order
+
+    store = get_ocr_page_cache()
+
+    def submit_next():
+        for index in scanned_pages:
+            image_blobs = [image.data for image in reader.pages[index].images]
+            if not image_blobs:
+                continue
+            page_hash = hashlib.sha1(b"".join(image_blobs)).hexdigest()
+            cached = store.execute("SELECT text FROM ocr_pages WHERE page_hash = ?", (page_hash,)).fetchone()
+            if cached:
+                in_flight.append((index, page_hash, None, cached[0]))
+            elif pool is None:
+                future = Future()
+                try:
+                    future.set_result(_ocr_page_images(image_blobs, OCR_LANGUAGE, OCR_PAGE_TIMEOUT_SECONDS))
+                except Exception as e:
+                    future.set_exception(e)
+                in_flight.append((index, page_hash, future, None))
+            else:
+                in_flight.append((index, page_hash, pool.submit(_ocr_page_images, image_blobs, OCR_LANGUAGE,
+                                                                 OCR_PAGE_TIMEOUT_SECONDS), None))
+            return True
+        return False
+
+    for _ in range(OCR_WORKERS if pool is not None else 1):
+        if not submit_next():
+            break
+    while in_flight:
+        index, page_hash, future, text = in_flight.popleft()
+        if future is None:
+            counts['cached'] += 1
+        else:
+            try:
+                text = future.result(timeout=OCR_PAGE_TIMEOUT_SECONDS + 5) # Tesseract itself is killed at the timeout
+                counts['ocr'] += 1
+                with store:
+                    store.execute("INSERT OR REPLACE INTO ocr_pages (page_hash, text) VALUES (?, ?)", (page_hash, text))
+            except Exception as e:
+                counts['failed'] += 1
+                log.warning("  ⚠️ OCR failed for page %d of %s: %s", index + 1, source_name, e or type(e).__name__,
+                            extra=log_fields(file_name=source_name, stage="ocr"))
+                text = ""
+        page_texts[index] = (page_texts[index].strip() + "\n" + text).lstrip("\n") if page_texts[index].strip() else text
+        if ocr_regions_recovered("".join(page_texts)):
+            break
+        submit_next()
+    for _, _, future, _ in in_flight: # Early stop: pages not started yet are dropped
+        if future is not None:
+            future.cancel()
+
+    log.debug("  🔍 OCR of %s: %d page(s) recognised, %d from cache, %d failed, %d page(s) left (%.1fs).", source_name,
+              counts['ocr'], counts['cached'], counts['failed'], len(in_flight) + sum(1 for _ in scanned_pages),
+              time.perf_counter() - started, extra=log_fields(file_name=source_name, stage="ocr",
+                                                             duration_ms=round((time.perf_counter() - started) * 1000, 1)))
+    return page_texts
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MARKUP_COMPATIBILITY_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+DOCX_HEADER_FOOTER_PART_PATTERN = re.compile(r'^word/(header|footer)(\d*)\.xml$')
+
+def iter_docx_part_lines(xml_stream):
+    """
+    Streams one WordprocessingML part (document, header or footer) with iterparse and yields its text
+    lines in reading order: one line per paragraph, one line per table row with cells joined by ' | '.
+    Text boxes come out as their own lines; their VML fallback copies are skipped.
+    """
+    paragraph_stack = [] # Text runs of the open paragraphs (text boxes nest paragraphs inside paragraphs)
+    cell_stack = [] # Lines of the open table cells
+    row_stack = [] # Cell texts of the open table rows
+    fallback_depth = 0
+
+    def emit(line):
+        # Inside a table cell a finished line belongs to that cell, otherwise it is a document line
+        if cell_stack:
+            cell_stack[-1].append(line)
+            return None
+        return line
+
+    for event, element in ET.iterparse(xml_stream, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag == WORD_NS + "p":
+                paragraph_stack.append([])
+            elif tag == WORD_NS + "tc":
+                cell_stack.append([])
+            elif tag == WORD_NS + "tr":
+                row_stack.append([])
+            elif tag == MARKUP_COMPATIBILITY_NS + "Fallback":
+                fallback_depth += 1
+            continue
+
+        if tag == MARKUP_COMPATIBILITY_NS + "Fallback":
+            fallback_depth -= 1
+        elif fallback_depth:
+            pass
+        elif tag == WORD_NS + "t" and paragraph_stack:
+            paragraph_stack[-1].append(element.text or "")
+        elif tag == WORD_NS + "tab" and paragraph_stack:
+            paragraph_stack[-1].append("\t")
+        elif tag in (WORD_NS + "br", WORD_NS + "cr") and paragraph_stack:
+            paragraph_stack[-1].append("\n")
+        elif tag == WORD_NS + "p" and paragraph_stack:
+            line = emit("".join(paragraph_stack.pop()).strip())
+            if line is not None:
+                yield line
+            element.clear()
+        elif tag == WORD_NS + "tc" and cell_stack:
+            cell_text = " ".join(line for line in cell_stack.pop() if line)
+            if row_stack:
+                row_stack[-1].append(cell_text)
+        elif tag == WORD_NS + "tr" and row_stack:
+            line = emit(" | ".join(cell for cell in row_stack.pop() if cell))
+            if line is not None:
+                yield line
+            element.clear()
+        elif tag == WORD_NS + "tbl":
+            element.clear()
 
 def extract_text_from_docx(docx_path):
-    text = ""
+    """
+    Reads the text of a .docx (path or binary stream) straight from its XML parts: headers first
+    (names and contact details often live there), then the body including tables and text boxes,
+    then footers. Repeated header/footer lines (first-page/even-page variants) are kept once.
+    """
+    lines = []
     try:
-        doc = Document(docx_path)
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-    except Exception as e:
-        print(f"  ❌ Error reading DOCX {os.path.basename(docx_path)}: {e}")
-    return text
+        with zipfile.ZipFile(docx_path) as docx_zip:
+            part_names = docx_zip.namelist()
+            header_footer_parts = sorted(
+                (match.group(1), int(match.group(2) or 0), name)
+                for name in part_names
+                for match in [DOCX_HEADER_FOOTER_PART_PATTERN.match(name)] if match)
+            ordered_parts = [name for kind, _, name in header_footer_parts if kind == "header"] + ['word/document.xml'] + \
+                            [name for kind, _, name in header_footer_parts if kind == "footer"]
+
+            seen_header_footer_lines = set()
+            for part_name in ordered_parts:
+                if part_name not in part_names:
+                    continue
+                is_header_footer = part_name != 'word/document.xml'
+                with docx_zip.open(part_name) as xml_stream:
+                    for line in iter_docx_part_lines(xml_stream):
+                        if is_header_footer:
+                            if not line or line in seen_header_footer_lines:
+                                continue
+                            seen_header_footer_lines.add(line)
+                        lines.append(line)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError) as e:
+        log.error("  ❌ Error reading DOCX %s: %s", source_display_name(docx_path), e,
+                  extra=log_fields(file_name=source_display_name(docx_path), stage="extract"))
+    return "\n".join(lines) + "\n" if lines else ""
 
 def convert_doc_to_docx(doc_path):
     """Converts a .doc file to .docx using Microsoft Word (Windows only)."""
     if win32com is None:
-        print(f"  ⚠️ Cannot convert .doc to .docx: pywin32 not installed.")
+        log.warning("  ⚠️ Cannot convert .doc to .docx: pywin32 not installed.")
         return None
     
     # Ensure Word is not already open to avoid issues
@@ -125,18 +790,19 @@ def convert_doc_to_docx(doc_path):
         # wdFormatXMLDocument = 12 (for .docx format)
         doc.SaveAs2(docx_path, FileFormat=12)
         doc.Close()
-        print(f"  ✅ Converted '{os.path.basename(doc_path)}' to '{os.path.basename(docx_path)}'")
+        log.debug("  ✅ Converted '%s' to '%s'", os.path.basename(doc_path), os.path.basename(docx_path),
+                  extra=log_fields(file_name=os.path.basename(doc_path), stage="convert"))
         return docx_path
     except Exception as e:
-        print(f"  ❌ Error converting .doc to .docx for '{os.path.basename(doc_path)}': {e}")
-        print("     Ensure Microsoft Word is installed and accessible.")
+        log.error("  ❌ Error converting .doc to .docx for '%s': %s (ensure Microsoft Word is installed and accessible)",
+                  os.path.basename(doc_path), e, extra=log_fields(file_name=os.path.basename(doc_path), stage="convert"))
         return None
     finally:
         if word_app:
             try:
                 word_app.Quit()
             except Exception as quit_err:
-                print(f"  ⚠️ Warning: Error quitting Word application: {quit_err}")
+                log.warning("  ⚠️ Warning: Error quitting Word application: %s", quit_err)
 
 
 def is_plausible_name(name_str):
@@ -177,6 +843,49 @@ def is_plausible_name(name_str):
 
     return True
 
+def load_name_gazetteer(path=NAME_GAZETTEER_FILE):
+    """Reads the gazetteer through mmap into (first names, surnames) frozensets of lowercase names."""
+    names = {'first': set(), 'surname': set()}
+    if not path or not os.path.exists(path) or os.path.getsize(path) == 0:
+        return frozenset(), frozenset()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        section = None
+        for raw_line in iter(mapped.readline, b""):
+            line = raw_line.strip().decode('utf-8', errors='ignore').lower()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                section = names.get(line[1:-1])
+            elif section is not None:
+                section.add(line)
+    return frozenset(names['first']), frozenset(names['surname'])
+
+GAZETTEER_FIRST_NAMES, GAZETTEER_SURNAMES = load_name_gazetteer()
+GAZETTEER_NAME_TOKEN_PATTERN = re.compile(r"^(?:[A-Z][A-Za-z'\-]+|[A-Z]\.?)$")
+NAME_LINE_NOISE_PATTERN = re.compile(r'(\s*-\s*|\s*\|\s*|\s*,\s*)\s*(software engineer|data scientist|manager|developer|analyst|specialist|contact|email|phone|profile|summary|experience|education|skills|cv|resume|sr\.|jr\.)\W*', re.IGNORECASE)
+# Resumes parsed since start-up, by how the resume-text name was found; process_resume_documents reports the split per cycle
+NAME_RECOGNIZER_COUNTS = {'gazetteer': 0, 'ner': 0}
+
+def gazetteer_name_from_lines(lines):
+    """
+    Fast-path name recognizer: the first of the top 5 lines that is 2-4 capitalized words (initials allowed)
+    where every full word is a known name, starting with a first name. Returns None when unsure, so
+    the caller falls back to spaCy NER.
+    """
+    if not GAZETTEER_FIRST_NAMES:
+        return None
+    for line in lines[:5]:
+        candidate = NAME_LINE_NOISE_PATTERN.sub('', line.strip()).strip(" \t,|-•")
+        tokens = candidate.split()
+        if not 2 <= len(tokens) <= 4 or not all(GAZETTEER_NAME_TOKEN_PATTERN.match(token) for token in tokens):
+            continue
+        words = [token.lower() for token in tokens if len(token.rstrip('.')) > 1] # Initials ("K.", "R") are not looked up
+        if len(words) < 2 or words[0] not in GAZETTEER_FIRST_NAMES:
+            continue
+        if all(word in GAZETTEER_FIRST_NAMES or word in GAZETTEER_SURNAMES for word in words[1:]) and is_plausible_name(candidate):
+            return " ".join(tokens)
+    return None
+
 def extract_name_from_filename(filename):
     base_name = os.path.splitext(filename)[0]
     # Remove common resume-related keywords and numbers/copies
@@ -211,7 +920,7 @@ def extract_name_from_email(email):
     
     return extracted_name # is_plausible_name check will be done by caller
 
-def extract_name_from_email_subject(subject_line):
+def extract_name_from_email_subject(subject_line, use_ner=True):
     name_candidates = []
     
     # Remove common prefixes/suffixes and job titles
@@ -231,8 +940,8 @@ def extract_name_from_email_subject(subject_line):
     name_candidates.append(potential_name)
 
     # Use spacy for subject too for PERSON entities if subject is long enough
-    if len(subject_line) > 10:
-        doc_subject = nlp(subject_line)
+    if use_ner and len(subject_line) > 10:
+        doc_subject = nlp_doc(subject_line)
         for ent in doc_subject.ents:
             if ent.label_ == "PERSON":
                 name_candidates.append(ent.text)
@@ -244,7 +953,7 @@ def extract_name_from_email_subject(subject_line):
         return max(plausible_candidates, key=len) # Prefer longer names
     return None
 
-def extract_name_from_email_body(body_text):
+def extract_name_from_email_body(body_text, use_ner=True):
     name_candidates = []
     lines = body_text.split('\n')
     
@@ -282,10 +991,11 @@ def extract_name_from_email_body(body_text):
             name_candidates.append(line_clean)
 
     # Use spacy for body too for PERSON entities (limit text to save processing)
-    body_doc = nlp(body_text[:1500]) # Process first 1500 chars for names
-    for ent in body_doc.ents:
-        if ent.label_ == "PERSON":
-            name_candidates.append(ent.text)
+    if use_ner:
+        body_doc = nlp_doc(body_text[:1500]) # Process first 1500 chars for names
+        for ent in body_doc.ents:
+            if ent.label_ == "PERSON":
+                name_candidates.append(ent.text)
 
     # Select the longest plausible name found in the body
     # This function now just returns a strong candidate, final plausibility and selection will be done by caller
@@ -304,6 +1014,8 @@ def get_name_confidence(name, source_type):
     # Base scores - ordered by general reliability
     if source_type == "pyresparser":
         score = 5.0 # Highest confidence, directly from dedicated resume parser
+    elif source_type == "gazetteer":
+        score = 4.8 # Header line made only of known first names/surnames
     elif source_type == "basic_parser_resume_text":
         score = 4.5 # High confidence, SpaCy PERSON entity from resume text
     elif source_type == "email_sender_display_name": # NEW: Sender's display name from email
@@ -329,40 +1041,926 @@ def get_name_confidence(name, source_type):
     return score
 
 
-def parse_resume_data_basic(text):
+# --- Skill Taxonomy ---
+# Skills by family; the family names are what the reporting rollups group by (see candidate_rollups)
+SKILL_TAXONOMY = {
+    # --- VLSI / Semiconductor Skills ---
+    # Digital Design (DD)
+    "DD": [
+        "Verilog", "VHDL", "SystemVerilog", "RTL Design", "Logic Synthesis",
+        "Static Timing Analysis", "STA", "Formal Verification", "Linting",
+        "Clock Domain Crossing", "CDC", "Reset Domain Crossing", "RDC",
+        "Low Power Design", "Power Analysis", "FPGA Design", "ASIC Design",
+        "Combinational Logic", "Sequential Logic", "Finite State Machines", "FSM",
+        "Pipelining", "Data Paths", "Control Paths", "Memory Design", "SRAM", "DRAM",
+        "I/O Interfaces", "SPI", "I2C", "UART", "ARM Architecture", "RISC-V",
+        "Cache Coherence", "High-Level Synthesis", "Synthesis", "Netlist",
+        "Timing Closure", "Digital Logic", "Verilog-HDL", "VHDL-AMS"
+    ],
+
+    # Design Verification (DV)
+    "DV": [
+        "UVM", "Universal Verification Methodology", "Specman E", "PSL",
+        "SVA", "SystemVerilog Assertions", "Functional Verification",
+        "Testbench Architecture", "Test Plan", "Coverage Driven Verification", "CDV",
+        "Constrained Random Verification", "CRV", "Model Checking",
+        "Assertion-Based Verification", "ABV", "Emulation", "FPGA Prototyping",
+        "Regression Management", "Bug Tracking", "Gate Level Simulation", "GLS",
+        "Transaction-Level Modeling", "TLM", "Scoreboarding", "Monitors", "Drivers",
+        "Sequencers", "Checkers", "Functional Coverage", "Code Coverage",
+        "Protocol Verification", "VIP", "Verification IP", "Debugging", "Verdi",
+        "VCS", "QuestaSim", "Incisive", "Xcelium", "FormalPro", "SpyGlass",
+        "JasperGold", "Symphony", "Unified Power Format", "UPF", "CPF",
+        "Verification Methodology", "Verification Plan", "Coverage Closure",
+        "Formal Equivalence Checking", "LEC", "Assertions", "Test Automation"
+    ],
+
+    # Design for Testability (DFT)
+    "DFT": [
+        "Scan Insertion", "ATPG", "Automatic Test Pattern Generation", "JTAG",
+        "Boundary Scan", "MBIST", "Memory Built-In Self-Test", "LBIST",
+        "Logic Built-In Self-Test", "Fault Simulation", "Stuck-at Faults",
+        "Transition Faults", "Bridging Faults", "Test Compression", "DFT Sign-off",
+        "Diagnosis", "ATE", "Automatic Test Equipment", "Scan Chains", "Test Modes",
+        "Fault Models", "Test Coverage", "IP-level DFT", "System-level DFT",
+        "Delay Testing", "At-speed Testing", "TetraMax", "TestKompress", "DFT Compiler",
+        "SMS", "Tessent", "OpTest", "DFTMAX", "DesignWare", "Pattern Generation",
+        "Fault Coverage", "Manufacturing Test", "Yield Improvement"
+    ],
+
+    # Physical Design (PD)
+    "PD": [
+        "Physical Design", "Layout Design", "Floorplanning", "Power Grid Network", "PGN",
+        "Placement", "Clock Tree Synthesis", "CTS", "Routing", "ECO", "Engineering Change Order",
+        "Design Rule Check", "DRC", "Layout Versus Schematic", "LVS", "Parasitic Extraction", "PEX",
+        "Power Integrity", "Signal Integrity", "IR Drop Analysis", "EM", "Electromigration",
+        "Physical Verification", "DFM", "Design for Manufacturability", "Timing Closure",
+        "Cadence Innovus", "Synopsys ICC", "Synopsys ICC2", "Siemens Aprisa", "PrimeTime",
+        "Quantus", "Voltus", "Tempus", "Calibre", "StarRC", "NanoRoute", "RedHawk",
+        "Chip Assembly", "Tapeout", "GDSII", "LEF", "DEF", "Liberty Format", ".lib",
+        "Low Power Implementation", "FinFET", "Process Technology", "Layout Editor"
+    ],
+
+    # Analog Design
+    "Analog": [
+        "Analog Design", "Analog IC Design", "Transistor Level Design", "Schematic Design",
+        "Layout Design", "SPICE Simulation", "Noise Analysis", "PVT", "Process Voltage Temperature",
+        "Matching", "Bandgap References", "LDO", "Low Dropout Regulator", "PLL", "Phase-Locked Loop",
+        "ADC", "Analog-to-Digital Converter", "DAC", "Digital-to-Analog Converter", "Op-Amp",
+        "Filters", "Oscillators", "RF Design", "Radio Frequency", "Mixed-Signal Simulation",
+        "Cadence Virtuoso", "Spectre", "HSPICE", "Eldo", "ADE", "Analog Design Environment",
+        "Mentor Graphics AFS", "Analog FastSPICE", "Keysight ADS", "EMX", "Momentum",
+        "Custom Layout", "Device Physics", "CMOS", "Bipolar", "BiCMOS", "Power Management IC",
+        "PMIC", "Data Converters", "Amplifiers", "Transceivers", "Analog Front End", "AFE",
+        # Analog Mixed-Signal (AMS)
+        "Analog Mixed-Signal", "AMS Design", "Mixed-Signal Verification", "Co-simulation",
+        "Verilog-AMS", "AMS Designer", "Custom Compiler", "Xcelium AMS", "Questa AMS",
+        "Behavioral Modeling", "Top-level Integration", "System-level Verification",
+        "Spice/FastSpice/UltraSim", "Real-Number Modeling", "RNM", "Mixed Signal Flow"
+    ],
+
+    # FPGA Design
+    "FPGA": [
+        "FPGA", "FPGA Development", "Xilinx Vivado", "AMD Vivado", "Intel Quartus Prime",
+        "Altera Quartus", "Lattice Diamond", "Libero SoC", "FPGA Prototyping",
+        "Logic Optimization", "IP Integration", "On-chip Debugging", "ILA", "VIO",
+        "HLS", "High-Level Synthesis", "Board Bring-up", "System Integration",
+        "Synthesis Constraints", "Place and Route", "Timing Closure (FPGA)",
+        "FPGA Architecture", "Hardware Description Language", "HDL", "MicroBlaze", "Zynq",
+        "NIOS", "Platform Design", "Embedded Processor"
+    ],
+
+    # IP Design and Characterization
+    "IP": [
+        "IP Design", "IP Core Development", "IP Integration", "IP Verification",
+        "IP Hardening", "IP Delivery", "Library Characterization", "Standard Cell Libraries",
+        "IO Libraries", "Memory Compilers", "Characterization Tools", "Cadence Liberate",
+        "Synopsys SiliconSmart", "Synopsys SiliconSmart", "Liberty (.lib)", "Timing Models",
+        "Power Models", "Noise Models", "IP Reuse", "Design IP", "Verification IP", "Test IP",
+        "EDA Tools", "Foundry Process", "PDK", "Process Design Kit"
+    ],
+
+    # Test Chip Development and Post-Silicon
+    "Silicon": [
+        "Test Chip", "Test Chip Development", "Silicon Validation", "Post-Silicon Validation",
+        "Bring-up", "Debugging", "Characterization", "Measurement", "Yield Analysis",
+        "Failure Analysis", "FA", "Wafer Test", "Package Test", "Production Test",
+        "ATE Test Program", "Automated Test Equipment", "Parametric Test", "Functional Test",
+        "Silicon Debug", "Data Analysis", "Statistical Process Control", "SPC",
+        "Product Engineering", "Reliability Testing"
+    ]
+}
+PREDEFINED_SKILLS = [skill for family_skills in SKILL_TAXONOMY.values() for skill in family_skills]
+
+# Skills are interned once into integer IDs so records can hold a small frozenset of IDs
+# instead of comma-joined strings that get split and re-joined at every step.
+SKILL_NAMES = [] # skill ID -> display name (first spelling seen wins)
+SKILL_IDS = {} # lowercased skill -> skill ID
+
+def intern_skill(skill):
+    """Returns the interned ID for a skill name, registering it if it is not in the taxonomy yet."""
+    if not isinstance(skill, str):
+        return None
+    skill = skill.strip()
+    key = skill.lower()
+    if not key or key == 'n/a':
+        return None
+    skill_id = SKILL_IDS.get(key)
+    if skill_id is None:
+        skill_id = len(SKILL_NAMES)
+        SKILL_NAMES.append(skill)
+        SKILL_IDS[key] = skill_id
+    return skill_id
+
+def skill_ids_from_names(skill_names):
+    return frozenset(skill_id for skill_id in map(intern_skill, skill_names) if skill_id is not None)
+
+def skill_ids_from_string(skills_str):
+    """Parses a stored 'Skill' cell (comma-joined) into interned skill IDs."""
+    if not isinstance(skills_str, str):
+        return frozenset()
+    return skill_ids_from_names(skills_str.split(','))
+
+def skill_ids_to_string(skill_ids):
+    """Renders skill IDs back to the sorted, comma-joined form used in the Excel output."""
+    if not skill_ids:
+        return "N/A"
+    return ", ".join(sorted(SKILL_NAMES[skill_id] for skill_id in skill_ids))
+
+def taxonomy_skill_pattern(skill):
+    """Pattern finding a taxonomy skill in lowercased resume text."""
+    # Use word boundaries to avoid partial matches (e.g., "C" matching "C#")
+    return re.compile(r'\b' + re.escape(skill.lower()) + r'\b')
+
+def taxonomy_skill_patterns(skills):
+    """Interns the skills and returns [(skill ID, pattern)], one per distinct skill in first-seen order."""
+    patterns = {}
+    for skill in skills:
+        skill_id = intern_skill(skill)
+        if skill_id not in patterns:
+            patterns[skill_id] = taxonomy_skill_pattern(skill)
+    return list(patterns.items())
+
+def skill_families_by_id(taxonomy):
+    """Skill ID -> the families listing it (a few skills, e.g. "Timing Closure", belong to more than one)."""
+    families_by_id = {}
+    for family, family_skills in taxonomy.items():
+        for skill in family_skills:
+            families_by_id.setdefault(intern_skill(skill), []).append(family)
+    return families_by_id
+
+# Taxonomy IDs are interned first, with their word-boundary patterns compiled once per run
+TAXONOMY_SKILL_PATTERNS = taxonomy_skill_patterns(PREDEFINED_SKILLS)
+SKILL_FAMILIES_BY_ID = skill_families_by_id(SKILL_TAXONOMY)
+SKILL_FAMILY_RANK = {family: rank for rank, family in enumerate(SKILL_FAMILY_PRECEDENCE)}
+
+def candidate_skill_family(skill_ids, families_by_id=None):
+    """The family holding most of a candidate's taxonomy skills (ties: SKILL_FAMILY_PRECEDENCE order), or 'Other'."""
+    families_by_id = SKILL_FAMILIES_BY_ID if families_by_id is None else families_by_id
+    counts = Counter(family for skill_id in skill_ids for family in families_by_id.get(skill_id, ()))
+    if not counts:
+        return "Other"
+    return max(counts, key=lambda family: (counts[family], -SKILL_FAMILY_RANK.get(family, len(SKILL_FAMILY_RANK))))
+
+
+# --- Candidate Records ---
+# Column name in the Excel output -> CandidateRecord attribute
+RECORD_COLUMNS = [
+    ("Source Date", "source_date"), ("Month", "month"), ("Year", "year"), ("Skill", "skill_ids"),
+    ("Candidate Name", "candidate_name"), ("Total Experience", "total_experience"),
+    ("Email ID", "email_id"), ("Phone Number", "phone_number"), ("File Name", "file_name"),
+    ("Status", "status"),
+    # Details only shown in the 'cadate' sheet
+    ("Education", "education"), ("NP", "notice_period"), ("Current Company", "current_company"),
+    ("CCTC", "current_ctc"), ("ECTC", "expected_ctc"), ("Current Location", "current_location")
+]
+
+# Kept with each record for the candidate database, but not written to the Excel sheets
+RECORD_STORE_ONLY_FIELDS = ("text_signature", "near_duplicate_of", "resume_text")
+
+class CandidateRecord:
+    """One parsed resume. Slotted to keep per-record memory small during large runs."""
+    __slots__ = tuple(attr for _, attr in RECORD_COLUMNS) + RECORD_STORE_ONLY_FIELDS
+
+    def __init__(self, file_name):
+        self.source_date = "N/A"
+        self.month = "N/A"
+        self.year = "N/A"
+        self.skill_ids = frozenset()
+        self.candidate_name = "N/A"
+        self.total_experience = "N/A"
+        self.email_id = "N/A"
+        self.phone_number = "N/A"
+        self.file_name = file_name
+        self.status = "New"
+        self.education = "N/A"
+        self.notice_period = "N/A"
+        self.current_company = "N/A"
+        self.current_ctc = "N/A"
+        self.expected_ctc = "N/A"
+        self.current_location = "N/A"
+        self.text_signature = None # MinHash signature of the resume text (numpy uint32 array)
+        self.near_duplicate_of = None # candidates.id of the earlier resume this one nearly repeats
+        self.resume_text = None # zlib-compressed lowercased resume text, kept so 'retag' can rescan it
+
+    @property
+    def skill(self):
+        return skill_ids_to_string(self.skill_ids)
+
+    def filename_skills_key(self):
+        """Key for the 'Filename AND Skills match' exclusion rule."""
+        return (str(self.file_name).strip().lower(), self.skill_ids)
+
+    def __getstate__(self):
+        # Non-taxonomy skill IDs are only meaningful inside one process, so records are pickled
+        # (e.g. back from a backfill worker) with skill names and re-interned on arrival.
+        state = {attr: getattr(self, attr) for attr in self.__slots__}
+        state['skill_ids'] = [SKILL_NAMES[skill_id] for skill_id in self.skill_ids]
+        return state
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+        self.skill_ids = skill_ids_from_names(state['skill_ids'])
+
+    def contact_keys(self):
+        """Cleaned phone digits and lowercased email used for the 'Email OR Phone' duplicate rule."""
+        keys = []
+        phone_clean = re.sub(r'\D', '', str(self.phone_number)).strip()
+        email_clean = str(self.email_id).strip().lower()
+        if phone_clean:
+            keys.append(phone_clean)
+        if email_clean and email_clean != 'n/a':
+            keys.append(email_clean)
+        return keys
+
+
+class CandidateBatch:
+    """Column-oriented store for the records of one run; only becomes a DataFrame at export time."""
+
+    def __init__(self):
+        self.columns = {column: [] for column, _ in RECORD_COLUMNS}
+        self.columns.update({field: [] for field in RECORD_STORE_ONLY_FIELDS})
+
+    def __len__(self):
+        return len(self.columns["File Name"])
+
+    def append(self, record):
+        for column, attr in RECORD_COLUMNS:
+            self.columns[column].append(getattr(record, attr))
+        for field in RECORD_STORE_ONLY_FIELDS:
+            self.columns[field].append(getattr(record, field))
+
+    def to_dataframe(self):
+        data = dict(self.columns)
+        data["Skill"] = [skill_ids_to_string(skill_ids) for skill_ids in data["Skill"]]
+        return pd.DataFrame(data, columns=[column for column, _ in RECORD_COLUMNS])
+
+
+# --- Candidate Database ---
+CANDIDATE_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    source_key TEXT UNIQUE, -- archive/file location for backfilled resumes, NULL for email downloads
+    source_date TEXT,
+    month TEXT,
+    year INTEGER,
+    skill TEXT,
+    candidate_name TEXT,
+    total_experience TEXT,
+    email_id TEXT,
+    phone_number TEXT,
+    file_name TEXT,
+    status TEXT,
+    origin TEXT,
+    added_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates(email_id);
+CREATE INDEX IF NOT EXISTS idx_candidates_phone ON candidates(phone_number);
+-- MinHash signatures of the resume texts and their LSH band buckets (near-duplicate index)
+CREATE TABLE IF NOT EXISTS resume_signatures (
+    candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id),
+    signature BLOB
+);
+CREATE TABLE IF NOT EXISTS resume_lsh_buckets (
+    band INTEGER,
+    bucket INTEGER,
+    candidate_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets ON resume_lsh_buckets(band, bucket);
+-- Duplicate-check keys ('contact': phone digits / email, 'file_skill': file name + skills) of every stored candidate
+-- and every row moved to an archive partition, with the 'YYYY-MM' partition they came from
+CREATE TABLE IF NOT EXISTS contact_index (
+    kind TEXT,
+    key TEXT,
+    partition TEXT,
+    PRIMARY KEY (kind, key, partition)
+) WITHOUT ROWID;
+-- Lowercased resume text of each candidate (zlib-compressed), rescanned by 'retag' when the taxonomy changes
+CREATE TABLE IF NOT EXISTS resume_texts (
+    candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id),
+    text BLOB
+);
+-- The SKILL_TAXONOMY the stored Skill values were tagged with; 'retag' diffs the current one against it
+CREATE TABLE IF NOT EXISTS skill_taxonomy (
+    skill TEXT PRIMARY KEY,
+    families TEXT -- Comma-joined SKILL_TAXONOMY keys
+);
+-- Workbook rows already written to an archive partition, by their 'Row Key'
+CREATE TABLE IF NOT EXISTS archived_rows (
+    row_key TEXT PRIMARY KEY,
+    partition TEXT
+) WITHOUT ROWID;
+-- Candidate counts by month, skill family, Status and experience band (see update_candidate_rollups);
+-- year and month are 0 when the candidate has no usable date
+CREATE TABLE IF NOT EXISTS candidate_rollups (
+    year INTEGER,
+    month INTEGER,
+    skill_family TEXT,
+    status TEXT,
+    experience_band TEXT,
+    candidates INTEGER,
+    PRIMARY KEY (year, month, skill_family, status, experience_band)
+) WITHOUT ROWID;
+-- When each committed row's email arrived and each ingestion stage finished (Unix epoch seconds), by workbook 'Row Key'
+CREATE TABLE IF NOT EXISTS ingest_latency (
+    row_key TEXT PRIMARY KEY,
+    candidate_id INTEGER,
+    file_name TEXT,
+    received_at REAL,
+    cycle_started_at REAL, -- NULL for files that did not come through a download cycle (watch, process-deferred)
+    downloaded_at REAL,
+    parse_started_at REAL,
+    converted_at REAL, -- .doc files only
+    parsed_at REAL,
+    committed_at REAL, -- shared by all rows committed together
+    exported_at REAL -- NULL until the export thread has written the row to the workbooks
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_latency_received ON ingest_latency(received_at);
+CREATE INDEX IF NOT EXISTS idx_ingest_latency_committed ON ingest_latency(committed_at);
+-- Seconds spent in each stage per row; 'total' is email to committed row, 'in_sheet' email to workbook row
+CREATE VIEW IF NOT EXISTS ingest_latency_seconds AS
+SELECT row_key, candidate_id, file_name, date(received_at, 'unixepoch', 'localtime') AS day, committed_at,
+       cycle_started_at - received_at AS schedule_seconds,
+       downloaded_at - cycle_started_at AS download_seconds,
+       parse_started_at - downloaded_at AS queue_seconds,
+       converted_at - parse_started_at AS convert_seconds,
+       parsed_at - COALESCE(converted_at, parse_started_at) AS parse_seconds,
+       committed_at - parsed_at AS commit_seconds,
+       exported_at - committed_at AS export_seconds,
+       committed_at - received_at AS total_seconds,
+       exported_at - received_at AS in_sheet_seconds
+FROM ingest_latency;
+-- OCR text of scanned PDF pages, by SHA-1 of the page's images (the same scan re-sent is not OCRed again)
+CREATE TABLE IF NOT EXISTS ocr_pages (
+    page_hash TEXT PRIMARY KEY,
+    text TEXT
+) WITHOUT ROWID;
+"""
+# Columns added to 'candidates' after it was first created; missing ones are added when the store is opened
+CANDIDATE_STORE_ADDED_COLUMNS = [
+    ("education", "TEXT"), ("notice_period", "TEXT"), ("current_company", "TEXT"),
+    ("current_ctc", "TEXT"), ("expected_ctc", "TEXT"), ("current_location", "TEXT"),
+    ("near_duplicate_of", "INTEGER"), ("change_seq", "INTEGER"), ("updated_at", "TEXT"), ("partition", "TEXT")
+]
+
+def candidate_partition_sql(row=""):
+    """SQL twin of candidate_partition over the year, month and source_date columns (of `row`, e.g. 'NEW.')."""
+    month_numbers = " ".join(f"WHEN '{datetime(2000, number, 1).strftime('%B').lower()}' THEN {number}" for number in range(1, 13))
+    return (f"(SELECT CASE WHEN {row}year IS NOT NULL AND month_number IS NOT NULL THEN printf('%04d-%02d', {row}year, month_number) "
+            f"WHEN {row}source_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN substr({row}source_date, 1, 7) END "
+            f"FROM (SELECT CASE lower(trim({row}month)) {month_numbers} END AS month_number))")
+
+# Change tracking for the export feeds: every insert and update takes the next change_seq and refreshes the row's
+# 'YYYY-MM' partition; a row leaving a partition marks it in candidate_partition_moves. Created after the columns.
+CANDIDATE_CHANGE_TRACKING_SCHEMA = f"""
+CREATE INDEX IF NOT EXISTS idx_candidates_change_seq ON candidates(change_seq);
+CREATE INDEX IF NOT EXISTS idx_candidates_partition ON candidates(partition);
+CREATE TABLE IF NOT EXISTS candidate_partition_moves (
+    partition TEXT PRIMARY KEY, -- '' for undated candidates
+    change_seq INTEGER -- Of the change that moved the last row out
+);
+CREATE TRIGGER IF NOT EXISTS candidates_insert_change AFTER INSERT ON candidates
+BEGIN
+    UPDATE candidates SET change_seq = (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM candidates), updated_at = NEW.added_at,
+                          partition = {candidate_partition_sql("NEW.")}
+    WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_update_change AFTER UPDATE ON candidates WHEN NEW.change_seq IS OLD.change_seq
+BEGIN
+    UPDATE candidates SET change_seq = (SELECT MAX(change_seq) + 1 FROM candidates),
+                          updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime'),
+                          partition = {candidate_partition_sql("NEW.")}
+    WHERE id = NEW.id;
+    INSERT OR REPLACE INTO candidate_partition_moves (partition, change_seq)
+    SELECT COALESCE(OLD.partition, ''), change_seq FROM candidates WHERE id = NEW.id AND partition IS NOT OLD.partition;
+END;
+"""
+
+def open_candidate_store(db_path=None):
+    """Opens (creating if needed) the SQLite candidate database next to the Excel outputs."""
+    conn = sqlite3.connect(db_path or os.path.join(output_directory, CANDIDATE_DB_FILE_NAME))
+    conn.execute("PRAGMA journal_mode=WAL")
+    has_contact_index = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contact_index'").fetchone()
+    has_rollups = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'candidate_rollups'").fetchone()
+    conn.executescript(CANDIDATE_STORE_SCHEMA)
+    existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(candidates)")}
+    for column, column_type in CANDIDATE_STORE_ADDED_COLUMNS:
+        if column not in existing_columns:
+            conn.execute(f"ALTER TABLE candidates ADD COLUMN {column} {column_type}")
+    if 'change_seq' not in existing_columns: # Rows stored before change tracking: changed in insertion order
+        with conn:
+            conn.execute("UPDATE candidates SET change_seq = id, updated_at = added_at")
+    if 'partition' not in existing_columns: # Triggers from before the partition column are replaced below
+        with conn:
+            conn.execute("DROP TRIGGER IF EXISTS candidates_insert_change")
+            conn.execute("DROP TRIGGER IF EXISTS candidates_update_change")
+            conn.execute(f"UPDATE candidates SET partition = {candidate_partition_sql()}")
+    conn.executescript(CANDIDATE_CHANGE_TRACKING_SCHEMA)
+    if not has_contact_index: # Databases from before the index: index the stored candidates once
+        with conn:
+            index_candidate_contacts(conn, [(phone, email, file_name, skill, candidate_partition(year, month, source_date))
+                                            for phone, email, file_name, skill, year, month, source_date in conn.execute(
+                                                "SELECT phone_number, email_id, file_name, skill, year, month, source_date FROM candidates").fetchall()])
+    if not has_rollups: # Databases from before the rollups: count the stored candidates once
+        rebuild_candidate_rollups(conn)
+    if not conn.execute("SELECT 1 FROM skill_taxonomy LIMIT 1").fetchone(): # Stored Skill values are taken as current
+        with conn:
+            save_skill_taxonomy_snapshot(conn)
+    return conn
+
+def store_candidates(conn, batch, origin, source_keys=None):
+    """
+    Writes a CandidateBatch to the candidate database in a single transaction. Returns the candidates.id of each
+    record, or None for records already stored under the same source_key.
+    """
+    if not len(batch):
+        return []
+    columns = batch.columns
+    added_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = zip(
+        source_keys or [None] * len(batch),
+        columns["Source Date"], columns["Month"],
+        [year if isinstance(year, int) else None for year in columns["Year"]],
+        [skill_ids_to_string(skill_ids) for skill_ids in columns["Skill"]],
+        columns["Candidate Name"], columns["Total Experience"], columns["Email ID"],
+        columns["Phone Number"], columns["File Name"], columns["Status"],
+        columns["Education"], columns["NP"], columns["Current Company"],
+        columns["CCTC"], columns["ECTC"], columns["Current Location"], columns["near_duplicate_of"]
+    )
+    contact_rows = []
+    candidate_ids = []
+    rollup_keys = []
+    with conn: # Commits on success, rolls the whole batch back on error
+        for row, signature, skill_ids, resume_text in zip(rows, columns["text_signature"], columns["Skill"], columns["resume_text"]):
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO candidates (source_key, source_date, month, year, skill, candidate_name, "
+                "total_experience, email_id, phone_number, file_name, status, education, notice_period, "
+                "current_company, current_ctc, expected_ctc, current_location, near_duplicate_of, origin, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row + (origin, added_at)
+            )
+            if not cursor.rowcount:
+                candidate_ids.append(None)
+                continue
+            candidate_ids.append(cursor.lastrowid)
+            if signature is not None:
+                index_resume_signature(conn, cursor.lastrowid, signature)
+            if resume_text is not None:
+                conn.execute("INSERT OR REPLACE INTO resume_texts (candidate_id, text) VALUES (?, ?)", (cursor.lastrowid, resume_text))
+            source_date, month, year, skill = row[1:5]
+            contact_rows.append((row[8], row[7], row[9], skill, candidate_partition(year, month, source_date)))
+            rollup_keys.append(candidate_rollup_key(year, month, source_date, skill_ids, row[10], row[6]))
+        index_candidate_contacts(conn, contact_rows)
+        update_candidate_rollups(conn, rollup_keys)
+    return candidate_ids
+
+def candidate_partition(year, month, source_date=None):
+    """The 'YYYY-MM' partition of a candidate from its Year and Month (or Source Date); None when neither parses."""
+    try:
+        return f"{int(year):04d}-{datetime.strptime(str(month).strip(), '%B').month:02d}"
+    except (TypeError, ValueError):
+        pass
+    match = re.match(r'(\d{4})-(\d{2})', str(source_date or ''))
+    return f"{match.group(1)}-{match.group(2)}" if match else None
+
+def _contact_index_key(kind, key):
+    if kind == 'file_skill': # (file name, skill IDs): skill IDs are per process, so the index holds the names
+        return f"{key[0]}\x1f{skill_ids_to_string(key[1]).lower()}"
+    return key
+
+def index_candidate_contacts(conn, rows):
+    """Adds the duplicate-check keys of (phone, email, file name, skill string, partition) rows to contact_index."""
+    entries = []
+    for phone, email, file_name, skills, partition in rows:
+        contact_keys, filename_skills_key = duplicate_check_keys(phone, email, file_name, skills)
+        entries.extend(('contact', key, partition or '') for key in contact_keys)
+        if filename_skills_key:
+            entries.append(('file_skill', _contact_index_key('file_skill', filename_skills_key), partition or ''))
+    conn.executemany("INSERT OR IGNORE INTO contact_index (kind, key, partition) VALUES (?, ?, ?)", entries)
+
+class IndexedKeySet:
+    """
+    Duplicate-check keys of one kind: an in-memory set for the hot workbook rows (and this run's records), backed
+    by indexed lookups in contact_index for everything stored or archived. Supports the `in`, add and update the
+    duplicate rules use, so a cycle never loads the full history.
+    """
+
+    def __init__(self, hot_keys, conn, kind):
+        self.hot_keys = hot_keys
+        self.conn = conn
+        self.kind = kind
+
+    def __contains__(self, key):
+        if key in self.hot_keys:
+            return True
+        if self.conn is None:
+            return False
+        return self.conn.execute("SELECT 1 FROM contact_index WHERE kind = ? AND key = ? LIMIT 1",
+                                 (self.kind, _contact_index_key(self.kind, key))).fetchone() is not None
+
+    def add(self, key):
+        self.hot_keys.add(key)
+
+    def update(self, keys):
+        self.hot_keys.update(keys)
+
+
+# --- Reporting Rollups ---
+ROLLUP_KEY_COLUMNS = ("year", "month", "skill_family", "status", "experience_band")
+
+def experience_band(total_experience):
+    """EXPERIENCE_BANDS label for a 'Total Experience' value such as '6 years', or 'Unknown'."""
+    match = re.search(r'\d+(?:\.\d+)?', str(total_experience or ""))
+    if not match:
+        return "Unknown"
+    years = float(match.group(0))
+    band = EXPERIENCE_BANDS[0][1]
+    for lower_bound, label in EXPERIENCE_BANDS:
+        if years >= lower_bound:
+            band = label
+    return band
+
+def candidate_rollup_key(year, month, source_date, skill_ids, status, total_experience, families_by_id=None):
+    """
+    The candidate_rollups key (year, month, skill family, status, experience band) of one stored candidate.
+    families_by_id replaces SKILL_FAMILIES_BY_ID to key a candidate as an earlier taxonomy counted it.
+    """
+    partition = candidate_partition(year, month, source_date)
+    year_number, month_number = map(int, partition.split('-')) if partition else (0, 0)
+    return (year_number, month_number, candidate_skill_family(skill_ids, families_by_id), str(status or "N/A"),
+            experience_band(total_experience))
+
+def update_candidate_rollups(conn, rollup_keys, sign=1):
+    """Adds (or with sign=-1 removes) candidates to the rollup counts, inside the caller's transaction."""
+    conn.executemany(
+        f"INSERT INTO candidate_rollups ({', '.join(ROLLUP_KEY_COLUMNS)}, candidates) VALUES (?, ?, ?, ?, ?, ?) "
+        f"ON CONFLICT ({', '.join(ROLLUP_KEY_COLUMNS)}) DO UPDATE SET candidates = candidates + excluded.candidates",
+        [key + (count * sign,) for key, count in Counter(rollup_keys).items()])
+
+def rebuild_candidate_rollups(conn):
+    """Recounts candidate_rollups from the candidates table (first use, or after the taxonomy or bands change)."""
+    with conn:
+        conn.execute("DELETE FROM candidate_rollups")
+        update_candidate_rollups(conn, [
+            candidate_rollup_key(year, month, source_date, skill_ids_from_string(skill), status, total_experience)
+            for year, month, source_date, skill, status, total_experience
+            in conn.execute("SELECT year, month, source_date, skill, status, total_experience FROM candidates")])
+
+def load_candidate_rollups(conn, months=REPORT_MONTHS, today=None):
+    """The rollup rows of the last `months` months (0 = all of them) as a DataFrame with a 'Period' column."""
+    today = today or date.today()
+    if months:
+        start_index = today.year * 12 + today.month - months # Months since year 0 of the first month shown, minus one
+        where, params = "year * 12 + month > ?", (start_index,)
+    else:
+        where, params = "1 = 1", ()
+    df = pd.read_sql_query(f"SELECT {', '.join(ROLLUP_KEY_COLUMNS)}, candidates FROM candidate_rollups "
+                           f"WHERE {where} AND candidates != 0", conn, params=params)
+    df.insert(0, "Period", [f"{year:04d}-{month:02d}" if year else "Unknown" for year, month in zip(df['year'], df['month'])])
+    return df
+
+def sourcing_report_tables(rollups):
+    """Pivot tables of a load_candidate_rollups frame: {sheet name: DataFrame} with a Total column and row."""
+    tables = {}
+    for sheet_name, index in (("By Month", "Period"), ("By Skill Family", "skill_family"), ("By Experience", "experience_band"),
+                              ("Month x Skill Family", ["Period", "skill_family"])):
+        table = rollups.pivot_table(index=index, columns="status", values="candidates", aggfunc="sum", fill_value=0,
+                                    margins=True, margins_name="Total")
+        if sheet_name == "By Experience":
+            order = [label for _, label in EXPERIENCE_BANDS] + ["Unknown", "Total"]
+            table = table.reindex([band for band in order if band in table.index])
+        tables[sheet_name] = table
+    detail = rollups.drop(columns=["year", "month"]).sort_values(["Period", "skill_family", "status", "experience_band"])
+    tables["Detail"] = detail.rename(columns={"skill_family": "Skill Family", "status": "Status", "experience_band": "Experience",
+                                              "candidates": "Candidates"})
+    return tables
+
+def run_sourcing_report(months=REPORT_MONTHS, output_path=None, rebuild=False):
+    """Prints the sourcing rollups of the last `months` months and writes them to the summary workbook."""
+    output_path = output_path or os.path.join(output_directory, REPORT_WORKBOOK_NAME)
+    with closing(open_candidate_store()) as store:
+        if rebuild:
+            rebuild_candidate_rollups(store)
+        rollups = load_candidate_rollups(store, months)
+    if rollups.empty:
+        log.info("ℹ️ No candidates in %s for the last %d month(s).", CANDIDATE_DB_FILE_NAME, months)
+        return
+    tables = sourcing_report_tables(rollups)
+    for sheet_name in ("By Month", "By Skill Family", "By Experience"):
+        print(f"\n📊 {sheet_name} ({'last ' + str(months) + ' months' if months else 'all time'})")
+        print(tables[sheet_name].to_string())
+    try:
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            for sheet_name, table in tables.items():
+                table.to_excel(writer, sheet_name=sheet_name, index=sheet_name != "Detail")
+        log.info("✅ Summary workbook written to %s.", output_path)
+    except PermissionError:
+        log.error("❌ ERROR: '%s' is open in another program; close it and run the report again.", output_path)
+
+
+# --- Near-duplicate Detection (MinHash + LSH) ---
+# Resume texts are reduced to MINHASH_NUM_PERM minimum hashes over word shingles. Signatures are split
+# into LSH bands; resumes sharing any band bucket are candidates, confirmed by the estimated similarity.
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MAX_HASH = (1 << 32) - 1
+_minhash_random = np.random.RandomState(20240601) # Fixed seed: stored signatures must stay comparable across runs
+MINHASH_A = _minhash_random.randint(1, MINHASH_MAX_HASH, size=MINHASH_NUM_PERM, dtype=np.uint64)
+MINHASH_B = _minhash_random.randint(0, MINHASH_MAX_HASH, size=MINHASH_NUM_PERM, dtype=np.uint64)
+SHINGLE_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+def _lsh_bands_and_rows(num_perm, threshold):
+    """Band layout whose S-curve midpoint (1/bands)^(1/rows) is the highest one at or below the threshold."""
+    best = (num_perm, 1, 0.0)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0:
+            bands = num_perm // rows
+            midpoint = (1 / bands) ** (1 / rows)
+            if best[2] < midpoint <= threshold:
+                best = (bands, rows, midpoint)
+    return best[0], best[1]
+
+LSH_BANDS, LSH_ROWS = _lsh_bands_and_rows(MINHASH_NUM_PERM, NEAR_DUPLICATE_THRESHOLD)
+
+def minhash_signature(text):
+    """MinHash signature of the text's word shingles, or None for texts too short to compare."""
+    words = SHINGLE_WORD_PATTERN.findall(text.lower())
+    if len(words) < MINHASH_SHINGLE_WORDS:
+        return None
+    shingle_hashes = {}
+    for start in range(len(words) - MINHASH_SHINGLE_WORDS + 1):
+        shingle = " ".join(words[start:start + MINHASH_SHINGLE_WORDS])
+        shingle_hashes.setdefault(shingle, zlib.crc32(shingle.encode('utf-8')))
+        if len(shingle_hashes) >= MINHASH_MAX_SHINGLES:
+            break
+    hashes = np.fromiter(shingle_hashes.values(), dtype=np.uint64, count=len(shingle_hashes))
+    permuted = (np.outer(hashes, MINHASH_A) + MINHASH_B) % MINHASH_PRIME & MINHASH_MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+def signature_similarity(signature, other_signature):
+    """Estimated Jaccard similarity of the two resume texts."""
+    return float(np.count_nonzero(signature == other_signature)) / len(signature)
+
+def lsh_band_buckets(signature):
+    """(band, bucket) pairs of a signature; bucket is a 64-bit hash of the band's rows."""
+    return [(band, int.from_bytes(hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).digest(), 'little', signed=True))
+            for band in range(LSH_BANDS)]
+
+def index_resume_signature(conn, candidate_id, signature):
+    conn.execute("INSERT OR REPLACE INTO resume_signatures (candidate_id, signature) VALUES (?, ?)",
+                 (candidate_id, signature.astype('<u4').tobytes()))
+    conn.executemany("INSERT INTO resume_lsh_buckets (band, bucket, candidate_id) VALUES (?, ?, ?)",
+                     [(band, bucket, candidate_id) for band, bucket in lsh_band_buckets(signature)])
+
+def find_near_duplicate(conn, signature, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Looks the signature up in the stored LSH index. Returns the most similar earlier candidate at or above
+    the threshold as a dict (candidate_id, similarity, candidate_name, file_name, source_date), or None.
+    """
+    if signature is None:
+        return None
+    buckets = lsh_band_buckets(signature)
+    where = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+    candidate_ids = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT candidate_id FROM resume_lsh_buckets WHERE {where}", [value for pair in buckets for value in pair])]
+    best = None
+    for start in range(0, len(candidate_ids), 500):
+        chunk = candidate_ids[start:start + 500]
+        for candidate_id, blob in conn.execute(
+                f"SELECT candidate_id, signature FROM resume_signatures WHERE candidate_id IN ({','.join('?' * len(chunk))})", chunk):
+            stored = np.frombuffer(blob, dtype='<u4')
+            if len(stored) != len(signature):
+                continue # Signature from a different MINHASH_NUM_PERM
+            similarity = signature_similarity(signature, stored)
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (candidate_id, similarity)
+    if best is None:
+        return None
+    candidate_name, file_name, source_date = conn.execute(
+        "SELECT candidate_name, file_name, source_date FROM candidates WHERE id = ?", (best[0],)).fetchone()
+    return {'candidate_id': best[0], 'similarity': best[1], 'candidate_name': candidate_name,
+            'file_name': file_name, 'source_date': source_date}
+
+
+# --- Resume Section Segmentation ---
+# Header keywords per section; a line consisting only of one of these (optionally followed by ':')
+# starts that section. 'Other' sections just end the previous one.
+SECTION_HEADER_KEYWORDS = {
+    'summary': ["summary", "professional summary", "profile", "profile summary", "professional profile",
+                "career objective", "objective", "about me", "career summary"],
+    'experience': ["experience", "work experience", "professional experience", "employment history",
+                   "job history", "work history", "employment details", "career history", "internships",
+                   "experience summary", "organizational experience"],
+    'education': ["education", "educational qualification", "educational qualifications", "academic qualification",
+                  "academic qualifications", "academics", "academic details", "qualification", "qualifications",
+                  "education details", "educational background"],
+    'skills': ["skills", "technical skills", "key skills", "core competencies", "skill set", "skillset",
+               "technical expertise", "areas of expertise", "competencies", "tools", "eda tools", "technical summary"],
+    'projects': ["projects", "academic projects", "key projects", "project details", "project experience", "major projects"],
+    'contact': ["contact", "contact information", "contact details", "personal details", "personal information",
+                "personal profile", "personal data"],
+    'other': ["awards", "certifications", "publications", "volunteer experience", "references", "interests",
+              "achievements", "hobbies", "languages", "languages known", "declaration", "extra curricular activities",
+              "strengths", "trainings", "training", "courses"]
+}
+SECTION_BY_KEYWORD = {keyword: section for section, keywords in SECTION_HEADER_KEYWORDS.items() for keyword in keywords}
+_SECTION_KEYWORD_ALTERNATION = "|".join(
+    re.escape(keyword).replace(r'\ ', r'\s+') for keyword in sorted(SECTION_BY_KEYWORD, key=len, reverse=True)
+)
+# "EDUCATION", "Technical Skills:" ... on a line of their own
+SECTION_HEADER_LINE_PATTERN = re.compile(r'^[\W_]*(' + _SECTION_KEYWORD_ALTERNATION + r')[\s:.\-–|]*$', re.IGNORECASE)
+# "Skills: UVM, SVA" - header and content on the same line
+SECTION_INLINE_HEADER_PATTERN = re.compile(r'^[\W_]*(' + _SECTION_KEYWORD_ALTERNATION + r')\s*:\s*\S', re.IGNORECASE)
+SECTION_HEADER_MAX_LINE_LENGTH = 60
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERNS = [
+    re.compile(r'(\+?\d{1,4}[-.\s]?)?(\(?\d{2,5}\)?[-.\s]?)?(\d{2,5}[-.\s]?\d{3,4}|\d{7,10})\b'),
+    re.compile(r'\b(?:\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})\b'),
+    re.compile(r'\b\d{7,15}\b')
+]
+EXPERIENCE_YEARS_PATTERN = re.compile(r'(\d+\+?\s*(?:years?|yrs?|yr)\s*(?:of)?\s*(?:(?:overall|total|professional)?\s*(?:experience|exp)))', re.IGNORECASE)
+
+
+class ResumeDocument:
+    """
+    Resume text split into sections by a single pass over its lines.
+    spans maps a section name ('header', 'contact', 'summary', 'experience', 'education', 'skills',
+    'projects', 'other') to a list of (start, end) character offsets into text.
+    """
+    __slots__ = ('text', 'lines', 'spans')
+
+    def __init__(self, text, lines, spans):
+        self.text = text
+        self.lines = lines
+        self.spans = spans
+
+    def section(self, *names):
+        """Text of the named sections, in document order."""
+        spans = sorted(span for name in names for span in self.spans.get(name, ()))
+        return "\n".join(self.text[start:end] for start, end in spans)
+
+
+def segment_resume_text(text):
+    """Splits resume text into sections in one pass. Everything before the first header is the 'header' section."""
+    lines = text.split('\n')
+    spans = {}
+    current_section, section_start = 'header', 0
+    offset = 0
+    for line in lines:
+        line_end = offset + len(line)
+        stripped = line.strip()
+        match = None
+        if stripped:
+            if len(stripped) <= SECTION_HEADER_MAX_LINE_LENGTH:
+                match = SECTION_HEADER_LINE_PATTERN.match(stripped)
+            inline = match is None and SECTION_INLINE_HEADER_PATTERN.match(stripped)
+            if inline:
+                match = inline
+        if match:
+            if offset > section_start:
+                spans.setdefault(current_section, []).append((section_start, offset))
+            current_section = SECTION_BY_KEYWORD[re.sub(r'\s+', ' ', match.group(1).lower())]
+            # Inline headers keep their content ("Skills: UVM, SVA"); standalone headers are skipped
+            section_start = offset + line.index(':') + 1 if match.re is SECTION_INLINE_HEADER_PATTERN else line_end + 1
+        offset = line_end + 1
+    if len(text) > section_start:
+        spans.setdefault(current_section, []).append((section_start, len(text)))
+    return ResumeDocument(text, lines, spans)
+
+
+# Field extractors for the 'cadate' details, each working only on the sections where the field appears
+DEGREE_PATTERN = re.compile(
+    r'\b(Ph\.?\s?D|Doctorate|M\.?\s?Tech|M\.?\s?E\b|M\.?\s?S\b|M\.?\s?Sc|MBA|MCA|Master(?:\'?s)?(?: of [A-Z][a-z]+)?|'
+    r'B\.?\s?Tech|B\.?\s?E\b|B\.?\s?S\b|B\.?\s?Sc|BCA|Bachelor(?:\'?s)?(?: of [A-Z][a-z]+)?|Diploma)', re.IGNORECASE)
+NOTICE_PERIOD_PATTERN = re.compile(
+    r'notice\s*period\s*(?:of|is|:|-|–)?\s*((?:immediate(?:ly)?(?:\s+joiner)?|serving[^\n,;]{0,30}|\d+\s*(?:-\s*\d+\s*)?(?:days?|weeks?|months?)))',
+    re.IGNORECASE)
+IMMEDIATE_JOINER_PATTERN = re.compile(r'\bimmediate(?:ly)?\s+(?:joiner|joining|available)\b', re.IGNORECASE)
+_CTC_VALUE = r'((?:₹|rs\.?|inr)?\s*\d[\d,.]*\s*(?:lpa|lakhs?|lacs?|l\b|cr|crores?|k\b)?(?:\s*(?:per annum|p\.a\.?|pa\b))?)'
+EXPECTED_CTC_PATTERN = re.compile(r'\b(?:expected\s+ctc|ectc|expected\s+salary)\s*(?::|-|–|is)?\s*' + _CTC_VALUE, re.IGNORECASE)
+CURRENT_CTC_PATTERN = re.compile(r'(?<!expected )\b(?:current\s+ctc|cctc|present\s+ctc|current\s+salary|ctc)\s*(?::|-|–|is)?\s*' + _CTC_VALUE, re.IGNORECASE)
+LOCATION_PATTERN = re.compile(
+    r'\b(?:current\s+location|present\s+location|location|based\s+(?:in|at)|current\s+city|city)\s*(?::|-|–|\|)?\s*([A-Za-z][A-Za-z .\-]{1,40}(?:,\s*[A-Za-z][A-Za-z .\-]{1,30})?)',
+    re.IGNORECASE)
+CURRENT_COMPANY_PATTERN = re.compile(
+    r'\b(?:currently|presently)\s+(?:working|employed)\s+(?:as\s+(?:an?\s+)?[^,.\n]{1,50}?\s+)?(?:at|with|in)\s+'
+    r'([A-Z][\w&.\- ]{1,60}?)(?=\s+(?:as|since|from)\b|[,.;()\n]|$)')
+ONGOING_ROLE_PATTERN = re.compile(r'\b(?:present|current|till\s+date|to\s+date|ongoing|now)\b', re.IGNORECASE)
+DATE_FRAGMENT_PATTERN = re.compile(
+    r'\(?\b(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s*[\'’]?\d{2,4}|(?:19|20)\d{2})\b.*$', re.IGNORECASE)
+ROLE_WORDS_PATTERN = re.compile(r'\b(engineer|developer|manager|intern|lead|analyst|designer|architect|consultant|specialist|trainee|member of technical staff|associate)\b', re.IGNORECASE)
+
+def extract_education(document):
+    """Highest-listed degree line from the education section."""
+    for line in document.section('education').split('\n'):
+        line = line.strip(" \t•-–*|")
+        if DEGREE_PATTERN.search(line):
+            return line[:120]
+    return "N/A"
+
+def extract_notice_period(document):
+    region = document.section('header', 'contact', 'summary', 'other')
+    match = NOTICE_PERIOD_PATTERN.search(region)
+    if match:
+        return match.group(1).strip()
+    if IMMEDIATE_JOINER_PATTERN.search(region):
+        return "Immediate"
+    return "N/A"
+
+def extract_ctc(document):
+    """Returns (current CTC, expected CTC) as written in the resume."""
+    region = document.section('header', 'contact', 'summary', 'other')
+    expected_match = EXPECTED_CTC_PATTERN.search(region)
+    current_match = CURRENT_CTC_PATTERN.search(region)
+    current_ctc = current_match.group(1).strip() if current_match else "N/A"
+    expected_ctc = expected_match.group(1).strip() if expected_match else "N/A"
+    return current_ctc, expected_ctc
+
+def extract_current_location(document):
+    match = LOCATION_PATTERN.search(document.section('header', 'contact', 'summary'))
+    if match:
+        return match.group(1).strip(" .-")
+    return "N/A"
+
+def extract_current_company(document):
+    """Employer from a 'currently working at X' phrase, else from the first ongoing role in the experience section."""
+    match = CURRENT_COMPANY_PATTERN.search(document.section('header', 'summary', 'experience'))
+    if match:
+        return match.group(1).strip()
+    for line in document.section('experience').split('\n'):
+        if not ONGOING_ROLE_PATTERN.search(line):
+            continue
+        # "Intel India | Senior Engineer | Jan 2019 - Present" -> "Intel India"
+        without_dates = DATE_FRAGMENT_PATTERN.sub('', line)
+        for chunk in re.split(r'\s*[|,–]\s*|\s+-\s+|\s+at\s+', without_dates):
+            chunk = chunk.strip(" \t•*:-()")
+            if len(chunk) > 1 and not ROLE_WORDS_PATTERN.search(chunk) and not ONGOING_ROLE_PATTERN.fullmatch(chunk):
+                return chunk[:80]
+    return "N/A"
+
+
+def name_search_text(document):
+    """The top of the resume that the name search runs spaCy NER over."""
+    return "\n".join(document.lines[:10])[:4000] # Limit to top 10 lines (and 4000 characters) for name
+
+def parse_resume_data_basic(text, document=None):
     name = "N/A"
     email = "N/A"
     phone = "N/A"
-    skills = "N/A"
+    skill_ids = frozenset()
     experience = "N/A"
 
-    lines = text.split('\n')
-    text_for_name_search = "\n".join(lines[:10]) # Limit to top 10 lines for name
-    if len(text_for_name_search) > 4000:
-        text_for_name_search = text_for_name_search[:4000]
-
-    doc_name = nlp(text_for_name_search)
-
+    if document is None:
+        document = segment_resume_text(text)
+    lines = document.lines
     all_name_candidates_from_resume = []
 
-    for ent in doc_name.ents:
-        if ent.label_ == "PERSON":
-            extracted_name = ent.text.strip()
-            # is_plausible_name check will be done by the main name selection logic later
-            all_name_candidates_from_resume.append(extracted_name)
+    # Fast path: a header line made of gazetteer names is taken as-is and spaCy NER is skipped
+    gazetteer_name = gazetteer_name_from_lines(lines)
+    name_source = 'gazetteer' if gazetteer_name else 'ner'
+    NAME_RECOGNIZER_COUNTS[name_source] += 1
+
+    if not gazetteer_name:
+        doc_name = nlp_doc(name_search_text(document))
+        for ent in doc_name.ents:
+            if ent.label_ == "PERSON":
+                extracted_name = ent.text.strip()
+                # is_plausible_name check will be done by the main name selection logic later
+                all_name_candidates_from_resume.append(extracted_name)
     
-    # Also look for capitalized lines in the top section that could be names
-    for line in lines[:5]: # Consider top 5 lines for a direct name line
-        line_clean = line.strip()
-        if not line_clean:
-            continue
-        # Remove common job titles/contact info from line before checking
-        temp_cleaned_line = re.sub(r'(\s*-\s*|\s*\|\s*|\s*,\s*)\s*(software engineer|data scientist|manager|developer|analyst|specialist|contact|email|phone|profile|summary|experience|education|skills|cv|resume|sr\.|jr\.)\W*', '', line_clean, flags=re.IGNORECASE).strip()
-        # is_plausible_name check will be done by the main name selection logic later
-        all_name_candidates_from_resume.append(temp_cleaned_line)
+        # Also look for capitalized lines in the top section that could be names
+        for line in lines[:5]: # Consider top 5 lines for a direct name line
+            line_clean = line.strip()
+            if not line_clean:
+                continue
+            # Remove common job titles/contact info from line before checking
+            temp_cleaned_line = NAME_LINE_NOISE_PATTERN.sub('', line_clean).strip()
+            # is_plausible_name check will be done by the main name selection logic later
+            all_name_candidates_from_resume.append(temp_cleaned_line)
     
     # Return all plausible names from basic parser for consideration
-    final_name_candidate = "N/A"
+    final_name_candidate = gazetteer_name or "N/A"
     plausible_filtered_names = [n for n in all_name_candidates_from_resume if is_plausible_name(n)]
     if plausible_filtered_names:
         # Prioritize multi-word names, then longest
@@ -374,17 +1972,14 @@ def parse_resume_data_basic(text):
     
     name = final_name_candidate
 
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    # Contact details live in the header/contact block; the full text is only scanned if they are not there
+    contact_text = document.section('header', 'contact')
+    email_match = EMAIL_PATTERN.search(contact_text) or EMAIL_PATTERN.search(text)
     if email_match:
         email = email_match.group(0).strip().lower()
 
-    phone_patterns = [
-        r'(\+?\d{1,4}[-.\s]?)?(\(?\d{2,5}\)?[-.\s]?)?(\d{2,5}[-.\s]?\d{3,4}|\d{7,10})\b',
-        r'\b(?:\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})\b',
-        r'\b\d{7,15}\b'
-    ]
-    for pattern in phone_patterns:
-        phone_match = re.search(pattern, text)
+    for pattern in PHONE_PATTERNS:
+        phone_match = pattern.search(contact_text) or pattern.search(text)
         if phone_match:
             matched_phone = phone_match.group(0)
             cleaned_phone = re.sub(r'\D', '', matched_phone)
@@ -402,38 +1997,13 @@ def parse_resume_data_basic(text):
                 phone = "N/A"
 
     current_year = datetime.now().year
-    experience_match = re.search(r'(\d+\+?\s*(?:years?|yrs?|yr)\s*(?:of)?\s*(?:(?:overall|total|professional)?\s*(?:experience|exp)))', text, re.IGNORECASE)
+    experience_match = EXPERIENCE_YEARS_PATTERN.search(document.section('header', 'summary', 'experience')) or \
+                       EXPERIENCE_YEARS_PATTERN.search(text)
     if experience_match:
         experience = experience_match.group(0).strip()
     else:
-        experience_text = ""
-        experience_section_keywords = [
-            r'EXPERIENCE', r'WORK EXPERIENCE', r'PROFESSIONAL EXPERIENCE',
-            r'EMPLOYMENT HISTORY', r'JOB HISTORY'
-        ]
-        
-        experience_start_index = -1
-        for keyword in experience_section_keywords:
-            match = re.search(keyword, text, re.IGNORECASE)
-            if match:
-                experience_start_index = match.end()
-                break
-
-        if experience_start_index != -1:
-            sections_after_experience = [
-                r'EDUCATION', r'SKILLS', r'PROJECTS', r'AWARDS', r'CERTIFICATIONS',
-                r'PUBLICATIONS', r'VOLUNTEER EXPERIENCE', r'REFERENCES', r'INTERESTS'
-            ]
-            experience_end_index = len(text)
-
-            temp_text_after_exp = text[experience_start_index:]
-            for keyword in sections_after_experience:
-                match = re.search(keyword, temp_text_after_exp, re.IGNORECASE)
-                if match:
-                    experience_end_index = experience_start_index + match.start()
-                    break
-            
-            experience_text = text[experience_start_index:experience_end_index]
+        # The segmenter already isolated the experience section, so no per-keyword searches are needed here
+        experience_text = document.section('experience')
 
         if experience_text:
             date_patterns = [
@@ -495,166 +2065,288 @@ def parse_resume_data_basic(text):
                 else:
                     experience = f"{total_years:.1f} years"
             
-    predefined_skills = [
 
-        # --- VLSI / Semiconductor Skills ---
-        # Digital Design (DD) - (Existing, but keeping for context/clarity)
-        "Verilog", "VHDL", "SystemVerilog", "RTL Design", "Logic Synthesis",
-        "Static Timing Analysis", "STA", "Formal Verification", "Linting",
-        "Clock Domain Crossing", "CDC", "Reset Domain Crossing", "RDC",
-        "Low Power Design", "Power Analysis", "FPGA Design", "ASIC Design",
-        "Combinational Logic", "Sequential Logic", "Finite State Machines", "FSM",
-        "Pipelining", "Data Paths", "Control Paths", "Memory Design", "SRAM", "DRAM",
-        "I/O Interfaces", "SPI", "I2C", "UART", "ARM Architecture", "RISC-V",
-        "Cache Coherence", "High-Level Synthesis", "Synthesis", "Netlist",
-        "Timing Closure", "Digital Logic", "Verilog-HDL", "VHDL-AMS",
+    # Skills are matched in the skills section; the full text is only scanned when the resume has none
+    skills_text = (document.section('skills').strip() or text).lower()
+    skill_ids = frozenset(skill_id for skill_id, pattern in TAXONOMY_SKILL_PATTERNS if pattern.search(skills_text))
 
-        # Design Verification (DV) - (Existing, but keeping for context/clarity)
-        "UVM", "Universal Verification Methodology", "Specman E", "PSL",
-        "SVA", "SystemVerilog Assertions", "Functional Verification",
-        "Testbench Architecture", "Test Plan", "Coverage Driven Verification", "CDV",
-        "Constrained Random Verification", "CRV", "Model Checking",
-        "Assertion-Based Verification", "ABV", "Emulation", "FPGA Prototyping",
-        "Regression Management", "Bug Tracking", "Gate Level Simulation", "GLS",
-        "Transaction-Level Modeling", "TLM", "Scoreboarding", "Monitors", "Drivers",
-        "Sequencers", "Checkers", "Functional Coverage", "Code Coverage",
-        "Protocol Verification", "VIP", "Verification IP", "Debugging", "Verdi",
-        "VCS", "QuestaSim", "Incisive", "Xcelium", "FormalPro", "SpyGlass",
-        "JasperGold", "Symphony", "Unified Power Format", "UPF", "CPF",
-        "Verification Methodology", "Verification Plan", "Coverage Closure",
-        "Formal Equivalence Checking", "LEC", "Assertions", "Test Automation",
+    current_ctc, expected_ctc = extract_ctc(document)
 
-        # Design for Testability (DFT) - (Existing, but keeping for context/clarity)
-        "Scan Insertion", "ATPG", "Automatic Test Pattern Generation", "JTAG",
-        "Boundary Scan", "MBIST", "Memory Built-In Self-Test", "LBIST",
-        "Logic Built-In Self-Test", "Fault Simulation", "Stuck-at Faults",
-        "Transition Faults", "Bridging Faults", "Test Compression", "DFT Sign-off",
-        "Diagnosis", "ATE", "Automatic Test Equipment", "Scan Chains", "Test Modes",
-        "Fault Models", "Test Coverage", "IP-level DFT", "System-level DFT",
-        "Delay Testing", "At-speed Testing", "TetraMax", "TestKompress", "DFT Compiler",
-        "SMS", "Tessent", "OpTest", "DFTMAX", "DesignWare", "Pattern Generation",
-        "Fault Coverage", "Manufacturing Test", "Yield Improvement",
+    return {
+        "Name": name, # This will be used as a source for 'Candidate Name'
+        "Name Source": name_source, # 'gazetteer' when the fast path found the name, 'ner' otherwise
+        "Skill IDs": skill_ids, # Interned taxonomy IDs, rendered as the 'Skill' column at export
+        "Experience": experience,
+        "Email ID": email,
+        "Phone Number": phone,
+        "Education": extract_education(document),
+        "NP": extract_notice_period(document),
+        "Current Company": extract_current_company(document),
+        "CCTC": current_ctc,
+        "ECTC": expected_ctc,
+        "Current Location": extract_current_location(document)
+    }
 
-        # Physical Design
-        "Physical Design", "Layout Design", "Floorplanning", "Power Grid Network", "PGN",
-        "Placement", "Clock Tree Synthesis", "CTS", "Routing", "ECO", "Engineering Change Order",
-        "Design Rule Check", "DRC", "Layout Versus Schematic", "LVS", "Parasitic Extraction", "PEX",
-        "Power Integrity", "Signal Integrity", "IR Drop Analysis", "EM", "Electromigration",
-        "Physical Verification", "DFM", "Design for Manufacturability", "Timing Closure",
-        "Cadence Innovus", "Synopsys ICC", "Synopsys ICC2", "Siemens Aprisa", "PrimeTime",
-        "Quantus", "Voltus", "Tempus", "Calibre", "StarRC", "NanoRoute", "RedHawk",
-        "Chip Assembly", "Tapeout", "GDSII", "LEF", "DEF", "Liberty Format", ".lib",
-        "Low Power Implementation", "FinFET", "Process Technology", "Layout Editor",
+# MAPI property holding an attachment's raw content (PR_ATTACH_DATA_BIN)
+PR_ATTACH_DATA_BIN = "http://schemas.microsoft.com/mapi/proptag/0x37010102"
+OL_FOLDER_INBOX = 6
+OL_TABLE_USER_ITEMS = 0
+# MAPI property holding a message's Internet Message-ID (PR_INTERNET_MESSAGE_ID), the same in every folder a copy sits in
+PR_INTERNET_MESSAGE_ID = "http://schemas.microsoft.com/mapi/proptag/0x1035001F"
+OUTLOOK_TABLE_COLUMNS = ["EntryID", PR_INTERNET_MESSAGE_ID, "Subject", "ReceivedTime", "SenderName"]
 
-        # Analog Design
-        "Analog Design", "Analog IC Design", "Transistor Level Design", "Schematic Design",
-        "Layout Design", "SPICE Simulation", "Noise Analysis", "PVT", "Process Voltage Temperature",
-        "Matching", "Bandgap References", "LDO", "Low Dropout Regulator", "PLL", "Phase-Locked Loop",
-        "ADC", "Analog-to-Digital Converter", "DAC", "Digital-to-Analog Converter", "Op-Amp",
-        "Filters", "Oscillators", "RF Design", "Radio Frequency", "Mixed-Signal Simulation",
-        "Cadence Virtuoso", "Spectre", "HSPICE", "Eldo", "ADE", "Analog Design Environment",
-        "Mentor Graphics AFS", "Analog FastSPICE", "Keysight ADS", "EMX", "Momentum",
-        "Custom Layout", "Device Physics", "CMOS", "Bipolar", "BiCMOS", "Power Management IC",
-        "PMIC", "Data Converters", "Amplifiers", "Transceivers", "Analog Front End", "AFE",
+def read_attachment_bytes(attachment, temp_dir):
+    """
+    Reads an Outlook attachment's content into memory. Falls back to SaveAsFile in the managed
+    temp directory when the property cannot be read directly (e.g. very large attachments).
+    """
+    try:
+        return bytes(attachment.PropertyAccessor.GetProperty(PR_ATTACH_DATA_BIN))
+    except Exception:
+        temp_path = os.path.join(temp_dir, f"attachment_{time.monotonic_ns()}")
+        attachment.SaveAsFile(temp_path)
+        try:
+            with open(temp_path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(temp_path)
 
-        # Analog Mixed-Signal (AMS) Design
-        "Analog Mixed-Signal", "AMS Design", "Mixed-Signal Verification", "Co-simulation",
-        "Verilog-AMS", "AMS Designer", "Custom Compiler", "Xcelium AMS", "Questa AMS",
-        "Behavioral Modeling", "Top-level Integration", "System-level Verification",
-        "Spice/FastSpice/UltraSim", "Real-Number Modeling", "RNM", "Mixed Signal Flow",
+def scan_outlook_folder_table(folder, since, subject_keywords, require_subject_match=False):
+    """
+    Bulk-reads only the columns the scan needs through Folder.GetTable, with the date and
+    has-attachment conditions evaluated by Outlook. Yields (entry_id, message_id, subject, received_time,
+    sender_name, is_subject_relevant) for candidate messages.
+    """
+    # DASL date literals are in UTC
+    since_utc = since.astimezone(timezone.utc) # Naive datetimes are taken as local time
+    dasl_filter = (
+        '@SQL=("urn:schemas:httpmail:hasattachment" = 1) AND '
+        f'("urn:schemas:httpmail:datereceived" >= \'{since_utc.strftime("%m/%d/%Y %I:%M %p")}\')'
+    )
+    table = folder.GetTable(dasl_filter, OL_TABLE_USER_ITEMS)
+    table.Columns.RemoveAll()
+    for column in OUTLOOK_TABLE_COLUMNS:
+        table.Columns.Add(column)
+    table.Sort("ReceivedTime", True) # Newest first
+
+    while not table.EndOfTable:
+        rows = table.GetArray(OUTLOOK_TABLE_ROWS_PER_READ) # One cross-process call for many rows
+        if not rows:
+            break
+        for entry_id, message_id, subject, received_time, sender_name in rows:
+            subject = subject or "No Subject"
+            is_subject_relevant = any(keyword in subject.lower() for keyword in subject_keywords)
+            if require_subject_match and not is_subject_relevant:
+                continue
+            yield entry_id, message_id or "", subject, received_time, sender_name or "Unknown Sender", is_subject_relevant
 
-        # FPGA Design (Enhanced)
-        "FPGA", "FPGA Development", "Xilinx Vivado", "AMD Vivado", "Intel Quartus Prime",
-        "Altera Quartus", "Lattice Diamond", "Libero SoC", "FPGA Prototyping",
-        "Logic Optimization", "IP Integration", "On-chip Debugging", "ILA", "VIO",
-        "HLS", "High-Level Synthesis", "Board Bring-up", "System Integration",
-        "Synthesis Constraints", "Place and Route", "Timing Closure (FPGA)",
-        "FPGA Architecture", "Hardware Description Language", "HDL", "MicroBlaze", "Zynq",
-        "NIOS", "Platform Design", "Embedded Processor",
+def is_resume_attachment_relevant(attachment_name, subject_lower, body_lower, subject_keywords, body_keywords, attachment_name_keywords):
+    """True if the attachment name, OR the email subject, OR the email body contains a resume keyword."""
+    return any(keyword in attachment_name.lower() for keyword in attachment_name_keywords) or \
+           any(keyword in subject_lower for keyword in subject_keywords) or \
+           any(keyword in body_lower for keyword in body_keywords)
 
-        # IP Design and Characterization
-        "IP Design", "IP Core Development", "IP Integration", "IP Verification",
-        "IP Hardening", "IP Delivery", "Library Characterization", "Standard Cell Libraries",
-        "IO Libraries", "Memory Compilers", "Characterization Tools", "Cadence Liberate",
-        "Synopsys SiliconSmart", "Synopsys SiliconSmart", "Liberty (.lib)", "Timing Models",
-        "Power Models", "Noise Models", "IP Reuse", "Design IP", "Verification IP", "Test IP",
-        "EDA Tools", "Foundry Process", "PDK", "Process Design Kit",
+_attachment_save_lock = threading.Lock()
 
-        # Test Chip Development
-        "Test Chip", "Test Chip Development", "Silicon Validation", "Post-Silicon Validation",
-        "Bring-up", "Debugging", "Characterization", "Measurement", "Yield Analysis",
-        "Failure Analysis", "FA", "Wafer Test", "Package Test", "Production Test",
-        "ATE Test Program", "Automated Test Equipment", "Parametric Test", "Functional Test",
-        "Silicon Debug", "Data Analysis", "Statistical Process Control", "SPC",
-        "Product Engineering", "Reliability Testing"
-    ]
+def collect_resume_attachments(message, current_subject, current_sender, message_received_time, current_body_snippet,
+                               download_folder, temp_dir, in_memory, subject_keywords, body_keywords,
+                               attachment_name_keywords, attachment_extensions):
+    """
+    Downloads (or reads into memory) the resume attachments of one message.
+    current_body_snippet may be None, in which case the body is only read from Outlook once an
+    attachment with a resume extension is found.
+    Returns a list of downloaded_files_info entries.
+    """
+    downloaded_files_info = []
+    subject_lower = current_subject.lower()
+    attachments = message.Attachments
 
-    found_skills = []
-    text_lower = text.lower()
-    for skill in predefined_skills:
-        # Use word boundaries to avoid partial matches (e.g., "C" matching "C#")
-        if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text_lower):
-            found_skills.append(skill)
+    for attachment in attachments:
+        attachment_name_safe = "" 
+        original_ext = "" 
 
-    if found_skills:
-        skills = ", ".join(sorted(list(set(found_skills))))
+        try:
+            attachment_name_safe = attachment.FileName
+            original_ext = os.path.splitext(attachment_name_safe)[1].lower()
+        except Exception as fn_err:
+            log.warning("    ⚠️ Warning: Could not read attachment filename for email '%s'. Using generic name. Error: %s",
+                        current_subject, fn_err, extra=log_fields(sender=current_sender, stage="download"))
+            cleaned_subject_for_name = re.sub(r'[^\w\s.-]', '', current_subject).strip()
+            if len(attachment_extensions) > 0:
+                 original_ext = attachment_extensions[0] 
+            else:
+                original_ext = ".bin" 
+            attachment_name_safe = f"attachment_from_{cleaned_subject_for_name or 'unknown_subject'}__{int(time.time())}{original_ext}"
+            
+        attachment_fields = log_fields(file_name=attachment_name_safe, sender=current_sender, stage="download")
 
-    return {
-        "Name": name, # This will be used as a source for 'Candidate Name'
-        "Skills": skills, # This will be renamed to 'Skill' later
-        "Experience": experience,
-        "Email ID": email,
-        "Phone Number": phone
-    }
+        # Check if the attachment itself has a supported extension AND
+        # if the attachment name, OR the email subject, OR the email body contains a resume keyword.
+        if original_ext in attachment_extensions:
+            if current_body_snippet is None:
+                try:
+                    # Store up to the first 2000 characters of the body for name extraction, prevent memory issues
+                    body = message.Body
+                    current_body_snippet = body[:2000] if body else ""
+                except Exception as body_err:
+                    log.warning("    ⚠️ Warning: Could not read the body of email '%s': %s", current_subject, body_err,
+                                extra=attachment_fields)
+                    current_body_snippet = ""
+            body_lower = current_body_snippet.lower() # Use snippet for keyword check too
+
+            if is_resume_attachment_relevant(attachment_name_safe, subject_lower, body_lower,
+                                             subject_keywords, body_keywords, attachment_name_keywords):
+                if in_memory:
+                    try:
+                        downloaded_files_info.append({
+                            'file_name': attachment_name_safe,
+                            'file_bytes': read_attachment_bytes(attachment, temp_dir),
+                            'received_time': message_received_time,
+                            'email_subject': current_subject,
+                            'email_body': current_body_snippet,
+                            'email_sender_display_name': current_sender
+                        })
+                        log.debug("    📥 Read relevant attachment into memory: %s", attachment_name_safe, extra=attachment_fields)
+                    except Exception as att_read_err:
+                        log.error("    ❌ ERROR: Failed to read attachment '%s': %s", attachment_name_safe, att_read_err,
+                                  extra=attachment_fields)
+                    continue
+
+                try:
+                    # Construct the save path, handling potential filename duplicates in the download folder
+                    save_path = os.path.join(download_folder, attachment_name_safe)
+                    base_name_no_ext, current_file_ext = os.path.splitext(save_path)
+                    
+                    with _attachment_save_lock: # Store threads save into the same folder
+                        counter = 1
+                        while os.path.exists(save_path):
+                            save_path = f"{base_name_no_ext}_{counter}{current_file_ext}"
+                            counter += 1
+
+                        attachment.SaveAsFile(save_path)
+                    downloaded_files_info.append({
+                        'file_name': os.path.basename(save_path),
+                        'file_path': save_path, 
+                        'received_time': message_received_time,
+                        'email_subject': current_subject,
+                        'email_body': current_body_snippet,
+                        'email_sender_display_name': current_sender # Store sender display name
+                    })
+                    log.debug("    📥 Downloaded relevant attachment: %s", os.path.basename(save_path), extra=attachment_fields)
+                    
+                except Exception as att_save_err:
+                    log.error("    ❌ ERROR: Failed to save attachment '%s': %s", attachment_name_safe, att_save_err,
+                              extra=attachment_fields)
+            else:
+                log.debug("    ℹ️ Skipping attachment '%s' (no strong resume keywords found).", attachment_name_safe,
+                          extra=attachment_fields)
+        else:
+            log.debug("    ℹ️ Skipping attachment '%s' (unsupported extension: '%s').", attachment_name_safe, original_ext,
+                      extra=attachment_fields)
+
+    return downloaded_files_info
+
+def resolve_outlook_folder(outlook, spec):
+    """
+    Opens the folder a spec names: "Mailbox/Folder/Subfolder" (a store's display name, then folder names; backslashes
+    as in Outlook's FolderPath work too). A spec naming only the mailbox opens its INBOX_FOLDER.
+    """
+    parts = [part for part in re.split(r'[\\/]+', spec) if part]
+    if not parts:
+        return outlook.GetDefaultFolder(OL_FOLDER_INBOX)
+    folder = outlook.Folders.Item(parts[0])
+    for part in parts[1:] or [INBOX_FOLDER]:
+        folder = folder.Folders.Item(part)
+    return folder
+
+def outlook_message_id(message):
+    """Internet Message-ID of an Outlook item ('' when the store does not expose it, e.g. drafts)."""
+    try:
+        return message.PropertyAccessor.GetProperty(PR_INTERNET_MESSAGE_ID) or ""
+    except Exception:
+        return ""
 
 # UPDATED Outlook Integration Function
-def download_resumes_from_outlook(download_folder, mailbox_name, inbox_name, subject_keywords, body_keywords, attachment_name_keywords, attachment_extensions):
+def download_resumes_from_outlook(download_folder, mailbox_name, inbox_name, subject_keywords, body_keywords, attachment_name_keywords, attachment_extensions,
+                                  in_memory=ATTACHMENTS_IN_MEMORY, scan_mode=OUTLOOK_SCAN_MODE, outlook_namespace=None, since=None,
+                                  folder_specs=None, store_threads=None):
     """
     Connects to Outlook, checks for new emails with resume attachments,
     downloads them, and leaves the emails in the Inbox.
-    Returns a list of dictionaries with file_path, received_time, email_subject, email_body, AND email_sender_display_name.
+    Returns a list of dictionaries with file_name, received_time, email_subject, email_body, AND email_sender_display_name,
+    plus file_bytes (in_memory=True) or file_path (saved into download_folder).
+    folder_specs lists the "Mailbox/Folder/Subfolder" folders to scan (default: OUTLOOK_SCAN_FOLDERS, or
+    mailbox_name/inbox_name). Each mailbox (store) is scanned on its own COM-initialized thread, at most store_threads
+    at once (default: all); an email found in several folders (same Message-ID) is only read once.
+    scan_mode 'table' bulk-reads message properties through Folder.GetTable; 'items' walks Folder.Items.
+    outlook_namespace can be passed in instead of dispatching Outlook (e.g. tests.fake_outlook.FakeOutlookNamespace).
+    since defaults to 24 hours ago.
     """
-    if win32com is None:
-        print("Outlook integration is disabled because 'pywin32' library is not installed.")
+    if win32com is None and outlook_namespace is None:
+        log.warning("Outlook integration is disabled because 'pywin32' library is not installed.")
         return []
 
-    downloaded_files_info = [] # List to store dictionaries of downloaded file info
-    
-    os.makedirs(download_folder, exist_ok=True)
-
-    try:
-        outlook = win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
-        
-        try:
-            inbox = outlook.GetDefaultFolder(6) # 6 corresponds to olFolderInbox
-            print(f"  📥 Connected to Outlook Inbox: {inbox.FolderPath}")
-            time.sleep(1) # Small pause
-        except Exception as e:
-            print(f"  ❌ Error accessing Outlook Inbox: {e}")
-            print("     Attempting to access default Inbox...")
-            try:
-                inbox = outlook.GetDefaultFolder(6) # olFolderInbox constant
-                print(f"  ✅ Successfully accessed default Inbox: {inbox.FolderPath}")
-            except Exception as e_default:
-                print(f"  ❌ Failed to access default Inbox: {e_default}")
-                print("     Outlook Inbox is not accessible. Please ensure Outlook is running and configured correctly.")
-                return []
-
-        messages = inbox.Items
+    folder_specs = list(folder_specs or OUTLOOK_SCAN_FOLDERS or [f"{mailbox_name}/{inbox_name}"])
+    # Filter for emails received within the last 1 day (24 hours) - this can be adjusted if needed
+    yesterday = since or datetime.now() - timedelta(days=1) # <--- ADJUST MAIL_LOOKBACK_DAYS IF YOU NEED TO LOOK FURTHER BACK
+
+    specs_by_store = {}
+    for spec in folder_specs:
+        store_name = next((part for part in re.split(r'[\\/]+', spec) if part), "")
+        specs_by_store.setdefault(store_name.lower(), []).append(spec)
+
+    seen_message_ids = set() # Shared by the store threads: a message copied to several folders is read once
+    seen_lock = threading.Lock()
+
+    def claim_message(message_id):
+        if not message_id:
+            return True
+        with seen_lock:
+            if message_id in seen_message_ids:
+                return False
+            seen_message_ids.add(message_id)
+            return True
+
+    def scan_folder(outlook, folder, temp_dir):
+        """Scans one folder; returns (downloaded_files_info, emails checked, duplicate emails skipped)."""
+        downloaded_files_info = []
+        duplicates = 0
+        if scan_mode == "table":
+            log.debug("  ⏳ Bulk-reading emails with attachments in %s received after: %s", folder.FolderPath,
+                      yesterday.strftime('%m/%d/%Y %I:%M %p'))
+            candidate_count = 0
+            for entry_id, message_id, current_subject, message_received_time, current_sender, _ in scan_outlook_folder_table(
+                    folder, yesterday, subject_keywords, require_subject_match=OUTLOOK_TABLE_REQUIRE_SUBJECT_MATCH):
+                candidate_count += 1
+                if not claim_message(message_id):
+                    duplicates += 1
+                    continue
+                try:
+                    message = outlook.GetItemFromID(entry_id) # Full item opened only for candidate messages
+                except Exception as open_err:
+                    log.warning("  ⚠️ WARNING: Could not open email '%s'. Skipping. Error: %s", current_subject, open_err,
+                                extra=log_fields(sender=current_sender, stage="download"))
+                    continue
+                log.debug("  📧 Processing email from '%s' (Subject: '%s').", current_sender, current_subject,
+                          extra=log_fields(sender=current_sender, stage="download"))
+                downloaded_files_info.extend(collect_resume_attachments(
+                    message, current_subject, current_sender, message_received_time, None,
+                    download_folder, temp_dir, in_memory, subject_keywords, body_keywords,
+                    attachment_name_keywords, attachment_extensions))
+            return downloaded_files_info, candidate_count, duplicates
+
+        messages = folder.Items
         messages.Sort("[ReceivedTime]", False) # Sort by received time, newest first
 
-        # Filter for emails received within the last 1 day (24 hours) - this can be adjusted if needed
-        yesterday = datetime.now() - timedelta(days=1) # <--- ADJUST THIS IF YOU NEED TO LOOK FURTHER BACK
         filter_date_str = yesterday.strftime('%m/%d/%Y %H:%M %p') # Format for Outlook filter
         filter_string = f"[ReceivedTime] >= '{filter_date_str}'"
         
-        print(f"  ⏳ Filtering emails received after: {filter_date_str}")
+        log.debug("  ⏳ Filtering emails in %s received after: %s", folder.FolderPath, filter_date_str)
         try:
             messages = messages.Restrict(filter_string)
-            print(f"  ✅ Filter applied. Checking {messages.Count} email(s).")
         except Exception as filter_error:
-            print(f"  ⚠️ WARNING: Could not apply date filter to Outlook messages: {filter_error}")
-            print("     Proceeding without date filter (will check all emails in Inbox, which might be slow).")
+            log.warning("  ⚠️ WARNING: Could not apply date filter to Outlook messages: %s. Proceeding without date filter "
+                        "(will check all emails in the folder, which might be slow).", filter_error)
 
         email_checked_count = 0
         for message in list(messages): # Convert to list to avoid issues if messages collection changes during loop
@@ -672,590 +2364,3468 @@ def download_resumes_from_outlook(download_folder, mailbox_name, inbox_name, sub
                 # Store up to the first 2000 characters of the body for name extraction, prevent memory issues
                 current_body_snippet = message.Body[:2000] if message.Body else "" 
             except Exception as read_err:
-                sanitized_err = sanitize_string_for_print(str(read_err))
-                print(f"  ⚠️ WARNING: Could not read full details for an email (possibly encoding or access issue). Skipping this email. Error: {sanitized_err}")
+                log.warning("  ⚠️ WARNING: Could not read full details for an email (possibly encoding or access issue). "
+                            "Skipping this email. Error: %s", read_err, extra=log_fields(stage="download"))
                 continue # Skip to next email if basic info can't be read
 
-            sanitized_subject = sanitize_string_for_print(current_subject)
-            sanitized_sender = sanitize_string_for_print(current_sender)
             subject_lower = current_subject.lower()
             body_lower = current_body_snippet.lower() # Use snippet for keyword check too
-            
-            # Flag to track if any resume attachment was found and downloaded for this specific email
-            resume_downloaded_from_this_email = False
 
             if message.Attachments.Count > 0:
-                print(f"  📧 Processing email from '{sanitized_sender}' (Subject: '{sanitized_subject}') - {message.Attachments.Count} attachment(s).")
-                for attachment in message.Attachments:
-                    attachment_name_safe = "" 
-                    original_ext = "" 
-
-                    try:
-                        attachment_name_safe = attachment.FileName
-                        original_ext = os.path.splitext(attachment_name_safe)[1].lower()
-                    except Exception as fn_err:
-                        print(f"    ⚠️ Warning: Could not read attachment filename for email '{sanitized_subject}'. Using generic name. Error: {fn_err}")
-                        cleaned_subject_for_name = re.sub(r'[^\w\s.-]', '', current_subject).strip()
-                        if len(attachment_extensions) > 0:
-                             original_ext = attachment_extensions[0] 
-                        else:
-                            original_ext = ".bin" 
-                        attachment_name_safe = f"attachment_from_{cleaned_subject_for_name or 'unknown_subject'}__{int(time.time())}{original_ext}"
-                        
-
-                    sanitized_attachment_name_for_print = sanitize_string_for_print(attachment_name_safe)
-
-                    # Check if the attachment itself has a supported extension AND
-                    # if the attachment name, OR the email subject, OR the email body contains a resume keyword.
-                    if original_ext in attachment_extensions:
-                        is_attachment_name_relevant = any(keyword in attachment_name_safe.lower() for keyword in attachment_name_keywords)
-                        is_email_content_relevant = any(keyword in subject_lower for keyword in subject_keywords) or \
-                                                  any(keyword in body_lower for keyword in body_keywords)
-
-                        if is_attachment_name_relevant or is_email_content_relevant:
-                            try:
-                                # Construct the save path, handling potential filename duplicates in the download folder
-                                save_path = os.path.join(download_folder, attachment_name_safe)
-                                base_name_no_ext, current_file_ext = os.path.splitext(save_path)
-                                
-                                counter = 1
-                                while os.path.exists(save_path):
-                                    save_path = f"{base_name_no_ext}_{counter}{current_file_ext}"
-                                    counter += 1
-
-                                attachment.SaveAsFile(save_path)
-                                downloaded_files_info.append({
-                                    'file_path': save_path, 
-                                    'received_time': message_received_time,
-                                    'email_subject': current_subject,
-                                    'email_body': current_body_snippet,
-                                    'email_sender_display_name': current_sender # Store sender display name
-                                })
-                                print(f"    📥 Downloaded relevant attachment: {os.path.basename(save_path)}")
-                                resume_downloaded_from_this_email = True 
-                                
-                            except Exception as att_save_err:
-                                print(f"    ❌ ERROR: Failed to save attachment '{sanitized_attachment_name_for_print}': {att_save_err}")
-                        else:
-                            print(f"    ℹ️ Skipping attachment '{sanitized_attachment_name_for_print}' (no strong resume keywords found).")
-                    else:
-                        print(f"    ℹ️ Skipping attachment '{sanitized_attachment_name_for_print}' (unsupported extension: '{original_ext}').")
+                if not claim_message(outlook_message_id(message)):
+                    duplicates += 1
+                    continue
+                log.debug("  📧 Processing email from '%s' (Subject: '%s') - %d attachment(s).", current_sender, current_subject,
+                          message.Attachments.Count, extra=log_fields(sender=current_sender, stage="download"))
+                downloaded_files_info.extend(collect_resume_attachments(
+                    message, current_subject, current_sender, message_received_time, current_body_snippet,
+                    download_folder, temp_dir, in_memory, subject_keywords, body_keywords,
+                    attachment_name_keywords, attachment_extensions))
             else:
                 if any(keyword in subject_lower for keyword in subject_keywords) or \
                    any(keyword in body_lower for keyword in body_keywords):
-                    print(f"  ℹ️ Email '{sanitized_subject}' is relevant by text, but has no attachments. Skipping.")
+                    log.debug("  ℹ️ Email '%s' is relevant by text, but has no attachments. Skipping.", current_subject,
+                              extra=log_fields(sender=current_sender, stage="download"))
+        return downloaded_files_info, email_checked_count, duplicates
+
+    def scan_store(specs):
+        """Thread body: one COM apartment and one MAPI session per store, its folders scanned in order."""
+        results = {}
+        com_initialized = False
+        temp_dir_manager = tempfile.TemporaryDirectory(prefix="resume_attachments_") # Only used by the SaveAsFile fallback
+        try:
+            if outlook_namespace is None:
+                pythoncom.CoInitialize() # Outlook objects belong to the thread (apartment) that created them
+                com_initialized = True
+            outlook = outlook_namespace or win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
+            for spec in specs:
+                started = time.perf_counter()
+                try:
+                    folder = resolve_outlook_folder(outlook, spec)
+                except Exception as e:
+                    if spec != f"{mailbox_name}/{inbox_name}":
+                        log.error("  ❌ Error accessing Outlook folder '%s': %s. Skipping it.", spec, e)
+                        continue
+                    log.warning("  ⚠️ Mailbox folder '%s' not found (%s); using the default Inbox.", spec, e)
+                    try:
+                        folder = outlook.GetDefaultFolder(OL_FOLDER_INBOX)
+                    except Exception as e_default:
+                        log.error("  ❌ Failed to access default Inbox: %s. Please ensure Outlook is running and configured correctly.", e_default)
+                        continue
+                found, checked, duplicates = scan_folder(outlook, folder, temp_dir_manager.name)
+                elapsed = time.perf_counter() - started
+                results[spec] = found
+                log.info("  📂 %s: %d email(s) checked, %d resume attachment(s), %d already seen in another folder (%.2fs).",
+                         folder.FolderPath, checked, len(found), duplicates, elapsed,
+                         extra=log_fields(stage="download", folder=spec, emails_checked=checked, resume_count=len(found),
+                                          duplicate_count=duplicates, duration_ms=round(elapsed * 1000, 1)))
+        except Exception as e:
+            log.critical("❌ CRITICAL ERROR during Outlook processing of %s: %s", ", ".join(specs), e, exc_info=True)
+        finally:
+            temp_dir_manager.cleanup()
+            if com_initialized:
+                pythoncom.CoUninitialize()
+        return results
+
+    if not in_memory:
+        os.makedirs(download_folder, exist_ok=True)
+
+    started = time.perf_counter()
+    store_specs = list(specs_by_store.values())
+    with ThreadPoolExecutor(max_workers=max(1, min(store_threads or len(store_specs), len(store_specs))),
+                            thread_name_prefix="outlook-store") as executor:
+        results = {}
+        for store_results in executor.map(scan_store, store_specs):
+            results.update(store_results)
+    downloaded_files_info = [record for spec in folder_specs for record in results.get(spec, [])] # Folder order, not finishing order
+    if len(folder_specs) > 1:
+        log.info("  ✅ Scanned %d folder(s) in %d mailbox(es) in %.2fs: %d resume attachment(s).", len(folder_specs),
+                 len(store_specs), time.perf_counter() - started, len(downloaded_files_info), extra=log_fields(stage="download"))
+    return downloaded_files_info
+
+
+# --- Mail Sources ---
+# Every backend returns the same downloaded_files_info records as download_resumes_from_outlook:
+# file_name, file_bytes, received_time, email_subject, email_body and email_sender_display_name.
+IMAP_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+EMAIL_PARSER = BytesParser(policy=policy.default)
+
+def email_received_time(message):
+    """Date header as a naive local datetime (the same form the Outlook backend produces), or None."""
+    try:
+        received_time = parsedate_to_datetime(str(message['Date']))
+    except (TypeError, ValueError, IndexError):
+        return None
+    return received_time.astimezone().replace(tzinfo=None) if received_time.tzinfo else received_time
+
+def email_body_snippet(message):
+    """First 2000 characters of the plain-text body (HTML bodies are stripped of tags)."""
+    try:
+        body_part = message.get_body(preferencelist=('plain', 'html'))
+        if body_part is None:
+            return ""
+        body = body_part.get_content()
+        if body_part.get_content_subtype() == 'html':
+            body = re.sub(r'<[^>]+>', ' ', body)
+        return body[:2000]
+    except Exception:
+        return ""
+
+def resume_records_from_email(message, since=None, subject_keywords=RESUME_KEYWORDS_IN_SUBJECT, body_keywords=RESUME_KEYWORDS_IN_BODY,
+                              attachment_name_keywords=RESUME_KEYWORDS_IN_ATTACHMENT_NAME, attachment_extensions=RESUME_ATTACHMENT_EXTENSIONS):
+    """Applies the Outlook backend's attachment rules to a parsed email (email.message.EmailMessage)."""
+    received_time = email_received_time(message)
+    if since and received_time and received_time < since:
+        return []
+
+    current_subject = str(message['Subject'] or "") or "No Subject"
+    sender_name, sender_address = parseaddr(str(message['From'] or ""))
+    current_sender = sender_name or sender_address or "Unknown Sender"
+    current_body_snippet = None # Only decoded once an attachment with a resume extension turns up
+
+    records = []
+    for part in message.iter_attachments():
+        attachment_name = part.get_filename()
+        if not attachment_name:
+            continue
+        attachment_fields = log_fields(file_name=attachment_name, sender=current_sender, stage="download")
+        original_ext = os.path.splitext(attachment_name)[1].lower()
+        if original_ext not in attachment_extensions:
+            log.debug("    ℹ️ Skipping attachment '%s' (unsupported extension: '%s').", attachment_name, original_ext,
+                      extra=attachment_fields)
+            continue
+        if current_body_snippet is None:
+            current_body_snippet = email_body_snippet(message)
+        if not is_resume_attachment_relevant(attachment_name, current_subject.lower(), current_body_snippet.lower(),
+                                             subject_keywords, body_keywords, attachment_name_keywords):
+            log.debug("    ℹ️ Skipping attachment '%s' (no strong resume keywords found).", attachment_name,
+                      extra=attachment_fields)
+            continue
+        file_bytes = part.get_payload(decode=True)
+        if not file_bytes:
+            continue
+        records.append({
+            'file_name': attachment_name,
+            'file_bytes': file_bytes,
+            'received_time': received_time,
+            'email_subject': current_subject,
+            'email_body': current_body_snippet,
+            'email_sender_display_name': current_sender
+        })
+        log.debug("    📥 Read relevant attachment into memory: %s", attachment_name, extra=attachment_fields)
+    return records
+
+def _resume_records_from_raw_emails(raw_emails, since):
+    records = []
+    seen_message_ids = set() # The same email exported or filed twice is only read once
+    for raw_email in raw_emails:
+        try:
+            message = EMAIL_PARSER.parsebytes(raw_email)
+            message_id = str(message['Message-ID'] or '').strip()
+            if message_id:
+                if message_id in seen_message_ids:
+                    continue
+                seen_message_ids.add(message_id)
+            records.extend(resume_records_from_email(message, since))
+        except Exception as e:
+            log.warning("  ⚠️ WARNING: Could not parse an email. Skipping. Error: %s", e, extra=log_fields(stage="download"))
+    return records
+
+def fetch_outlook_resumes(since, path=None):
+    return download_resumes_from_outlook(resume_download_folder, OUTLOOK_MAILBOX_NAME, INBOX_FOLDER, RESUME_KEYWORDS_IN_SUBJECT,
+                                         RESUME_KEYWORDS_IN_BODY, RESUME_KEYWORDS_IN_ATTACHMENT_NAME, RESUME_ATTACHMENT_EXTENSIONS,
+                                         since=since)
+
+def fetch_eml_directory_resumes(since, path=None):
+    """Reads every .eml file in a folder (e.g. messages exported from a mail client or a fixture mailbox)."""
+    path = path or MAIL_SOURCE_PATH
+    def raw_emails():
+        for entry in sorted(os.scandir(path), key=lambda e: e.name):
+            if entry.is_file() and entry.name.lower().endswith('.eml'):
+                with open(entry.path, 'rb') as f:
+                    yield f.read()
+    return _resume_records_from_raw_emails(raw_emails(), since)
+
+def fetch_mbox_resumes(since, path=None):
+    box = mailbox.mbox(path or MAIL_SOURCE_PATH, create=False)
+    try:
+        return _resume_records_from_raw_emails((box.get_bytes(key) for key in box.iterkeys()), since)
+    finally:
+        box.close()
+
+def fetch_maildir_resumes(since, path=None):
+    box = mailbox.Maildir(path or MAIL_SOURCE_PATH, factory=None, create=False)
+    return _resume_records_from_raw_emails((box.get_bytes(key) for key in box.iterkeys()), since)
+
+def imap_quote_mailbox(mailbox_name):
+    """The mailbox name as an IMAP quoted string: imaplib sends it as is, so "Sent Items" would reach the server as two words."""
+    if len(mailbox_name) > 1 and mailbox_name.startswith('"') and mailbox_name.endswith('"'):
+        return mailbox_name
+    return '"' + mailbox_name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def open_imap_connection():
+    """Logs in and selects the first of IMAP_MAILBOXES read-only, so fetched emails stay unread."""
+    connection = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT) if IMAP_USE_SSL else imaplib.IMAP4(IMAP_HOST, IMAP_PORT)
+    connection.login(IMAP_USERNAME, os.environ.get(IMAP_PASSWORD_ENV_VAR, ""))
+    connection.select(imap_quote_mailbox(IMAP_MAILBOXES[0]), readonly=True)
+    return connection
+
+def _imap_fetch_payloads(fetch_data):
+    """Yields (uid, payload bytes) from an imaplib UID FETCH response."""
+    for item in fetch_data or []:
+        if isinstance(item, tuple):
+            match = re.search(rb'UID (\d+)', item[0])
+            if match:
+                yield match.group(1), item[1]
+
+def _imap_search_candidate_uids(connection, since):
+    """
+    UIDs received since the given day in the selected mailbox, and (uid, Message-ID) of those whose Content-Type
+    is multipart, i.e. that can carry attachments.
+    """
+    since_day = f"{since.day:02d}-{IMAP_MONTHS[since.month - 1]}-{since.year}" # IMAP dates are not locale dependent
+    status, data = connection.uid('SEARCH', None, 'SINCE', since_day)
+    if status != 'OK':
+        raise RuntimeError(f"IMAP SEARCH failed: {data}")
+    uids = data[0].split() if data and data[0] else []
+    candidates = []
+    for start in range(0, len(uids), 500):
+        status, data = connection.uid('FETCH', b','.join(uids[start:start + 500]), '(BODY.PEEK[HEADER.FIELDS (CONTENT-TYPE MESSAGE-ID)])')
+        for uid, header in _imap_fetch_payloads(data):
+            headers = EMAIL_PARSER.parsebytes(header, headersonly=True)
+            if 'multipart/' in str(headers['Content-Type'] or '').lower():
+                candidates.append((uid, str(headers['Message-ID'] or '').strip()))
+    return uids, candidates
+
+async def _scan_imap_mailboxes_async(mailboxes, since, connection_factory, connections, chunk_size):
+    """
+    Searches several mailboxes and fetches their candidate emails over up to `connections` IMAP connections at once;
+    each blocking imaplib call runs in a worker thread. A worker re-selects when it moves to another mailbox's work.
+    Emails whose Message-ID was already found in another mailbox are not fetched again.
+    Returns (raw emails, {mailbox: (emails searched, emails fetched, duplicates skipped, seconds)}).
+    """
+    work = asyncio.Queue()
+    for mailbox_name in mailboxes:
+        work.put_nowait(('search', mailbox_name, None))
+    raw_emails = []
+    seen_message_ids = set() # Only touched on the event loop thread
+    folder_stats = {mailbox_name: {'searched': 0, 'fetched': 0, 'duplicates': 0, 'started': None, 'open_chunks': 0,
+                                   'seconds': 0.0, 'failed': False} for mailbox_name in mailboxes}
+
+    def finish_chunk(stats):
+        stats['open_chunks'] -= 1
+        if stats['open_chunks'] <= 0:
+            stats['seconds'] = time.perf_counter() - stats['started']
+
+    async def worker():
+        connection = None
+        selected = None
+        try:
+            while True:
+                kind, mailbox_name, chunk = await work.get()
+                stats = folder_stats[mailbox_name]
+                try:
+                    if connection is None:
+                        connection = await asyncio.to_thread(connection_factory)
+                    if mailbox_name != selected:
+                        status, data = await asyncio.to_thread(connection.select, imap_quote_mailbox(mailbox_name), readonly=True)
+                        if status != 'OK':
+                            raise RuntimeError(f"IMAP SELECT failed: {data}")
+                        selected = mailbox_name
+                    if kind == 'search':
+                        stats['started'] = time.perf_counter()
+                        uids, candidates = await asyncio.to_thread(_imap_search_candidate_uids, connection, since)
+                        stats['searched'] = len(uids)
+                        new_uids = []
+                        for uid, message_id in candidates:
+                            if message_id and message_id in seen_message_ids:
+                                stats['duplicates'] += 1
+                                continue
+                            seen_message_ids.add(message_id)
+                            new_uids.append(uid)
+                        for start in range(0, len(new_uids), chunk_size):
+                            stats['open_chunks'] += 1
+                            work.put_nowait(('fetch', mailbox_name, new_uids[start:start + chunk_size]))
+                        if not new_uids:
+                            stats['seconds'] = time.perf_counter() - stats['started']
+                    else:
+                        status, data = await asyncio.to_thread(connection.uid, 'FETCH', b','.join(chunk), '(BODY.PEEK[])')
+                        if status != 'OK':
+                            log.warning("  ⚠️ WARNING: IMAP FETCH failed for %d email(s) in %s: %s", len(chunk), mailbox_name, data)
+                            continue
+                        payloads = [payload for _, payload in _imap_fetch_payloads(data)]
+                        raw_emails.extend(payloads)
+                        stats['fetched'] += len(payloads)
+                except Exception as e:
+                    log.error("  ❌ ERROR: IMAP %s of mailbox '%s' failed: %s", kind, mailbox_name, e)
+                    stats['failed'] = True
+                    selected = None
+                finally:
+                    if kind == 'fetch': # Also when connecting or selecting failed, so the folder's timing still closes
+                        finish_chunk(stats)
+                    work.task_done()
+        finally:
+            if connection is not None:
+                await asyncio.to_thread(connection.logout)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, connections))]
+    await work.join()
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    return raw_emails, folder_stats
+
+def fetch_imap_resumes(since, path=None, connection_factory=None, connections=IMAP_CONNECTIONS, chunk_size=IMAP_FETCH_CHUNK_SIZE,
+                       mailboxes=None):
+    """
+    Searches every mailbox in IMAP_MAILBOXES (or mailboxes) and fetches the multipart candidates, all concurrently over
+    up to `connections` connections. connection_factory returns a logged-in imaplib-style connection (default: open_imap_connection).
+    """
+    connection_factory = connection_factory or open_imap_connection
+    mailboxes = list(mailboxes or IMAP_MAILBOXES)
+    raw_emails, folder_stats = asyncio.run(_scan_imap_mailboxes_async(mailboxes, since, connection_factory, connections, chunk_size))
+    for mailbox_name, stats in folder_stats.items():
+        if stats['failed'] and not stats['fetched']:
+            continue # The error was logged when it happened
+        log.info("  📂 IMAP %s: %d email(s) since %s, %d fetched, %d already seen in another mailbox (%.2fs).", mailbox_name,
+                 stats['searched'], since.strftime('%Y-%m-%d'), stats['fetched'], stats['duplicates'], stats['seconds'],
+                 extra=log_fields(stage="download", folder=mailbox_name, emails_checked=stats['searched'],
+                                  duplicate_count=stats['duplicates'], duration_ms=round(stats['seconds'] * 1000, 1)))
+    return _resume_records_from_raw_emails(raw_emails, since)
+
+MAIL_SOURCE_BACKENDS = {
+    "outlook": fetch_outlook_resumes,
+    "eml": fetch_eml_directory_resumes,
+    "mbox": fetch_mbox_resumes,
+    "maildir": fetch_maildir_resumes,
+    "imap": fetch_imap_resumes,
+}
+
+def fetch_resumes_from_mail_source(source=None, path=None, since=None):
+    """Runs the configured mail-source backend and returns its downloaded_files_info records."""
+    source = source or MAIL_SOURCE
+    if source not in MAIL_SOURCE_BACKENDS:
+        raise ValueError(f"Unknown mail source '{source}'. Choose one of: {', '.join(MAIL_SOURCE_BACKENDS)}")
+    since = since or datetime.now() - timedelta(days=MAIL_LOOKBACK_DAYS)
+    return MAIL_SOURCE_BACKENDS[source](since, path)
+
+
+def _open_resume_source(file_path, file_bytes, file_extension):
+    """Returns what the parsers read from: the path on disk, or a fresh in-memory stream over the bytes."""
+    if file_bytes is None:
+        return file_path
+    stream = io.BytesIO(file_bytes)
+    stream.name = "resume" + file_extension # pyresparser takes the extension from the stream name
+    return stream
+
+def extract_resume_text(file_extension, file_path=None, file_bytes=None):
+    """Plain text of a .pdf or .docx read from file_path or file_bytes ("" for other types)."""
+    if file_extension == '.pdf':
+        return extract_text_from_pdf(_open_resume_source(file_path, file_bytes, file_extension))
+    if file_extension == '.docx':
+        return extract_text_from_docx(_open_resume_source(file_path, file_bytes, file_extension))
+    return ""
+
+# --- Parser Cascade ---
+# Per-backend counters since start-up. 'filled' counts the cascade fields (name, email, phone, skills, experience) a backend produced;
+# 'compared'/'agreed' count fields both parsers produced and whether they matched (accuracy proxy, no ground truth).
+PARSER_BACKEND_STATS = {backend: {'runs': 0, 'skipped': 0, 'seconds': 0.0, 'filled': 0, 'compared': 0, 'agreed': 0}
+                        for backend in ("basic", "pyresparser")}
+
+def _phone_confidence(phone):
+    digits = re.sub(r'\D', '', str(phone or ""))
+    return 1.0 if len(digits) >= 10 else 0.6 if len(digits) >= 7 else 0.0
+
+def basic_field_confidences(basic_parser_data):
+    """Per-field confidence of the in-house parser's result (the name on the get_name_confidence scale, the rest 0-1)."""
+    name = basic_parser_data.get('Name', "N/A")
+    name_source = "gazetteer" if basic_parser_data.get('Name Source') == 'gazetteer' else "basic_parser_resume_text"
+    email = basic_parser_data.get('Email ID', "N/A")
+    return {
+        'name': get_name_confidence(name, name_source) if name != "N/A" else 0.0,
+        'email': 1.0 if email != "N/A" and EMAIL_PATTERN.fullmatch(email) else 0.0,
+        'phone': _phone_confidence(basic_parser_data.get('Phone Number')),
+        'skills': min(1.0, len(basic_parser_data.get('Skill IDs', ())) / PARSER_SKILLS_FOR_FULL_CONFIDENCE),
+        'experience': 1.0 if basic_parser_data.get('Experience', "N/A") != "N/A" else 0.0,
+    }
 
+def pyresparser_field_confidences(pyresparser_data):
+    name = pyresparser_data.get('name')
+    experience = pyresparser_data.get('total_experience')
+    return {
+        'name': get_name_confidence(name, "pyresparser") if name else 0.0,
+        'email': 1.0 if pyresparser_data.get('email') else 0.0,
+        'phone': _phone_confidence(pyresparser_data.get('mobile_number')),
+        'skills': min(1.0, len(skill_ids_from_names(pyresparser_data.get('skills') or [])) / PARSER_SKILLS_FOR_FULL_CONFIDENCE),
+        'experience': 1.0 if isinstance(experience, (int, float)) and experience > 0 else 0.0,
+    }
+
+def record_parser_run(backend, seconds, field_confidences):
+    stats = PARSER_BACKEND_STATS[backend]
+    stats['runs'] += 1
+    stats['seconds'] += seconds
+    stats['filled'] += sum(1 for confidence in field_confidences.values() if confidence > 0)
+
+def record_parser_agreement(backend, basic_parser_data, other_data):
+    """Counts how often the in-house parser agrees with another backend on the fields both produced."""
+    pairs = [
+        (basic_parser_data.get('Name'), other_data.get('name'),
+         lambda a, b: fuzz.token_sort_ratio(a, b) > 85),
+        (basic_parser_data.get('Email ID'), other_data.get('email'),
+         lambda a, b: a.lower() == b.lower()),
+        (basic_parser_data.get('Phone Number'), other_data.get('mobile_number'),
+         lambda a, b: re.sub(r'\D', '', a)[-10:] == re.sub(r'\D', '', b)[-10:]),
+    ]
+    stats = PARSER_BACKEND_STATS['basic']
+    for basic_value, other_value, same in pairs:
+        if basic_value and basic_value != "N/A" and other_value:
+            stats['compared'] += 1
+            stats['agreed'] += 1 if same(str(basic_value), str(other_value)) else 0
+
+def run_pyresparser(filename, file_path, file_bytes, file_extension):
+    """pyresparser's extracted data with phone digits and a lowercased email, or {} if it fails."""
+    try:
+        parser = ResumeParser(_open_resume_source(file_path, file_bytes, file_extension))
+        pyresparser_data = parser.get_extracted_data() or {}
+
+        if pyresparser_data.get('mobile_number'):
+             pyresparser_data["mobile_number"] = re.sub(r'\D', '', str(pyresparser_data["mobile_number"])).strip()
+        
+        if pyresparser_data.get('email'):
+            pyresparser_data['email'] = str(pyresparser_data['email']).lower().strip()
+        return pyresparser_data
     except Exception as e:
-        sanitized_error_overall = sanitize_string_for_print(str(e))
-        print(f"❌ CRITICAL ERROR during Outlook processing (overall loop): {sanitized_error_overall}")
-        traceback.print_exc() 
+        log.warning("  ⚠️ WARNING: Pyresparser failed for %s: %s. Falling back to basic parsing.", filename, e,
+                    extra=log_fields(file_name=filename, stage="parse"))
+        return {}
+
+def parser_cascade_summary(stats_at_start):
+    """One line on what each backend did since stats_at_start (a deep copy of PARSER_BACKEND_STATS)."""
+    parts = []
+    for backend, stats in PARSER_BACKEND_STATS.items():
+        before = stats_at_start[backend]
+        runs = stats['runs'] - before['runs']
+        skipped = stats['skipped'] - before['skipped']
+        seconds = stats['seconds'] - before['seconds']
+        part = f"{backend} {runs} run(s)"
+        if runs:
+            part += f", {seconds / runs * 1000:.0f} ms avg, {(stats['filled'] - before['filled']) / (runs * len(PARSER_CASCADE_MIN_CONFIDENCE)):.0%} fields filled"
+        if skipped:
+            part += f", skipped for {skipped}"
+        compared = stats['compared'] - before['compared']
+        if compared:
+            part += f", agrees with pyresparser on {(stats['agreed'] - before['agreed']) / compared:.0%} of {compared} field(s)"
+        parts.append(part)
+    return "; ".join(parts)
+
+
+def parse_resume_document(filename, file_extension, file_email_data, file_path=None, file_bytes=None, extracted_text=None):
+    """
+    Runs the resume parsers and the name/contact/skill selection for a single .pdf or .docx,
+    read either from file_path or from file_bytes. file_email_data carries the optional email
+    context (subject, body, received_time, sender display name). extracted_text skips the text
+    extraction when the caller already has it.
+    Returns a CandidateRecord (duplicate status is decided by the caller), or None if no text was extracted.
+    """
+    original_file_name_for_excel = filename
+    email_subject = file_email_data.get('email_subject', "N/A")
+    email_body = file_email_data.get('email_body', "N/A")
+    message_received_time = file_email_data.get('received_time') # Get original received time
+    sender_display_name = file_email_data.get('email_sender_display_name', "N/A") # Get sender display name
+
+    name_from_original_filename = extract_name_from_filename(original_file_name_for_excel)
+
+    if extracted_text is None:
+        extracted_text = extract_resume_text(file_extension, file_path, file_bytes)
+
+    if not extracted_text:
+        log.error("  ❌ No text extracted from %s. Skipping detailed parsing.", filename,
+                  extra=log_fields(file_name=filename, stage="extract"))
+        return None
+
+    nlp_memory_guard.count_document(reload_allowed=not _prefetched_nlp_docs) # Never swap spaCy under primed docs
+
+    # --- Parser cascade: in-house parser first, pyresparser only for weak fields ---
+    started = time.perf_counter()
+    basic_parser_data = parse_resume_data_basic(extracted_text)
+    field_confidences = basic_field_confidences(basic_parser_data)
+    record_parser_run('basic', time.perf_counter() - started, field_confidences)
+
+    weak_fields = [field for field, confidence in field_confidences.items()
+                   if confidence < PARSER_CASCADE_MIN_CONFIDENCE.get(field, 0)]
+    pyresparser_data = {}
+    if "pyresparser" in PARSER_CASCADE and (PARSER_CASCADE_ALWAYS_RUN_ALL or weak_fields):
+        started = time.perf_counter()
+        pyresparser_data = run_pyresparser(filename, file_path, file_bytes, file_extension)
+        record_parser_run('pyresparser', time.perf_counter() - started, pyresparser_field_confidences(pyresparser_data))
+        record_parser_agreement('pyresparser', basic_parser_data, pyresparser_data)
+    else:
+        PARSER_BACKEND_STATS['pyresparser']['skipped'] += 1
+
+    # --- Populate the candidate record with best available info ---
+    record = CandidateRecord(original_file_name_for_excel)
+
+    if message_received_time:
+        if not isinstance(message_received_time, datetime):
+            try: message_received_time = datetime(message_received_time.year, message_received_time.month, message_received_time.day, message_received_time.hour, message_received_time.minute, message_received_time.second)
+            except: message_received_time = None
+        if message_received_time:
+            record.source_date = message_received_time.strftime('%Y-%m-%d %H:%M:%S')
+            record.month = message_received_time.strftime('%B')
+            record.year = message_received_time.year
+
+    # --- Name Extraction Logic (Revised with Confidence Scoring and Fuzzy Matching) ---
+    name_candidates_with_scores = [] # List of (name, score, source) tuples
+
+    # 1. From resume parsers (highest confidence)
+    pyres_name = pyresparser_data.get('name')
+    if pyres_name: 
+        name_candidates_with_scores.append((pyres_name, get_name_confidence(pyres_name, "pyresparser"), "pyresparser"))
+
+    basic_name = basic_parser_data.get('Name') 
+    if basic_name:
+        basic_name_source = "gazetteer" if basic_parser_data.get('Name Source') == 'gazetteer' else "basic_parser_resume_text"
+        name_candidates_with_scores.append((basic_name, get_name_confidence(basic_name, basic_name_source), basic_name_source))
+
+    # 2. From email sender display name (HIGH CONFIDENCE SOURCE)
+    if sender_display_name and sender_display_name != "N/A":
+        name_candidates_with_scores.append((sender_display_name, get_name_confidence(sender_display_name, "email_sender_display_name"), "email_sender_display_name"))
+
+    # 3. From filename
+    if name_from_original_filename:
+        name_candidates_with_scores.append((name_from_original_filename, get_name_confidence(name_from_original_filename, "filename"), "filename"))
+
+    # 4. From email subject
+    # A gazetteer-confirmed resume name is unambiguous, so the email context is only checked with the rule-based patterns
+    use_ner = basic_parser_data.get('Name Source') != 'gazetteer'
+    name_from_subject = extract_name_from_email_subject(email_subject, use_ner=use_ner)
+    if name_from_subject:
+        name_candidates_with_scores.append((name_from_subject, get_name_confidence(name_from_subject, "email_subject_context"), "email_subject_context"))
+
+    # 5. From email body
+    name_from_body = extract_name_from_email_body(email_body, use_ner=use_ner)
+    if name_from_body:
+        name_candidates_with_scores.append((name_from_body, get_name_confidence(name_from_body, "email_body_context"), "email_body_context"))
+
+    # 6. From email ID (lowest confidence)
+    email_id_candidate = pyresparser_data.get('email') or basic_parser_data.get('Email ID')
+    if email_id_candidate and email_id_candidate != "N/A":
+        record.email_id = str(email_id_candidate).lower().strip()
+        name_from_email_id = extract_name_from_email(record.email_id)
+        if name_from_email_id:
+            name_candidates_with_scores.append((name_from_email_id, get_name_confidence(name_from_email_id, "email_id"), "email_id"))
     
-    return downloaded_files_info 
+    # Filter out non-plausible names (score 0 indicates not plausible)
+    valid_candidates = [(name, score, source) for name, score, source in name_candidates_with_scores if score > 0]
+    
+    best_name = "N/A"
+    if valid_candidates:
+        # Sort candidates by confidence score (descending), then by length (descending)
+        valid_candidates.sort(key=lambda x: (x[1], len(x[0])), reverse=True)
+        
+        # Select the best name, avoiding fuzzy duplicates
+        selected_best_names_by_group = []
+        
+        # Keep track of names already "covered" by a selected candidate
+        covered_names = set() 
+
+        for current_name, current_score, current_source in valid_candidates:
+            # If this name is already very similar to one we've already considered and chosen (higher confidence), skip
+            is_already_covered = False
+            for existing_covered_name in covered_names:
+                if fuzz.token_sort_ratio(current_name, existing_covered_name) > 85: # High similarity threshold
+                    is_already_covered = True
+                    break
+            
+            if not is_already_covered:
+                selected_best_names_by_group.append(current_name)
+                # For simplicity, just add the current name as representative of its group
+                covered_names.add(current_name) 
 
+        # After this loop, selected_best_names_by_group will contain the top candidate
+        # from each fuzzy-similar group, ordered by confidence.
+        if selected_best_names_by_group:
+            # The first one is the overall highest confidence, longest, non-fuzzy-duplicate
+            best_name = selected_best_names_by_group[0] 
 
-# --- Main Processing Logic ---
-def process_resumes_in_folder(folder_path, excel_file_path, downloaded_files_info):
+    record.candidate_name = best_name
+    # --- End Name Extraction Logic ---
+
+
+    pyres_phone_clean = pyresparser_data.get('mobile_number', '')
+    basic_phone_clean = basic_parser_data.get('Phone Number', '')
+
+    if pyres_phone_clean and len(pyres_phone_clean) >= 7:
+        record.phone_number = pyres_phone_clean
+    elif basic_phone_clean and len(basic_phone_clean) >= 7:
+        record.phone_number = basic_phone_clean
+    
+    if record.phone_number != 'N/A' and record.phone_number is not None:
+        record.phone_number = re.sub(r'\D', '', str(record.phone_number))
+        if not record.phone_number:
+            record.phone_number = "N/A"
+
+    pyres_exp = pyresparser_data.get('total_experience')
+    basic_exp = basic_parser_data.get('Experience') # Note: basic_parser_data still uses 'Experience'
+
+    if isinstance(pyres_exp, (int, float)) and pyres_exp > 0:
+        record.total_experience = f"{int(pyres_exp)} years"
+    elif basic_exp != "N/A":
+        record.total_experience = basic_exp
+    else:
+        record.total_experience = "N/A"
+
+    pyresparser_skill_ids = skill_ids_from_names(pyresparser_data.get('skills') or [])
+    record.skill_ids = pyresparser_skill_ids | basic_parser_data.get('Skill IDs', frozenset())
+
+    # --- 'cadate' details from the section-aware extractors, with pyresparser as a fallback ---
+    record.education = basic_parser_data.get('Education', "N/A")
+    if record.education == "N/A" and pyresparser_data.get('degree'):
+        record.education = ", ".join(str(degree).strip() for degree in pyresparser_data['degree'] if str(degree).strip()) or "N/A"
+    record.current_company = basic_parser_data.get('Current Company', "N/A")
+    if record.current_company == "N/A" and pyresparser_data.get('company_names'):
+        record.current_company = str(pyresparser_data['company_names'][0]).strip() or "N/A"
+    record.notice_period = basic_parser_data.get('NP', "N/A")
+    record.current_ctc = basic_parser_data.get('CCTC', "N/A")
+    record.expected_ctc = basic_parser_data.get('ECTC', "N/A")
+    record.current_location = basic_parser_data.get('Current Location', "N/A")
+    record.text_signature = minhash_signature(extracted_text)
+    record.resume_text = zlib.compress(extracted_text.lower().encode('utf-8')) # What the taxonomy patterns were matched against
+
+    return record
+
+
+# --- Pre-parse Triage ---
+FILE_MAGIC_BYTES = {
+    '.pdf': b'%PDF',
+    '.docx': b'PK\x03\x04', # Zip container
+    '.doc': b'\xd0\xcf\x11\xe0' # OLE2 compound document
+}
+TRIAGE_NEGATIVE_PATTERN = re.compile(r'\b(?:' + "|".join(re.escape(keyword) for keyword in TRIAGE_NEGATIVE_KEYWORDS) + r')\b', re.IGNORECASE)
+TRIAGE_SAMPLE_BYTES = 64 * 1024
+
+def _first_page_text(file_extension, file_bytes):
+    """Cheap text sample from the start of a document. Returns (text, page count or None)."""
+    if file_extension == '.pdf':
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(file_bytes))
+            page_count = len(reader.pages)
+            return (reader.pages[0].extract_text() or "") if page_count else "", page_count
+        except Exception:
+            return "", None
+    if file_extension == '.docx':
+        try:
+            with zipfile.ZipFile(io.BytesIO(file_bytes)) as docx_zip, docx_zip.open('word/document.xml') as xml_file:
+                xml_sample = xml_file.read(TRIAGE_SAMPLE_BYTES).decode('utf-8', errors='ignore')
+            xml_sample = re.sub(r'</w:p>|<w:br/>|<w:cr/>', '\n', xml_sample).replace('<w:tab/>', '\t')
+            return re.sub(r'<[^>]+>', '', xml_sample), None
+        except Exception:
+            return "", None
+    # .doc: the text of an OLE document is stored as 8-bit or UTF-16 runs inside the binary
+    sample = file_bytes[:TRIAGE_SAMPLE_BYTES]
+    runs = re.findall(r'[\x20-\x7e\n\r\t]{4,}', sample.decode('latin-1')) + \
+           re.findall(r'[\x20-\x7e\n\r\t]{4,}', sample.decode('utf-16-le', errors='ignore'))
+    return "\n".join(runs), None
+
+def triage_resume_document(filename, file_extension, file_bytes):
     """
-    Processes resumes in a given folder, parses data, and updates the Excel sheet.
-    Implements the new duplicate logic:
-    1. If Email OR Phone matches existing, mark as 'Duplicate'.
-    2. If Filename AND Skills match existing, DO NOT add.
+    Scores an attachment on cheap signals before any NLP runs.
+    Returns (verdict, score, reasons, first-page text) where verdict is 'accept', 'defer' or 'reject'.
+    """
+    reasons = []
+    expected_magic = FILE_MAGIC_BYTES.get(file_extension)
+    if expected_magic and not file_bytes.startswith(expected_magic):
+        return 'reject', -10, [f"content is not a real {file_extension} file"], ""
+
+    score = 0
+    size = len(file_bytes)
+    if size < TRIAGE_MIN_FILE_BYTES or size > TRIAGE_MAX_FILE_BYTES:
+        score -= 2
+        reasons.append(f"unusual size ({size // 1024} KB)")
+
+    if any(keyword in filename.lower() for keyword in RESUME_KEYWORDS_IN_ATTACHMENT_NAME):
+        score += 1
+        reasons.append("resume keyword in file name")
+
+    text, page_count = _first_page_text(file_extension, file_bytes)
+    negative_match = TRIAGE_NEGATIVE_PATTERN.search(filename.replace('_', ' ')) or TRIAGE_NEGATIVE_PATTERN.search(text[:3000])
+    if negative_match:
+        score -= 3
+        reasons.append(f"looks like a '{negative_match.group(0).lower()}'")
+
+    if page_count is not None:
+        if page_count > TRIAGE_MAX_PDF_PAGES:
+            score -= 2
+            reasons.append(f"{page_count} pages")
+        elif page_count >= 1:
+            score += 1
+
+    if len(text.strip()) >= TRIAGE_MIN_FIRST_PAGE_CHARS:
+        score += 1
+    elif file_extension == '.pdf':
+        # Probably a scan: not worth a full parse now, but not junk either unless something else says so
+        reasons.append("little or no text on the first page")
+        verdict = 'reject' if negative_match or score < TRIAGE_REJECT_SCORE else 'defer'
+        return verdict, score, reasons, text
+
+    section_hits = set()
+    for line in text.split('\n'):
+        line = line.strip()
+        if line and len(line) <= SECTION_HEADER_MAX_LINE_LENGTH:
+            match = SECTION_HEADER_LINE_PATTERN.match(line) or SECTION_INLINE_HEADER_PATTERN.match(line)
+            if match:
+                section_hits.add(SECTION_BY_KEYWORD[re.sub(r'\s+', ' ', match.group(1).lower())])
+    section_hits.discard('other')
+    if section_hits:
+        score += 2 if len(section_hits) >= 2 else 1
+        reasons.append(f"resume sections: {', '.join(sorted(section_hits))}")
+
+    text_lower = text.lower()
+    skill_hits = 0
+    for _, pattern in TAXONOMY_SKILL_PATTERNS:
+        if pattern.search(text_lower):
+            skill_hits += 1
+            if skill_hits >= 3:
+                break
+    if skill_hits:
+        score += 2 if skill_hits >= 3 else 1
+        reasons.append(f"{skill_hits}{'+' if skill_hits >= 3 else ''} taxonomy skill(s)")
+
+    if EMAIL_PATTERN.search(text) or PHONE_PATTERNS[1].search(text):
+        score += 1
+
+    if score >= TRIAGE_ACCEPT_SCORE:
+        return 'accept', score, reasons, text
+    if score <= TRIAGE_REJECT_SCORE:
+        return 'reject', score, reasons, text
+    return 'defer', score, reasons, text
+
+def defer_resume_document(document, file_bytes, score, reasons, origin):
+    """Parks a low-confidence attachment (with its email context) in the deferred folder for a later 'process-deferred' run."""
+    deferred_folder = os.path.join(output_directory, DEFERRED_FOLDER_NAME)
+    os.makedirs(deferred_folder, exist_ok=True)
+    base_name, file_ext = os.path.splitext(document['file_name'])
+    deferred_path = os.path.join(deferred_folder, f"{base_name}__{time.time_ns()}{file_ext}")
+    with open(deferred_path, 'wb') as f:
+        f.write(file_bytes)
+    received_time = document.get('received_time')
+    entry = {
+        'file_path': deferred_path,
+        'file_name': document['file_name'],
+        'received_time': received_time.strftime('%Y-%m-%d %H:%M:%S') if received_time else None,
+        'email_subject': document.get('email_subject', "N/A"),
+        'email_body': document.get('email_body', "N/A"),
+        'email_sender_display_name': document.get('email_sender_display_name', "N/A"),
+        'triage_score': score,
+        'triage_reasons': reasons,
+        'origin': origin
+    }
+    with open(os.path.join(deferred_folder, "deferred_manifest.jsonl"), 'a', encoding='utf-8') as manifest:
+        manifest.write(json.dumps(entry, default=str) + "\n")
+
+def load_deferred_documents():
+    """Reads the deferred manifest back into document dicts for process_resume_documents."""
+    manifest_path = os.path.join(output_directory, DEFERRED_FOLDER_NAME, "deferred_manifest.jsonl")
+    if not os.path.exists(manifest_path):
+        return []
+    documents = []
+    with open(manifest_path, encoding='utf-8') as manifest:
+        for line in manifest:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not os.path.exists(entry['file_path']):
+                continue
+            if entry.get('received_time'):
+                entry['received_time'] = datetime.strptime(entry['received_time'], '%Y-%m-%d %H:%M:%S')
+            documents.append(entry)
+    return documents
+
+def process_deferred_resumes():
+    """Fully parses everything triage deferred (per mail source it came from), then clears the deferred folder."""
+    documents = load_deferred_documents()
+    log.info("📥 %d deferred resume(s) to process.", len(documents))
+    by_origin = {}
+    for document in documents: # Entries deferred before the source was recorded count as the configured MAIL_SOURCE
+        by_origin.setdefault(document.get('origin') or MAIL_SOURCE, []).append(document)
+    for origin, origin_documents in by_origin.items():
+        process_resume_documents(origin_documents, output_excel_file, triage=False, origin=origin)
+    for document in documents:
+        try:
+            os.remove(document['file_path'])
+        except OSError as e:
+            log.error("  ❌ Error deleting deferred file %s: %s", document['file_path'], e)
+    manifest_path = os.path.join(output_directory, DEFERRED_FOLDER_NAME, "deferred_manifest.jsonl")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+# --- Priority Scheduling ---
+PRIORITY_OPEN_ROLE_PATTERN = re.compile(r'\b(?:' + "|".join(re.escape(keyword) for keyword in PRIORITY_OPEN_ROLE_KEYWORDS) + r')\b',
+                                        re.IGNORECASE) if PRIORITY_OPEN_ROLE_KEYWORDS else None
+# Matched against lowercased text, like TAXONOMY_SKILL_PATTERNS
+PRIORITY_SKILL_PATTERNS = [re.compile(r'(?<!\w)' + re.escape(keyword.lower()) + r'(?!\w)') for keyword in PRIORITY_SKILL_KEYWORDS] or \
+                          [pattern for _, pattern in TAXONOMY_SKILL_PATTERNS]
+
+def resume_priority(document, first_page_text, now=None):
+    """Score of one attachment under the PRIORITY_* rules (higher is parsed sooner) and the reasons for it."""
+    score = 0
+    reasons = []
+    email_text = " ".join(str(document.get(field) or "") for field in ('email_subject', 'email_body', 'file_name'))
+    role_match = PRIORITY_OPEN_ROLE_PATTERN.search(email_text) if PRIORITY_OPEN_ROLE_PATTERN else None
+    if role_match:
+        score += PRIORITY_WEIGHTS['open_role']
+        reasons.append(f"open role '{role_match.group(0)}'")
+    sender = str(document.get('email_sender_display_name') or "").lower()
+    if sender and any(keyword.lower() in sender for keyword in PRIORITY_SENDER_KEYWORDS):
+        score += PRIORITY_WEIGHTS['sender']
+        reasons.append("priority sender")
+    text_lower = (first_page_text or "").lower()
+    skill_hits = 0
+    for pattern in PRIORITY_SKILL_PATTERNS:
+        if pattern.search(text_lower):
+            skill_hits += 1
+            if skill_hits >= PRIORITY_MAX_SKILL_HITS:
+                break
+    if skill_hits:
+        score += PRIORITY_WEIGHTS['skill_hit'] * skill_hits
+        reasons.append(f"{skill_hits} skill hit(s)")
+    received_time = document.get('received_time')
+    if isinstance(received_time, datetime):
+        now = now or (datetime.now(received_time.tzinfo) if received_time.tzinfo else datetime.now())
+        if now - received_time > timedelta(hours=PRIORITY_STALE_AFTER_HOURS):
+            score += PRIORITY_WEIGHTS['stale']
+            reasons.append("stale")
+    return score, reasons
+
+def resume_work_lane(file_extension, file_size, first_page_text):
+    """'heavy' for jobs that need Word, OCR or a long extraction, else 'light'."""
+    if file_extension == '.doc' or (file_size or 0) > HEAVY_LANE_MIN_BYTES:
+        return 'heavy'
+    if file_extension == '.pdf' and len((first_page_text or "").strip()) < TRIAGE_MIN_FIRST_PAGE_CHARS:
+        return 'heavy' # A scan: its pages go through OCR
+    return 'light'
+
+class ResumeWorkScheduler:
+    """
+    Priority queue in front of the parse stage with a 'light' and a 'heavy' lane. Each lane is a heap ordered by
+    priority score, then oldest email first. pop() serves the light lane but gives the heavy lane every
+    heavy_every-th turn while both have work, so slow jobs neither hold up quick ones nor starve.
+    """
+    LANES = ('light', 'heavy')
+
+    def __init__(self, heavy_every=HEAVY_LANE_EVERY):
+        self.heavy_every = heavy_every
+        self.heaps = {lane: [] for lane in self.LANES}
+        self.max_depth = {lane: 0 for lane in self.LANES}
+        self.waits = {lane: [] for lane in self.LANES} # Seconds between push and pop of every job
+        self.light_since_heavy = 0
+        self.sequence = 0 # Keeps equal keys in push order (and the items themselves out of comparisons)
+
+    def __len__(self):
+        return sum(len(heap) for heap in self.heaps.values())
+
+    def push(self, lane, score, received_at, item):
+        self.sequence += 1
+        heap = self.heaps[lane]
+        heapq.heappush(heap, (-score, received_at if received_at is not None else float('inf'), self.sequence,
+                              time.perf_counter(), item))
+        self.max_depth[lane] = max(self.max_depth[lane], len(heap))
+
+    def pop(self):
+        """Returns (lane, item) of the next job to parse."""
+        light, heavy = self.heaps['light'], self.heaps['heavy']
+        if heavy and (not light or self.light_since_heavy >= self.heavy_every):
+            lane = 'heavy'
+            self.light_since_heavy = 0
+        else:
+            lane = 'light'
+            self.light_since_heavy += 1
+        queued_at, item = heapq.heappop(self.heaps[lane])[3:]
+        self.waits[lane].append(time.perf_counter() - queued_at)
+        return lane, item
+
+    def __iter__(self):
+        while len(self):
+            yield self.pop()
+
+    def lane_stats(self):
+        stats = {}
+        for lane in self.LANES:
+            waits = latency_percentiles(self.waits[lane], (50, 95))
+            stats[lane] = {'jobs': len(self.waits[lane]), 'max_depth': self.max_depth[lane], 'wait_p50_seconds': waits[50],
+                           'wait_p95_seconds': waits[95], 'wait_max_seconds': max(self.waits[lane], default=None)}
+        return stats
+
+    def log_lane_stats(self):
+        stats = self.lane_stats()
+        if not any(lane_stats['jobs'] for lane_stats in stats.values()):
+            return
+        log.info("  🚦 Parse lanes: %s.", "; ".join(
+            f"{lane} {lane_stats['jobs']} job(s), depth {lane_stats['max_depth']}, wait p50 {_format_latency(lane_stats['wait_p50_seconds'])}"
+            f" / p95 {_format_latency(lane_stats['wait_p95_seconds'])} / max {_format_latency(lane_stats['wait_max_seconds'])}"
+            for lane, lane_stats in stats.items()),
+            extra=log_fields(stage="schedule", **{f"{lane}_{key}": value for lane, lane_stats in stats.items() for key, value in lane_stats.items()}))
+
+
+# --- Excel Export ---
+# The workbooks are the recruiters' working copy (Source, Rec, CTC, comments, colours), so they are never rebuilt
+# from a DataFrame. New rows are appended to the first sheet's XML and the EXCEL_PIPELINE_UPDATED_COLUMNS of rows
+# already there are rewritten in place; every other byte of the workbook is copied through. The sheet is streamed
+# row by row: a merge still reads and copies the whole sheet, so its time grows with the history, but only one key
+# per row is held in memory instead of the sheet (bench-excel-export measures both against a pandas rewrite).
+# Missing workbooks are written by openpyxl's write-only (streaming) writer.
+EXCEL_ROW_KEY_COLUMN = "Row Key"
+PRIMARY_EXCEL_COLUMNS = [
+    "Source Date", "Month", "Year", "Skill", "Candidate Name", 
+    "Total Experience", "Email ID", "Phone Number", "File Name", "Status"
+]
+# The second workbook leaves out 'File Name'; the detail and recruiter columns start as 'N/A'
+CADATE_EXCEL_COLUMNS = [
+    "Source Date", "Month", "Year", "Source", "Rec", "Skill", 
+    "Candidate Name", "Total Experience", "Email ID", "Phone Number", "Status", 
+    "Education", "NP", "Current Company", "CCTC", "ECTC", "Current Location", 
+    "Current Status", "Kishore Comment"
+]
+CADATE_DETAIL_COLUMNS = [
+    'Source', 'Rec', 'Education', 'NP', 'Current Company', 
+    'CCTC', 'ECTC', 'Current Location', 'Current Status', 'Kishore Comment'
+]
+EXCEL_LEGACY_COLUMN_NAMES = {'Name': 'Candidate Name', 'Skills': 'Skill', 'Received On': 'Source Date', 'Experience': 'Total Experience'}
+XLSX_READ_BATCH_ROWS = 5000 # Rows whose shared strings are resolved together when streaming a sheet
+XLSX_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+XLSX_RELATIONSHIP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+XLSX_STREAM_CHUNK_SIZE = 1 << 20
+XLSX_SHEET_DATA_PATTERN = re.compile(rb'<sheetData\s*/>|<sheetData\b[^>]*>')
+XLSX_SHEET_DATA_END_PATTERN = re.compile(rb'\s*(</sheetData>)')
+XLSX_ROW_PATTERN = re.compile(rb'\s*(<row\b([^>]*?)(?:/>|>(.*?)</row>))', re.DOTALL)
+XLSX_CELL_PATTERN = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.DOTALL)
+XLSX_CELL_REF_PATTERN = re.compile(rb'\br="([A-Z]+)\d+"')
+XLSX_ROW_NUMBER_PATTERN = re.compile(rb'\br="(\d+)"')
+XLSX_REF_END_PATTERN = re.compile(r'(\$?[A-Z]{1,3})?(\$?)(\d+)?')
+# Parts of a worksheet after <sheetData> that address rows, and the wrappers that must not be left empty
+XLSX_ROW_ADDRESSED_ELEMENTS = (b'mergeCell', b'hyperlink', b'conditionalFormatting', b'dataValidation',
+                               b'x14:conditionalFormatting', b'x14:dataValidation')
+XLSX_ROW_ADDRESSED_WRAPPERS = ((b'mergeCells', b'mergeCell'), (b'hyperlinks', b'hyperlink'), (b'dataValidations', b'dataValidation'),
+                               (b'x14:conditionalFormattings', b'x14:conditionalFormatting'), (b'x14:dataValidations', b'x14:dataValidation'))
+XLSX_DEFINED_NAME_REF_PATTERN = re.compile(r"((?:'(?:[^']|'')+'|[^'!=,;()\s]+)!)(\$?[A-Z]{0,3}\$?\d*(?::\$?[A-Z]{0,3}\$?\d*)?)")
+XLSX_INVALID_XML_CHARS_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+EXCEL_ROW_KEY_SOURCE_COLUMNS = ("File Name", "Source Date", "Email ID", "Phone Number") # candidate_row_key arguments
+
+def candidate_row_key(file_name, source_date, email, phone):
+    """Stable key of one candidate row, kept in the hidden EXCEL_ROW_KEY_COLUMN of both workbooks."""
+    parts = []
+    for value in (file_name, source_date, email, phone):
+        if value is None or (isinstance(value, numbers.Number) and pd.isna(value)):
+            value = ''
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value) # Phone numbers read back from Excel as floats
+        parts.append(str(value).strip().lower())
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def assign_row_keys(df):
+    """Fills EXCEL_ROW_KEY_COLUMN for rows without one (new rows, or sheets written before the key column existed)."""
+    computed = [candidate_row_key(*values) for values in zip(*(df[column] for column in EXCEL_ROW_KEY_SOURCE_COLUMNS))]
+    if EXCEL_ROW_KEY_COLUMN in df.columns:
+        df[EXCEL_ROW_KEY_COLUMN] = df[EXCEL_ROW_KEY_COLUMN].where(df[EXCEL_ROW_KEY_COLUMN].notna(), pd.Series(computed, index=df.index))
+    else:
+        df[EXCEL_ROW_KEY_COLUMN] = computed
+
+def _excel_cell_value(value):
+    """Turns NaN/None into an empty cell and drops characters XML cannot hold."""
+    if value is None or (isinstance(value, numbers.Number) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        return XLSX_INVALID_XML_CHARS_PATTERN.sub('', value)
+    return value
+
+def _xlsx_first_sheet_part(xlsx_zip):
+    """Returns the zip member name of the workbook's first worksheet."""
+    workbook = ET.fromstring(xlsx_zip.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{{{XLSX_MAIN_NS}}}sheets/{{{XLSX_MAIN_NS}}}sheet')
+    relationship_id = sheet.get(f'{{{XLSX_RELATIONSHIP_NS}}}id')
+    for relationship in ET.fromstring(xlsx_zip.read('xl/_rels/workbook.xml.rels')):
+        if relationship.get('Id') == relationship_id:
+            target = relationship.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    raise ValueError("workbook has no first worksheet")
+
+def _iter_sheet_xml(stream):
+    """
+    Splits a worksheet XML stream into ('head', bytes, None), one ('row', bytes, row attributes) per <row> and
+    ('tail', bytes, None), reading it in chunks so only one chunk is held at a time.
+    """
+    buffer = b''
+    while True:
+        chunk = stream.read(XLSX_STREAM_CHUNK_SIZE)
+        buffer += chunk
+        match = XLSX_SHEET_DATA_PATTERN.search(buffer)
+        if match:
+            break
+        if not chunk:
+            raise ValueError("worksheet has no <sheetData>")
+    if match.group(0).endswith(b'/>'): # Empty sheet
+        yield 'head', buffer[:match.start()] + b'<sheetData>', None
+        yield 'tail', b'</sheetData>' + buffer[match.end():] + stream.read(), None
+        return
+    yield 'head', buffer[:match.end()], None
+    buffer, position = buffer[match.end():], 0
+    while True:
+        end = XLSX_SHEET_DATA_END_PATTERN.match(buffer, position)
+        if end:
+            yield 'tail', buffer[end.start(1):] + stream.read(), None
+            return
+        row = XLSX_ROW_PATTERN.match(buffer, position)
+        if row:
+            yield 'row', row.group(1), row.group(2)
+            position = row.end()
+            continue
+        chunk = stream.read(XLSX_STREAM_CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("worksheet XML ends inside <sheetData>")
+        buffer, position = buffer[position:] + chunk, 0
+
+def _xlsx_row_number(row_attributes, previous_row_number):
+    number = XLSX_ROW_NUMBER_PATTERN.search(row_attributes)
+    return int(number.group(1)) if number else previous_row_number + 1
+
+def _xlsx_column_cell_pattern(column):
+    """Matches the cell of one column in a <row>, for reading a few columns without parsing every cell."""
+    letters = get_column_letter(column).encode('ascii')
+    return re.compile(rb'<c\b([^>]*?\br="' + letters + rb'\d+"[^>]*?)(?:/>|>(.*?)</c>)', re.DOTALL)
+
+def _xlsx_row_cells(row_xml):
+    """Yields (column index, cell XML, cell attributes, cell content or None) for the cells of one <row>."""
+    content = XLSX_ROW_PATTERN.match(row_xml).group(3) or b''
+    for position, cell in enumerate(XLSX_CELL_PATTERN.finditer(content), 1):
+        reference = XLSX_CELL_REF_PATTERN.search(cell.group(1))
+        column = column_index_from_string(reference.group(1).decode('ascii')) if reference else position
+        yield column, cell.group(0), cell.group(1), cell.group(2)
+
+def _xlsx_raw_cell_value(attributes, content):
+    """Returns ('s', index) for shared strings, ('n', text) for numbers, ('v', text) otherwise, or None for an empty cell."""
+    if not content:
+        return None
+    cell_type = re.search(rb'\bt="(\w+)"', attributes)
+    cell_type = cell_type.group(1) if cell_type else b'n'
+    if cell_type == b'inlineStr':
+        text = b''.join(re.findall(rb'<t\b[^>]*>(.*?)</t>', content, re.DOTALL))
+        return ('v', html.unescape(text.decode('utf-8')))
+    value = re.search(rb'<v>(.*?)</v>', content, re.DOTALL)
+    if not value:
+        return None
+    if cell_type == b's':
+        return ('s', int(value.group(1)))
+    return ('n' if cell_type == b'n' else 'v', html.unescape(value.group(1).decode('utf-8')))
+
+def _xlsx_shared_strings(xlsx_zip, indices):
+    """Looks up just the given shared-string indices, streaming sharedStrings.xml."""
+    wanted, found = set(indices), {}
+    if not wanted or 'xl/sharedStrings.xml' not in xlsx_zip.namelist():
+        return found
+    si_tag, t_tag, run_tag = (f'{{{XLSX_MAIN_NS}}}{tag}' for tag in ('si', 't', 'r'))
+    index = 0
+    with xlsx_zip.open('xl/sharedStrings.xml') as stream:
+        for _, element in ET.iterparse(stream):
+            if element.tag != si_tag:
+                continue
+            if index in wanted: # Plain <t> or rich-text runs; phonetic hints (<rPh>) are not part of the value
+                found[index] = ''.join(child.text or '' if child.tag == t_tag else ''.join(t.text or '' for t in child.iter(t_tag))
+                                       for child in element if child.tag in (t_tag, run_tag))
+                if len(found) == len(wanted):
+                    break
+            element.clear()
+            index += 1
+    return found
+
+def _resolve_raw_cell_values(xlsx_zip, raw_values):
+    """Maps {key: raw cell value} to {key: text}, resolving shared strings in one pass."""
+    strings = _xlsx_shared_strings(xlsx_zip, (raw[1] for raw in raw_values.values() if raw and raw[0] == 's'))
+    return {key: '' if raw is None else strings.get(raw[1], '') if raw[0] == 's' else raw[1] for key, raw in raw_values.items()}
+
+def _xlsx_header_index(xlsx_zip, row_xml):
+    """Maps the column names of a header <row> to their column indexes, under their current names (EXCEL_LEGACY_COLUMN_NAMES)."""
+    header_values = {column: raw for column, _, attributes, content in _xlsx_row_cells(row_xml)
+                     if (raw := _xlsx_raw_cell_value(attributes, content)) is not None}
+    header_index = {name.strip(): column for column, name in _resolve_raw_cell_values(xlsx_zip, header_values).items() if name.strip()}
+    for old_name, name in EXCEL_LEGACY_COLUMN_NAMES.items():
+        if old_name in header_index and name not in header_index:
+            header_index[name] = header_index.pop(old_name)
+    return header_index
+
+def _xlsx_number(text):
+    number = float(text)
+    return int(number) if number.is_integer() else number
+
+def _resolve_workbook_rows(xlsx_zip, rows):
+    strings = _xlsx_shared_strings(xlsx_zip, (raw[1] for _, raws in rows for raw in raws.values() if raw[0] == 's'))
+    for row_number, raws in rows:
+        yield row_number, {name: strings.get(raw[1], '') if raw[0] == 's' else _xlsx_number(raw[1]) if raw[0] == 'n' else raw[1]
+                           for name, raw in raws.items()}
+
+def iter_workbook_rows(path, columns=None, row_numbers=None):
+    """
+    Streams the data rows of the workbook's first sheet as (row number, {column name: value}), reading just the
+    named columns (all by default) of just the given row numbers (all by default). Empty cells are left out,
+    numbers come back as int or float and shared strings are resolved XLSX_READ_BATCH_ROWS rows at a time.
+    """
+    with zipfile.ZipFile(path) as source:
+        header, patterns, batch, row_number = None, None, [], 0
+        with source.open(_xlsx_first_sheet_part(source)) as stream:
+            for kind, row_xml, row_attributes in _iter_sheet_xml(stream):
+                if kind != 'row':
+                    continue
+                row_number = _xlsx_row_number(row_attributes, row_number)
+                if b'<v>' not in row_xml and b'<t' not in row_xml:
+                    continue # Formatted but empty row
+                if header is None:
+                    header = {column: name for name, column in _xlsx_header_index(source, row_xml).items() if columns is None or name in columns}
+                    if columns is not None: # A few columns: find just their cells instead of splitting the row
+                        patterns = {column: _xlsx_column_cell_pattern(column) for column in header}
+                    continue
+                if row_numbers is not None and row_number not in row_numbers:
+                    continue
+                if patterns is None:
+                    cells = ((column, attributes, content) for column, _, attributes, content in _xlsx_row_cells(row_xml) if column in header)
+                else:
+                    cells = ((column, cell.group(1), cell.group(2)) for column, pattern in patterns.items() if (cell := pattern.search(row_xml)))
+                batch.append((row_number, {header[column]: raw for column, attributes, content in cells
+                                           if (raw := _xlsx_raw_cell_value(attributes, content)) is not None}))
+                if len(batch) >= XLSX_READ_BATCH_ROWS:
+                    yield from _resolve_workbook_rows(source, batch)
+                    batch = []
+            yield from _resolve_workbook_rows(source, batch)
+
+def _xlsx_cell_xml(column, row_number, value, style=None):
+    reference = f"{get_column_letter(column)}{row_number}"
+    style_attribute = f' s="{style}"' if style else ''
+    value = _excel_cell_value(value)
+    if value is None:
+        return f'<c r="{reference}"{style_attribute}/>'
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{reference}"{style_attribute} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Number):
+        return f'<c r="{reference}"{style_attribute}><v>{value}</v></c>'
+    return f'<c r="{reference}"{style_attribute} t="inlineStr"><is><t xml:space="preserve">{xml_escape(str(value))}</t></is></c>'
+
+def _xlsx_row_xml(row_number, values, row_xml=None):
+    """
+    Returns a <row> holding values ({column index: value}). Given the existing row_xml, its other cells are kept
+    and replaced cells keep their style.
+    """
+    cells, styles, attributes = {}, {}, f' r="{row_number}"'.encode('ascii')
+    if row_xml is not None:
+        attributes = re.sub(rb'\s+spans="[^"]*"', b'', XLSX_ROW_PATTERN.match(row_xml).group(2)).rstrip()
+        for column, cell_xml, cell_attributes, _ in _xlsx_row_cells(row_xml):
+            cells[column] = cell_xml
+            style = re.search(rb'\bs="(\d+)"', cell_attributes)
+            styles[column] = style.group(1).decode('ascii') if style else None
+    for column, value in values.items():
+        cells[column] = _xlsx_cell_xml(column, row_number, value, styles.get(column)).encode('utf-8')
+    return b'<row' + attributes + b'>' + b''.join(cells[column] for column in sorted(cells)) + b'</row>'
+
+def _xlsx_sheet_head(head, last_column, last_row_number, hidden_column=None, shrink=False):
+    """
+    Updates the <dimension> of a worksheet head (only ever growing it unless shrink is set) and hides hidden_column
+    (the newly added key column).
+    """
+    dimension = re.search(rb'<dimension\b[^>]*\bref="[A-Z]+\d+(?::([A-Z]+)(\d+))?"[^>]*/>', head)
+    if dimension:
+        if dimension.group(1):
+            last_column = max(last_column, column_index_from_string(dimension.group(1).decode('ascii')))
+            if not shrink:
+                last_row_number = max(last_row_number, int(dimension.group(2)))
+        new_dimension = f'<dimension ref="A1:{get_column_letter(last_column)}{last_row_number}"/>'.encode('ascii')
+        head = head[:dimension.start()] + new_dimension + head[dimension.end():]
+    if hidden_column:
+        column_xml = f'<col min="{hidden_column}" max="{hidden_column}" width="18" hidden="1" customWidth="1"/>'.encode('ascii')
+        if b'</cols>' in head:
+            # Column ranges may not overlap; leave the key column visible if a range already covers it
+            if all(int(maximum) < hidden_column for maximum in re.findall(rb'<col\b[^>]*\bmax="(\d+)"', head)):
+                head = head.replace(b'</cols>', column_xml + b'</cols>', 1)
+        else:
+            position = head.rfind(b'<sheetData')
+            head = head[:position] + b'<cols>' + column_xml + b'</cols>' + head[position:]
+    return head
+
+def _xlsx_renumber_row(row_xml, row_number):
+    """Moves a <row> and its cell references to row_number (rows below removed rows move up)."""
+    tag_end = row_xml.index(b'>') + 1
+    number = str(row_number).encode('ascii')
+    head = XLSX_ROW_NUMBER_PATTERN.sub(b'r="' + number + b'"', row_xml[:tag_end], count=1)
+    return head + re.sub(rb'(<c\b[^>]*?\br="[A-Z]+)\d+"', lambda match: match.group(1) + number + b'"', row_xml[tag_end:])
+
+def _xlsx_shift_ref(ref, dropped_rows):
+    """
+    Moves a cell or range reference ('A5', 'B6:C6', '$A$2:$A$300') past removed rows: rows below them move up and a
+    range loses the rows removed from it. Returns None when every row it covers was removed; references without
+    row numbers (whole columns) are returned unchanged.
+    """
+    ends = [XLSX_REF_END_PATTERN.fullmatch(end) for end in ref.split(':')]
+    if len(ends) > 2 or not all(ends) or any(end.group(3) is None for end in ends):
+        return ref
+    first, last = int(ends[0].group(3)), int(ends[-1].group(3))
+    while first <= last and first in dropped_rows:
+        first += 1
+    while last >= first and last in dropped_rows:
+        last -= 1
+    if first > last:
+        return None
+    rows = (first, last) if len(ends) == 2 else (first,)
+    return ':'.join(f"{end.group(1) or ''}{end.group(2)}{row - sum(1 for dropped in dropped_rows if dropped < row)}"
+                    for end, row in zip(ends, rows))
+
+def _xlsx_shift_sqref(sqref, dropped_rows):
+    """_xlsx_shift_ref over a space-separated list of references, leaving out the ones removed entirely."""
+    return ' '.join(ref for ref in (_xlsx_shift_ref(ref, dropped_rows) for ref in sqref.split()) if ref)
+
+def _xlsx_shift_sheet_refs(tail, dropped_rows):
+    """
+    Moves the merged cells, hyperlinks, conditional formats and data validations after <sheetData> past removed rows.
+    Those left on no row (and merges left on a single cell) are deleted, and so are wrappers left empty.
+    """
+    def shift_element(match):
+        element = match.group(0)
+        reference = re.search(rb'\b(s?qref|ref)="([^"]*)"', element[:element.index(b'>')]) or re.search(rb'<xm:sqref>(.*?)</xm:sqref>', element)
+        if not reference:
+            return element
+        old = reference.group(reference.lastindex).decode('ascii')
+        new = _xlsx_shift_sqref(old, dropped_rows)
+        if not new or (element.startswith(b'<mergeCell') and len(set(new.split(':'))) < 2):
+            return b''
+        start, end = reference.span(reference.lastindex)
+        return element[:start] + new.encode('ascii') + element[end:]
+
+    for tag in XLSX_ROW_ADDRESSED_ELEMENTS:
+        tail = re.sub(rb'<' + tag + rb'\b[^>]*?(?:/>|>.*?</' + tag + rb'>)', shift_element, tail, flags=re.DOTALL)
+    for wrapper, child in XLSX_ROW_ADDRESSED_WRAPPERS:
+        def fit_wrapper(match):
+            count = len(re.findall(rb'<' + child + rb'\b', match.group(2)))
+            if not count:
+                return b''
+            head = re.sub(rb'\bcount="\d+"', f'count="{count}"'.encode('ascii'), match.group(1))
+            return head + match.group(2) + b'</' + wrapper + b'>'
+        tail = re.sub(rb'(<' + wrapper + rb'\b[^>]*>)(.*?)</' + wrapper + rb'>', fit_wrapper, tail, flags=re.DOTALL)
+        tail = re.sub(rb'<' + wrapper + rb'\b[^>]*/>', b'', tail)
+    return tail
+
+def _xlsx_shift_defined_names(workbook_xml, sheet_name, dropped_rows):
+    """Moves the workbook's defined names (print areas, filter ranges, named ranges) on sheet_name past removed rows."""
+    def shift_reference(match):
+        if match.group(1)[:-1].strip("'").replace("''", "'") != sheet_name:
+            return match.group(0)
+        new = _xlsx_shift_ref(match.group(2), dropped_rows)
+        return match.group(1) + new if new else '#REF!'
+
+    def shift_name(match):
+        text = html.unescape(match.group(2).decode('utf-8'))
+        return match.group(1) + xml_escape(XLSX_DEFINED_NAME_REF_PATTERN.sub(shift_reference, text)).encode('utf-8') + match.group(3)
+
+    return re.sub(rb'(<definedName\b[^>]*>)(.*?)(</definedName>)', shift_name, workbook_xml, flags=re.DOTALL)
+
+def _xlsx_first_sheet_name(xlsx_zip):
+    workbook = ET.fromstring(xlsx_zip.read('xl/workbook.xml'))
+    return workbook.find(f'{{{XLSX_MAIN_NS}}}sheets/{{{XLSX_MAIN_NS}}}sheet').get('name')
+
+def _write_merged_sheet(source_stream, target_stream, row_updates, last_column, last_row_number, hidden_column=None,
+                        dropped_rows=frozenset()):
+    """
+    Copies a worksheet XML stream, rewriting the rows in row_updates ({row number: {column index: value}}) that exist
+    and inserting the rest in row order. Rows in dropped_rows are left out and the rows after them renumbered, along
+    with the merged cells, hyperlinks, conditional formats and data validations addressing them; other untouched rows
+    are copied byte for byte.
+    """
+    pending = sorted(row_updates)
+    pending_index, row_number, shift = 0, 0, 0
+    final_last_row_number = last_row_number - len(dropped_rows)
+    for kind, chunk, row_attributes in _iter_sheet_xml(source_stream):
+        if kind == 'head':
+            chunk = _xlsx_sheet_head(chunk, last_column, final_last_row_number, hidden_column, shrink=bool(dropped_rows))
+        elif kind == 'row':
+            row_number = _xlsx_row_number(row_attributes, row_number)
+            while pending_index < len(pending) and pending[pending_index] < row_number:
+                target_stream.write(_xlsx_row_xml(pending[pending_index] - shift, row_updates[pending[pending_index]]))
+                pending_index += 1
+            if row_number in dropped_rows:
+                shift += 1
+                continue
+            if shift:
+                chunk = _xlsx_renumber_row(chunk, row_number - shift)
+            if pending_index < len(pending) and pending[pending_index] == row_number:
+                chunk = _xlsx_row_xml(row_number - shift, row_updates[row_number], chunk)
+                pending_index += 1
+        else:
+            for new_row_number in pending[pending_index:]:
+                target_stream.write(_xlsx_row_xml(new_row_number - shift, row_updates[new_row_number]))
+            if dropped_rows:
+                chunk = _xlsx_shift_sheet_refs(chunk, dropped_rows)
+            # Fit the sheet's filter range to the rows added or removed
+            chunk = re.sub(rb'(<autoFilter\b[^>]*\bref="[A-Z]+\d+:[A-Z]+)(\d+)"',
+                           lambda match: match.group(1) + str(final_last_row_number if dropped_rows else
+                                                              max(final_last_row_number, int(match.group(2)))).encode('ascii') + b'"',
+                           chunk, count=1)
+        target_stream.write(chunk)
+
+def write_rows_to_new_workbook(path, columns, rows):
+    """
+    Writes rows ([(key, {column: value})], any iterable) to a new workbook with openpyxl's write-only mode, which
+    streams the rows to disk instead of building the sheet in memory. Returns the number of rows written.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.column_dimensions[get_column_letter(len(columns) + 1)].hidden = True
+    sheet.append(list(columns) + [EXCEL_ROW_KEY_COLUMN])
+    written = 0
+    for key, values in rows:
+        sheet.append([_excel_cell_value(values.get(column)) for column in columns] + [key])
+        written += 1
+    temp_path = f"{path}.tmp"
+    workbook.save(temp_path)
+    os.replace(temp_path, path)
+    return written
+
+def merge_rows_into_workbook(path, columns, new_rows, updated_rows, drop_keys=(), updated_columns=None):
+    """
+    Appends new_rows ([(key, {column: value})]) to the first sheet of the workbook at path and rewrites the
+    EXCEL_PIPELINE_UPDATED_COLUMNS (or updated_columns) of the rows whose key is in updated_rows ({key: {column: value}});
+    a new row whose key is already in the sheet only updates it. Rows whose key is in drop_keys are removed (archived months),
+    unless the sheet has formulas, whose references are not rewritten.
+    Sheets written before the key column existed get it added, computed from the EXCEL_ROW_KEY_SOURCE_COLUMNS cells.
+    Returns (rows appended, rows updated, rows removed).
+    """
+    if not os.path.exists(path):
+        return write_rows_to_new_workbook(path, columns, new_rows), 0, 0
+    updated_columns = EXCEL_PIPELINE_UPDATED_COLUMNS if updated_columns is None else updated_columns
+
+    with zipfile.ZipFile(path) as source:
+        sheet_part = _xlsx_first_sheet_part(source)
+
+        # Pass 1: the header, then only the key cells of each data row
+        header_row_number, header_index, scanned_columns = None, {}, {}
+        row_raw_values, last_row_number, row_number, has_formulas = {}, 0, 0, False
+        with source.open(sheet_part) as stream:
+            for kind, row_xml, row_attributes in _iter_sheet_xml(stream):
+                if kind != 'row':
+                    continue
+                row_number = _xlsx_row_number(row_attributes, row_number)
+                has_formulas = has_formulas or b'<f' in row_xml
+                if b'<v>' not in row_xml and b'<t' not in row_xml:
+                    continue # Formatted but empty row
+                last_row_number = row_number
+                if header_row_number is not None:
+                    raws = {}
+                    for column, pattern in scanned_columns.items():
+                        cell = pattern.search(row_xml)
+                        raws[column] = _xlsx_raw_cell_value(cell.group(1), cell.group(2)) if cell else None
+                    row_raw_values[row_number] = raws
+                    continue
+                header_row_number = row_number
+                header_index = _xlsx_header_index(source, row_xml)
+                wanted = [EXCEL_ROW_KEY_COLUMN] if EXCEL_ROW_KEY_COLUMN in header_index else EXCEL_ROW_KEY_SOURCE_COLUMNS
+                scanned_columns = {header_index[column]: _xlsx_column_cell_pattern(header_index[column]) for column in wanted if column in header_index}
+
+        key_column = header_index.get(EXCEL_ROW_KEY_COLUMN)
+        if key_column:
+            key_by_row = _resolve_raw_cell_values(source, {row: raws[key_column] for row, raws in row_raw_values.items()})
+        else:
+            texts = _resolve_raw_cell_values(source, {(row, column): raw for row, raws in row_raw_values.items() for column, raw in raws.items()})
+            key_by_row = {row: candidate_row_key(*(texts.get((row, header_index.get(column))) for column in EXCEL_ROW_KEY_SOURCE_COLUMNS))
+                          for row in row_raw_values}
+        del row_raw_values
+
+        added_columns = [column for column in list(columns) + [EXCEL_ROW_KEY_COLUMN] if column not in header_index]
+        for column in added_columns:
+            header_index[column] = max(header_index.values(), default=0) + 1
+        if header_row_number is None:
+            header_row_number = last_row_number = 1
+        row_updates = {header_row_number: {header_index[column]: column for column in added_columns}} if added_columns else {}
+        if not key_column:
+            for row, key in key_by_row.items():
+                row_updates.setdefault(row, {})[header_index[EXCEL_ROW_KEY_COLUMN]] = key
+        drop_keys = set(drop_keys)
+        dropped_rows = {row for row, key in key_by_row.items() if key in drop_keys}
+        if dropped_rows and has_formulas: # Formula text is not rewritten, so removing rows would point formulas at the wrong cells
+            log.warning("  ⚠️ '%s' has formulas: keeping %d archived row(s) in it rather than shifting the rows they refer to.",
+                        os.path.basename(path), len(dropped_rows))
+            dropped_rows = set()
+        for row in dropped_rows:
+            row_updates.pop(row, None)
+        row_by_key = {key: row for row, key in key_by_row.items() if key and row not in dropped_rows}
+
+        updated = appended = 0
+        for key, values in list(updated_rows.items()) + [(key, values) for key, values in new_rows if key in row_by_key]:
+            changes = {header_index[column]: value for column, value in values.items()
+                       if column in updated_columns and column in header_index}
+            if key in row_by_key and changes:
+                row_updates.setdefault(row_by_key[key], {}).update(changes)
+                updated += 1
+        for key, values in new_rows:
+            if key in row_by_key:
+                continue
+            last_row_number += 1
+            row_updates[last_row_number] = {header_index[column]: values.get(column) for column in columns}
+            row_updates[last_row_number][header_index[EXCEL_ROW_KEY_COLUMN]] = key
+            row_by_key[key] = last_row_number
+            appended += 1
+
+        sheet_name = _xlsx_first_sheet_name(source) if dropped_rows else None
+        temp_path = f"{path}.tmp"
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                with source.open(info) as source_stream, target.open(info, 'w') as target_stream:
+                    if info.filename == sheet_part:
+                        _write_merged_sheet(source_stream, target_stream, row_updates, max(header_index.values()), last_row_number,
+                                            hidden_column=None if key_column else header_index[EXCEL_ROW_KEY_COLUMN],
+                                            dropped_rows=dropped_rows)
+                    elif info.filename == 'xl/workbook.xml' and dropped_rows:
+                        target_stream.write(_xlsx_shift_defined_names(source_stream.read(), sheet_name, dropped_rows))
+                    else:
+                        shutil.copyfileobj(source_stream, target_stream, XLSX_STREAM_CHUNK_SIZE)
+    os.replace(temp_path, path)
+    return appended, updated, len(dropped_rows)
+
+
+def workbook_is_locked(path):
+    """True while the workbook is open in Excel (or LibreOffice), which would make replacing it fail."""
+    folder, file_name = os.path.split(path)
+    if os.path.exists(os.path.join(folder, f"~${file_name}")) or os.path.exists(os.path.join(folder, f".~lock.{file_name}#")):
+        return True
+    try:
+        with open(path, 'r+b'):
+            return False
+    except FileNotFoundError:
+        return False
+    except PermissionError: # Windows refuses while Excel holds the file
+        return True
+
+def cadate_rows_from_primary(excel_file_path, columns, cadate_rows):
+    """
+    Streams the rows of the primary workbook as second-workbook rows, taking a row's values from cadate_rows
+    ([(key, {column: value})]) where it has them and 'N/A' for the CADATE_DETAIL_COLUMNS the sheet lacks.
+    """
+    cadate_rows = dict(cadate_rows)
+    for _, values in iter_workbook_rows(excel_file_path, set(columns) | {EXCEL_ROW_KEY_COLUMN, *EXCEL_ROW_KEY_SOURCE_COLUMNS}):
+        key = values.get(EXCEL_ROW_KEY_COLUMN) or candidate_row_key(*(values.get(column) for column in EXCEL_ROW_KEY_SOURCE_COLUMNS))
+        if key in cadate_rows:
+            yield key, cadate_rows[key]
+        else:
+            yield key, {column: values.get(column, 'N/A' if column in CADATE_DETAIL_COLUMNS else None) for column in columns}
+
+def export_job_to_workbooks(job):
+    """
+    Merges one export job (built by process_resume_documents) into both workbooks. Raises PermissionError while
+    either one is locked. Safe to repeat after a partial failure: rows already in a sheet are not added twice.
+    """
+    for path in (job['excel_file_path'], job['cadate_excel_file_path']):
+        if path and workbook_is_locked(path):
+            raise PermissionError(f"'{os.path.basename(path)}' is open in another program")
+    appended, updated, removed = merge_rows_into_workbook(job['excel_file_path'], job['primary_columns'], job['primary_rows'],
+                                                          job['updated_rows'], job.get('drop_keys', ()),
+                                                          job.get('updated_columns'))
+    if removed:
+        log.info("🗄️ Removed %d archived row(s) from %s.", removed, job['excel_file_path'], extra=log_fields(stage="export"))
+    if not job['cadate_excel_file_path']:
+        return
+    log.info("✅ Data successfully written to %s (%d row(s) added, %d row(s) updated).", job['excel_file_path'], appended, updated,
+             extra=log_fields(stage="export"))
+    cadate_existed = os.path.exists(job['cadate_excel_file_path'])
+    if cadate_existed:
+        appended, updated, _ = merge_rows_into_workbook(job['cadate_excel_file_path'], job['cadate_columns'], job['cadate_rows'],
+                                                        job['updated_rows'], updated_columns=job.get('updated_columns'))
+    else: # A missing one is written from the whole (just merged) primary sheet
+        appended = write_rows_to_new_workbook(job['cadate_excel_file_path'], job['cadate_columns'],
+                                              cadate_rows_from_primary(job['excel_file_path'], job['cadate_columns'], job['cadate_rows']))
+    if cadate_existed:
+        log.info("✅ Updated additional Excel: %s (%d row(s) added, %d row(s) updated; recruiter columns kept).",
+                 job['cadate_excel_file_path'], appended, updated, extra=log_fields(stage="export"))
+    else:
+        log.info("✅ Generated additional Excel: %s (excluding 'File Name' column, %d record(s)).", job['cadate_excel_file_path'],
+                 appended, extra=log_fields(stage="export"))
+
+def _json_default(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+class ExcelExportQueue:
+    """
+    Write-behind export to the workbooks. submit() appends the job to the journal (fsynced) and returns; a background
+    thread merges jobs in order, retrying with exponential backoff while a workbook is locked. A job leaves the journal
+    only once both workbooks have it, so jobs still pending at exit or after a crash are replayed on the next start.
+    """
+
+    def __init__(self, journal_path, retry_initial_seconds=EXPORT_RETRY_INITIAL_SECONDS, retry_max_seconds=EXPORT_RETRY_MAX_SECONDS):
+        self.journal_path = journal_path
+        self.retry_initial_seconds = retry_initial_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.condition = threading.Condition()
+        self.pending = deque(self._load_journal())
+        self.stopping = False
+        self.failed_attempts = 0
+        if self.pending:
+            log.info("  📝 Replaying %d journaled Excel export(s) from %s.", len(self.pending), EXPORT_JOURNAL_FILE_NAME)
+        self.worker = threading.Thread(target=self._run, name="excel-export", daemon=True)
+        self.worker.start()
+
+    def _load_journal(self):
+        jobs = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # A torn last line from a crash
+                    if 'done' in entry:
+                        jobs.pop(entry['done'], None)
+                    elif 'job_id' in entry:
+                        jobs[entry['job_id']] = entry['job']
+        return list(jobs.items())
+
+    def _append_journal(self, entry):
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, default=_json_default) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def submit(self, job):
+        """Journals the job durably (raises OSError if that fails) and queues it for the export thread."""
+        job_id = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+        with self.condition:
+            self._append_journal({'job_id': job_id, 'job': job})
+            self.pending.append((job_id, json.loads(json.dumps(job, default=_json_default)))) # Same values a replay would see
+            self.condition.notify_all()
+        return job_id
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.stopping)
+                if self.stopping:
+                    return
+                job_id, job = self.pending[0]
+            try:
+                export_job_to_workbooks(job)
+            except Exception as e:
+                self.failed_attempts += 1
+                delay = min(self.retry_initial_seconds * 2 ** (self.failed_attempts - 1), self.retry_max_seconds)
+                log.warning("  ⚠️ Excel export postponed: %s. Retrying in %gs (%d export(s) waiting in %s).", e, delay,
+                            len(self.pending), EXPORT_JOURNAL_FILE_NAME, extra=log_fields(stage="export"))
+                with self.condition:
+                    self.condition.wait_for(lambda: self.stopping, timeout=delay)
+                continue
+            self.failed_attempts = 0
+            mark_rows_exported(job)
+            with self.condition:
+                self.pending.popleft()
+                if self.pending:
+                    self._append_journal({'done': job_id})
+                else: # Everything is exported: start a fresh journal (a crash mid-truncate only replays finished jobs)
+                    open(self.journal_path, 'w').close()
+                self.condition.notify_all()
+
+    def pending_jobs(self):
+        with self.condition:
+            return list(self.pending)
+
+    def flush(self, timeout=None):
+        """Waits until every queued export is in the workbooks; returns False if timeout ran out first."""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending, timeout=timeout)
+
+    def stop(self, timeout=EXPORT_SHUTDOWN_WAIT_SECONDS):
+        """Gives pending exports up to timeout seconds, then stops the thread; what is left stays journaled."""
+        finished = self.flush(timeout)
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.worker.join(timeout=1)
+        if not finished:
+            log.warning("  📝 %d Excel export(s) still pending (workbook locked?); they stay in %s for the next run.",
+                        len(self.pending), EXPORT_JOURNAL_FILE_NAME)
+        return finished
+
+_excel_export_queue = None
+
+def get_excel_export_queue():
+    """The process-wide export queue, started (and replaying its journal) on first use."""
+    global _excel_export_queue
+    if _excel_export_queue is None:
+        _excel_export_queue = ExcelExportQueue(os.path.join(output_directory, EXPORT_JOURNAL_FILE_NAME))
+    return _excel_export_queue
+
+
+# --- Cold Archive Partitions ---
+# Workbook rows are partitioned by month. The last HOT_PARTITION_MONTHS months stay in the primary workbook; rows of
+# older months are appended to read-only gzip JSON-lines partitions (candidate_archive/YYYY-MM.jsonl.gz, then
+# YYYY-MM.2.jsonl.gz, ... for rows archived later) and their duplicate-check keys go into contact_index.
+def hot_partition_start(today=None):
+    """The first 'YYYY-MM' partition of the hot working set."""
+    today = today or datetime.now()
+    month_index = today.year * 12 + today.month - 1 - (HOT_PARTITION_MONTHS - 1)
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+def archive_partition_paths(partition, archive_folder=None):
+    """The archive files of one 'YYYY-MM' partition, oldest first."""
+    folder = archive_folder or os.path.join(output_directory, ARCHIVE_FOLDER_NAME)
+    paths = [os.path.join(folder, f"{partition}.jsonl.gz")]
+    while os.path.exists(paths[-1]):
+        paths.append(os.path.join(folder, f"{partition}.{len(paths) + 1}.jsonl.gz"))
+    return paths[:-1], paths[-1] # (existing files, name for the next one)
+
+def iter_archived_rows(partition, archive_folder=None):
+    """Yields the rows (dicts) archived for one 'YYYY-MM' partition."""
+    for path in archive_partition_paths(partition, archive_folder)[0]:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+def archive_cold_rows(conn, cold_df, archive_folder=None):
+    """
+    Writes cold workbook rows to their archive partitions and indexes their duplicate-check keys. Rows archived
+    earlier (still in a workbook that was locked when they were to be removed) are not written again.
+    Returns (row keys to remove from the workbook, number of rows newly archived).
+    """
+    folder = archive_folder or os.path.join(output_directory, ARCHIVE_FOLDER_NAME)
+    os.makedirs(folder, exist_ok=True)
+    row_keys = cold_df[EXCEL_ROW_KEY_COLUMN].tolist()
+    archived = set()
+    for start in range(0, len(row_keys), 500): # Stay under SQLite's bound-parameter limit
+        chunk = row_keys[start:start + 500]
+        archived.update(row[0] for row in conn.execute(
+            f"SELECT row_key FROM archived_rows WHERE row_key IN ({', '.join('?' * len(chunk))})", chunk))
+
+    by_partition = {}
+    for row in cold_df.to_dict('records'):
+        if row[EXCEL_ROW_KEY_COLUMN] not in archived:
+            partition = candidate_partition(row.get('Year'), row.get('Month'), row.get('Source Date'))
+            by_partition.setdefault(partition, []).append(row)
+
+    for partition, rows in sorted(by_partition.items()):
+        path = archive_partition_paths(partition, folder)[1]
+        with open(path, 'xb') as raw: # Partitions are never rewritten; later rows of a month get a new file
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for row in rows:
+                    f.write((json.dumps(row, default=_json_default) + "\n").encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO archived_rows (row_key, partition) VALUES (?, ?)",
+                             [(row[EXCEL_ROW_KEY_COLUMN], partition) for row in rows])
+            index_candidate_contacts(conn, [(row.get('Phone Number'), row.get('Email ID'), row.get('File Name'), row.get('Skill'), partition)
+                                            for row in rows])
+        log.info("  🗄️ Archived %d row(s) of %s to %s.", len(rows), partition, os.path.basename(path))
+    return row_keys, sum(len(rows) for rows in by_partition.values())
+
+
+# --- Columnar Export ---
+# Stored candidates as typed values: NULL instead of "N/A", skills as a list, dates as timestamps, phone numbers as text
+CANDIDATE_EXPORT_COLUMNS = ("id", "change_seq", "source_key", "source_date", "year", "month", "skill", "candidate_name",
+                            "total_experience", "email_id", "phone_number", "file_name", "status", "education", "notice_period",
+                            "current_company", "current_ctc", "expected_ctc", "current_location", "near_duplicate_of",
+                            "origin", "added_at", "updated_at")
+CANDIDATE_TEXT_FIELDS = ("source_key", "candidate_name", "total_experience", "email_id", "phone_number", "file_name", "status",
+                         "education", "notice_period", "current_company", "current_ctc", "expected_ctc", "current_location", "origin")
+
+def _store_timestamp(value):
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+def _store_text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if not value or value == "N/A" else value
+
+def candidate_export_record(row):
+    """One candidates row (CANDIDATE_EXPORT_COLUMNS order) as a dict of typed values."""
+    values = dict(zip(CANDIDATE_EXPORT_COLUMNS, row))
+    record = {'id': values['id'], 'change_seq': values['change_seq']}
+    record.update((field, _store_text(values[field])) for field in CANDIDATE_TEXT_FIELDS)
+    partition = candidate_partition(values['year'], values['month'], values['source_date'])
+    record['year'], record['month'] = map(int, partition.split('-')) if partition else (None, None)
+    record['source_date'] = _store_timestamp(values['source_date'])
+    record['skills'] = [skill.strip() for skill in str(values['skill'] or "").split(',') if skill.strip() and skill.strip() != "N/A"]
+    years = re.search(r'\d+(?:\.\d+)?', record['total_experience'] or "")
+    record['experience_years'] = float(years.group(0)) if years else None
+    record['near_duplicate_of'] = values['near_duplicate_of']
+    record['added_at'] = _store_timestamp(values['added_at'])
+    record['updated_at'] = _store_timestamp(values['updated_at'])
+    return record
+
+def parquet_candidate_schema():
+    # year and month are the partition directories, not columns of the files
+    return pa.schema([("id", pa.int64()), ("change_seq", pa.int64()), ("source_key", pa.string()),
+                      ("source_date", pa.timestamp('s')), ("skills", pa.list_(pa.string())), ("candidate_name", pa.string()),
+                      ("total_experience", pa.string()), ("experience_years", pa.float32()), ("email_id", pa.string()),
+                      ("phone_number", pa.string()), ("file_name", pa.string()), ("status", pa.string()),
+                      ("education", pa.string()), ("notice_period", pa.string()), ("current_company", pa.string()),
+                      ("current_ctc", pa.string()), ("expected_ctc", pa.string()), ("current_location", pa.string()),
+                      ("near_duplicate_of", pa.int64()), ("origin", pa.string()), ("added_at", pa.timestamp('s')),
+                      ("updated_at", pa.timestamp('s'))])
+
+def export_candidates_to_parquet(export_folder=None, full=False):
+    """
+    Rewrites the year=YYYY/month=M Parquet partitions (year=0/month=0 for undated candidates) holding candidates changed
+    since the last export, or all of them with full=True; a partition every row has moved out of is deleted.
+    Returns the number of partitions written.
+    """
+    if pa is None:
+        log.error("❌ Parquet export needs the 'pyarrow' library: pip install pyarrow")
+        return 0
+    export_folder = export_folder or os.path.join(output_directory, PARQUET_EXPORT_FOLDER_NAME)
+    state_path = os.path.join(export_folder, "_export_state.json")
+    watermark = 0
+    if not full and os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as f:
+            watermark = json.load(f).get('change_seq', 0)
+    schema = parquet_candidate_schema()
+    started = time.perf_counter()
+    with closing(open_candidate_store()) as store:
+        new_watermark = store.execute("SELECT COALESCE(MAX(change_seq), 0) FROM candidates").fetchone()[0]
+        partitions = {partition for (partition,) in store.execute(
+            "SELECT partition FROM candidates WHERE change_seq > ? UNION "
+            "SELECT NULLIF(partition, '') FROM candidate_partition_moves WHERE change_seq > ?", (watermark, watermark))}
+        if full: # Also clear out partitions written before that no longer hold anyone
+            for path in glob.glob(os.path.join(export_folder, "year=*", "month=*", "candidates.parquet")):
+                match = re.search(r'year=(\d+)[\\/]month=(\d+)', path)
+                partitions.add(f"{int(match.group(1)):04d}-{int(match.group(2)):02d}" if match.group(1) != "0" else None)
+        row_count = written = removed = 0
+        for partition in partitions:
+            records = [candidate_export_record(row) for row in store.execute(
+                f"SELECT {', '.join(CANDIDATE_EXPORT_COLUMNS)} FROM candidates WHERE partition IS ? ORDER BY id", (partition,))]
+            year, month = map(int, partition.split('-')) if partition else (0, 0)
+            partition_folder = os.path.join(export_folder, f"year={year}", f"month={month}")
+            file_path = os.path.join(partition_folder, "candidates.parquet")
+            if not records: # Every row moved out: the partition goes
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    removed += 1
+                for folder in (partition_folder, os.path.dirname(partition_folder)):
+                    try:
+                        os.rmdir(folder)
+                    except OSError:
+                        break # Not empty, or already gone
+                continue
+            row_count += len(records)
+            written += 1
+            table = pa.Table.from_pylist(records, schema=schema)
+            os.makedirs(partition_folder, exist_ok=True)
+            temp_path = file_path + ".tmp"
+            pq.write_table(table, temp_path, compression=PARQUET_COMPRESSION)
+            os.replace(temp_path, file_path) # Readers never see a half-written file
+    os.makedirs(export_folder, exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({'change_seq': new_watermark, 'exported_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}, f)
+    if written or removed:
+        log.info("📦 Parquet: %d partition(s), %d row(s) rewritten and %d emptied partition(s) removed in %s (%.2fs).", written,
+                 row_count, removed, export_folder, time.perf_counter() - started,
+                 extra=log_fields(stage="parquet", partitions=written, rows=row_count, removed=removed))
+    return written
+
+def export_candidate_changes(since=0, output_path=None):
     """
-    print(f"\n📄 Starting resume parsing from: {folder_path}")
-    print(f"   Primary output will be saved to: {excel_file_path}")
-    print(f"   Secondary output will be saved to: {os.path.join(output_directory, CADATE_EXCEL_FILE_NAME)}")
+    Streams the candidates inserted or updated after the `since` watermark (a change_seq) to a JSON-lines file, in
+    change order. Returns (rows written, watermark to pass next time).
+    """
+    output_path = output_path or os.path.join(output_directory, CHANGES_FEED_FILE_NAME)
+    watermark = since
+    written = 0
+    with closing(open_candidate_store()) as store, open(output_path, 'w', encoding='utf-8') as feed:
+        cursor = store.execute(f"SELECT {', '.join(CANDIDATE_EXPORT_COLUMNS)} FROM candidates WHERE change_seq > ? "
+                               "ORDER BY change_seq", (since,))
+        for row in cursor:
+            record = candidate_export_record(row)
+            feed.write(json.dumps(record, default=lambda value: value.isoformat(), ensure_ascii=False) + "\n")
+            watermark = record['change_seq']
+            written += 1
+    log.info("📤 %d candidate change(s) since watermark %d written to %s. Next watermark: %d", written, since, output_path, watermark,
+             extra=log_fields(stage="changes", rows=written, since=since, watermark=watermark))
+    return written, watermark
+
+def refresh_parquet_export():
+    """Brings the Parquet partitions up to date after a cycle or backfill, when enabled and pyarrow is installed."""
+    if not PARQUET_EXPORT_AFTER_CYCLE or pa is None:
+        return
+    try:
+        export_candidates_to_parquet()
+    except (OSError, sqlite3.Error, pa.ArrowException) as e:
+        log.error("❌ ERROR: Parquet export failed: %s", e)
+
+
+# --- Ingestion Latency ---
+INGEST_LATENCY_STAGES = ("schedule", "download", "queue", "convert", "parse", "commit", "export") # ingest_latency_seconds columns
+
+def epoch_seconds(value):
+    """Unix time of a datetime (naive ones are local time, as Outlook and the mail backends give them), else None."""
+    if isinstance(value, datetime):
+        try:
+            return value.timestamp()
+        except (OverflowError, OSError, ValueError):
+            return None
+    return None
+
+def latency_percentiles(values, percentiles=(50, 95, 99)):
+    """Nearest-rank percentiles of the non-NULL values, {percentile: seconds or None}: the smallest value with q% of them at or below it."""
+    values = sorted(value for value in values if value is not None)
+    return {q: values[max(0, math.ceil(q / 100 * len(values)) - 1)] if values else None for q in percentiles}
+
+def _format_latency(seconds):
+    if seconds is None:
+        return "–"
+    return f"{seconds:.1f}s" if abs(seconds) < 60 else _format_duration(seconds)
+
+def record_ingest_latency(conn, row_keys, candidate_ids, latency_rows, committed_at):
+    """Stores the stage timestamps of rows committed together at committed_at."""
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO ingest_latency (row_key, candidate_id, file_name, received_at, cycle_started_at, downloaded_at, "
+            "parse_started_at, converted_at, parsed_at, committed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(row_key, candidate_id, stamps['file_name'], stamps['received_at'], stamps['cycle_started_at'], stamps['downloaded_at'],
+              stamps['parse_started_at'], stamps['converted_at'], stamps['parsed_at'], committed_at)
+             for row_key, candidate_id, stamps in zip(row_keys, candidate_ids, latency_rows)])
+
+def mark_rows_exported(job, exported_at=None):
+    """Records when the rows of a finished export job reached the workbooks."""
+    row_keys = [row_key for row_key, _ in job.get('primary_rows', ())]
+    if not row_keys:
+        return
+    exported_at = exported_at or time.time()
+    try:
+        with closing(open_candidate_store()) as store, store:
+            store.executemany("UPDATE ingest_latency SET exported_at = ? WHERE row_key = ? AND exported_at IS NULL",
+                              [(exported_at, row_key) for row_key in row_keys])
+    except sqlite3.Error as e:
+        log.debug("  ⚠️ Could not record the export time of %d row(s): %s", len(row_keys), e)
+
+def ingest_latency_summary(conn, where, params=()):
+    """
+    p50/p95/p99 of the email-to-row latency (and email-to-workbook) plus the p50 of every stage, over the rows of
+    the ingest_latency_seconds view matching the where clause. Returns None when no row matches.
+    """
+    columns = [f"{stage}_seconds" for stage in INGEST_LATENCY_STAGES] + ["total_seconds", "in_sheet_seconds"]
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM ingest_latency_seconds WHERE {where}", params).fetchall()
+    if not rows:
+        return None
+    by_column = dict(zip(columns, zip(*rows)))
+    total = latency_percentiles(by_column["total_seconds"])
+    slo_value = latency_percentiles(by_column["total_seconds"], (INGEST_SLO_PERCENTILE,))[INGEST_SLO_PERCENTILE]
+    return {
+        'rows': len(rows),
+        'total': total,
+        'in_sheet': latency_percentiles(by_column["in_sheet_seconds"]),
+        'stages_p50': {stage: latency_percentiles(by_column[f"{stage}_seconds"], (50,))[50] for stage in INGEST_LATENCY_STAGES},
+        'slo_value': slo_value,
+        'slo_breached': slo_value is not None and slo_value > INGEST_SLO_SECONDS,
+    }
+
+def log_ingest_latency_summary(label, summary):
+    """Logs one latency summary (see ingest_latency_summary), as a warning when it breaches the SLO."""
+    if summary is None:
+        return
+    total = summary['total']
+    fields = log_fields(stage="latency", scope=label, rows=summary['rows'], slo_breached=summary['slo_breached'],
+                        **{f"p{q}_seconds": value for q, value in total.items()},
+                        **{f"{stage}_p50_seconds": value for stage, value in summary['stages_p50'].items()})
+    log.info("  ⏱️ %s: email to row p50 %s | p95 %s | p99 %s over %d row(s); in the sheet p95 %s.", label,
+             _format_latency(total[50]), _format_latency(total[95]), _format_latency(total[99]), summary['rows'],
+             _format_latency(summary['in_sheet'][95]), extra=fields)
+    log.info("     Where the time went (p50): %s.",
+             ", ".join(f"{stage} {_format_latency(value)}" for stage, value in summary['stages_p50'].items()))
+    if summary['slo_breached']:
+        log.warning("  🚨 Ingestion SLO breached (%s): p%d is %s, above the %s promised.", label, INGEST_SLO_PERCENTILE,
+                    _format_latency(summary['slo_value']), _format_latency(INGEST_SLO_SECONDS), extra=fields)
+
+def run_latency_report(days=7):
+    """Logs the per-day ingestion latency of the last few days from the candidate database."""
+    with closing(open_candidate_store()) as store:
+        day_rows = store.execute("SELECT DISTINCT day FROM ingest_latency_seconds WHERE day >= date('now', 'localtime', ?) "
+                                 "ORDER BY day", (f"-{max(days, 1) - 1} days",)).fetchall()
+        if not day_rows:
+            log.info("ℹ️ No ingestion latency recorded in the last %d day(s).", days)
+            return
+        log.info("📊 Ingestion latency per day (SLO: p%d within %s):", INGEST_SLO_PERCENTILE, _format_latency(INGEST_SLO_SECONDS))
+        for (day,) in day_rows:
+            log_ingest_latency_summary(day, ingest_latency_summary(store, "day = ?", (day,)))
 
-    resume_data_to_add = [] # List to store dictionaries of resumes that will be added to the DataFrame
 
-    existing_df = pd.DataFrame()
+# --- Main Processing Logic ---
+def duplicate_check_keys(phone, email, file_name, skills):
+    """Returns the cleaned contact keys and the (file name, skill IDs) key of one (phone, email, file name, skill string) row."""
+    contact_keys = []
+    # For Phone/Email matching
+    phone_clean = re.sub(r'\D', '', str(phone).strip())
+    email_clean = str(email).strip().lower()
+    if phone_clean:
+        contact_keys.append(phone_clean)
+    if email_clean and email_clean not in ('n/a', 'nan', 'none'):
+        contact_keys.append(email_clean)
+
+    # For Filename/Skills matching (to exclude)
+    filename_clean = str(file_name).strip().lower()
+    return contact_keys, (filename_clean, skill_ids_from_string(skills)) if filename_clean else None
+
+def add_duplicate_check_keys(rows, existing_phone_emails, existing_filename_skills):
+    """Adds (phone, email, file name, skill string) rows to the two duplicate-check sets."""
+    for phone, email, file_name, skills in rows:
+        contact_keys, filename_skills_key = duplicate_check_keys(phone, email, file_name, skills)
+        existing_phone_emails.update(contact_keys)
+        if filename_skills_key:
+            existing_filename_skills.add(filename_skills_key)
+
+def load_existing_database(excel_file_path):
+    """
+    Streams the key columns of the primary Excel sheet (under the column names of older runs too) and builds the
+    duplicate-check sets from its hot rows; the sheet itself is never loaded. Returns (hot row count,
+    existing_phone_emails, existing_filename_skills, cold_df), where cold_df holds the full rows of months past the
+    hot window that are still in the sheet (see archive_cold_rows).
+    """
+    existing_count = 0
+    cold_df = pd.DataFrame()
     existing_phone_emails = set() # For checking email/phone duplicates
     existing_filename_skills = set() # For checking filename/skills duplicates for *exclusion*
 
     if os.path.exists(excel_file_path):
         try:
-            existing_df = pd.read_excel(excel_file_path)
-            print(f"  Loaded {len(existing_df)} existing records from primary Excel.")
-
-            # Ensure all relevant columns for merge key exist, fill with empty string if not
-            for col in ['Candidate Name', 'Phone Number', 'Email ID', 'Skill', 'Total Experience', 'File Name', 'Source Date', 'Status']: 
-                # Handle existing 'Name' column if it was present from prior runs, rename to 'Candidate Name'
-                if col == 'Candidate Name' and 'Name' in existing_df.columns and 'Candidate Name' not in existing_df.columns:
-                    existing_df['Candidate Name'] = existing_df['Name']
-                    existing_df.drop(columns=['Name'], inplace=True)
-                # Handle existing 'Skills' column if it was present from prior runs, rename to 'Skill'
-                elif col == 'Skill' and 'Skills' in existing_df.columns and 'Skill' not in existing_df.columns:
-                    existing_df['Skill'] = existing_df['Skills']
-                    existing_df.drop(columns=['Skills'], inplace=True)
-                # Handle existing 'Received On' column if it was present, rename to 'Source Date'
-                elif col == 'Source Date' and 'Received On' in existing_df.columns and 'Source Date' not in existing_df.columns:
-                    existing_df['Source Date'] = existing_df['Received On']
-                    existing_df.drop(columns=['Received On'], inplace=True)
-                # Handle existing 'Experience' column if it was present, rename to 'Total Experience'
-                elif col == 'Total Experience' and 'Experience' in existing_df.columns and 'Total Experience' not in existing_df.columns:
-                    existing_df['Total Experience'] = existing_df['Experience']
-                    existing_df.drop(columns=['Experience'], inplace=True)
-                else:
-                    # For other columns, ensure they exist with default empty string if missing
-                    if col not in existing_df.columns:
-                        existing_df[col] = ''
-            
-            # If 'Date' column exists from previous runs, remove it
-            if 'Date' in existing_df.columns:
-                existing_df.drop(columns=['Date'], inplace=True)
-
-            # Populate sets for duplicate checks
-            for index, row in existing_df.iterrows():
-                # For Phone/Email matching
-                phone_clean = re.sub(r'\D', '', str(row.get('Phone Number', '')).strip())
-                email_clean = str(row.get('Email ID', '')).strip().lower()
-                
-                if phone_clean and phone_clean != 'n/a':
-                    existing_phone_emails.add(phone_clean)
-                if email_clean and email_clean != 'n/a':
-                    existing_phone_emails.add(email_clean)
-
-                # For Filename/Skills matching (to exclude)
-                filename_clean = str(row.get('File Name', '')).strip().lower()
-                skills_clean = frozenset(s.strip().lower() for s in str(row.get('Skill', '')).split(',') if s.strip()) 
-                
-                if filename_clean and skills_clean:
-                    existing_filename_skills.add((filename_clean, skills_clean))
+            start = hot_partition_start()
+            cold_row_numbers = set()
+            for row_number, values in iter_workbook_rows(excel_file_path, ('Phone Number', 'Email ID', 'File Name', 'Skill', 'Year', 'Month', 'Source Date')):
+                partition = candidate_partition(values.get('Year'), values.get('Month'), values.get('Source Date'))
+                if partition is not None and partition < start:
+                    cold_row_numbers.add(row_number)
+                    continue
+                existing_count += 1
+                add_duplicate_check_keys([(values.get('Phone Number', ''), values.get('Email ID', ''), values.get('File Name', ''), values.get('Skill', ''))],
+                                         existing_phone_emails, existing_filename_skills)
+            log.info("  Scanned %d existing records from primary Excel.", existing_count + len(cold_row_numbers))
+
+            # Only rows leaving for the archive are read in full
+            if cold_row_numbers:
+                cold_df = pd.DataFrame([values for _, values in iter_workbook_rows(excel_file_path, row_numbers=cold_row_numbers)])
+                for col in ['Candidate Name', 'Phone Number', 'Email ID', 'Skill', 'Total Experience', 'File Name', 'Source Date', 'Status']:
+                    if col not in cold_df.columns:
+                        cold_df[col] = ''
+                # If 'Date' column exists from previous runs, remove it
+                cold_df.drop(columns=['Date'], errors='ignore', inplace=True)
+                assign_row_keys(cold_df)
 
         except Exception as e:
-            print(f"  ❌ ERROR: Could not load existing Excel file '{excel_file_path}': {e}")
-            print("     Starting with an empty sheet.")
-            existing_df = pd.DataFrame()
+            log.error("  ❌ ERROR: Could not load existing Excel file '%s': %s. Starting with an empty sheet.", excel_file_path, e)
+            existing_count = 0
+            cold_df = pd.DataFrame()
             existing_phone_emails = set()
             existing_filename_skills = set()
 
-    # Create a map from original_file_name to its associated email data
-    email_data_map = {os.path.basename(item['file_path']): item for item in downloaded_files_info}
+    return existing_count, existing_phone_emails, existing_filename_skills, cold_df
+
+def document_log_fields(document, file_bytes, started, stage, **fields):
+    """
+    Context fields for a log line about one document: file name, sender, stage and time spent on it so far,
+    plus a short content hash when DEBUG logging is on (the hash ties the line to the file across renames).
+    """
+    fields.update(file_name=document['file_name'], sender=document.get('email_sender_display_name'), stage=stage,
+                  duration_ms=round((time.perf_counter() - started) * 1000, 1))
+    if file_bytes is not None and log.isEnabledFor(logging.DEBUG):
+        fields['file_hash'] = hashlib.sha1(file_bytes).hexdigest()[:12]
+    return {'fields': fields}
+
+def process_resume_documents(documents, excel_file_path, triage=TRIAGE_ENABLED, origin=MAIL_SOURCE):
+    """
+    Parses a list of resume documents and updates the Excel sheet. Each document is a dict with
+    'file_name' plus either 'file_bytes' (in-memory attachment) or 'file_path', and the optional
+    email context ('received_time', 'email_subject', 'email_body', 'email_sender_display_name').
+    origin names where the documents came from (a MAIL_SOURCE, or 'watch-folder') and is stored with each candidate.
+    With triage on, documents are scored on cheap signals first and only likely resumes are fully parsed.
+    Implements the new duplicate logic:
+    1. If Email OR Phone matches existing, mark as 'Duplicate'.
+    2. If Filename AND Skills match existing, DO NOT add.
+    """
+    log.info("📄 Starting resume parsing of %d document(s)", len(documents))
+    log.debug("   Primary output will be saved to: %s", excel_file_path)
+    log.debug("   Secondary output will be saved to: %s", os.path.join(output_directory, CADATE_EXCEL_FILE_NAME))
+
+    resume_data_to_add = CandidateBatch() # Column-oriented records of resumes that will be added to the sheet
+
+    existing_count, existing_phone_emails, existing_filename_skills, cold_df = load_existing_database(excel_file_path)
 
     processed_count = 0
-    file_list = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-    if not file_list:
-        print("  ℹ️ No files found in the download folder to process.")
+    if not documents:
+        log.info("  ℹ️ No resumes to process.")
         return
 
-    print(f"  Processing {len(file_list)} files...")
-    for filename in file_list:
-        file_path = os.path.join(folder_path, filename)
+    # Stored candidates ('backfill' imports included) and archived months are checked through the contact index,
+    # near-duplicates through the LSH index; both are indexed lookups in the candidate database
+    candidate_store = None
+    try:
+        candidate_store = open_candidate_store()
+    except sqlite3.Error as e:
+        log.warning("  ⚠️ WARNING: Could not open the candidate database: %s. Checking duplicates against the Excel rows only.", e)
+    existing_phone_emails = IndexedKeySet(existing_phone_emails, candidate_store, 'contact')
+    existing_filename_skills = IndexedKeySet(existing_filename_skills, candidate_store, 'file_skill')
+
+    # Rows of months that have left the hot window move to their archive partitions and out of the primary workbook
+    if len(cold_df):
+        try:
+            if candidate_store is None:
+                raise sqlite3.OperationalError("candidate database unavailable")
+            drop_keys, archived_count = archive_cold_rows(candidate_store, cold_df)
+            export_queue = get_excel_export_queue()
+            if archived_count or not any(job.get('drop_keys') for _, job in export_queue.pending_jobs()):
+                export_queue.submit({'excel_file_path': excel_file_path, 'primary_columns': PRIMARY_EXCEL_COLUMNS, 'primary_rows': [],
+                                     'cadate_excel_file_path': None, 'updated_rows': {}, 'drop_keys': drop_keys})
+            log.info("  🗄️ %d row(s) from before %s leave %s; %d hot row(s) remain.", len(cold_df), hot_partition_start(),
+                     excel_file_name, existing_count)
+        except (OSError, sqlite3.Error) as e:
+            log.warning("  ⚠️ WARNING: Could not archive %d row(s) of older months: %s. Keeping them in the working set.", len(cold_df), e)
+            add_duplicate_check_keys(zip(cold_df['Phone Number'], cold_df['Email ID'], cold_df['File Name'], cold_df['Skill']),
+                                     existing_phone_emails, existing_filename_skills)
+            existing_count += len(cold_df)
+    run_signatures = [] # (file name, signature) of this run's resumes, which are not in the LSH index yet
+
+    triage_counts = {'accept': 0, 'defer': 0, 'reject': 0}
+    name_counts_at_start = dict(NAME_RECOGNIZER_COUNTS)
+    parser_stats_at_start = {backend: dict(stats) for backend, stats in PARSER_BACKEND_STATS.items()}
+    status_counts = {'New': 0, 'Duplicate': 0, 'Near Duplicate': 0, 'Skipped': 0}
+    latency_rows = [] # Stage timestamps of the records in resume_data_to_add, in the same order
+
+    # Cheap pass first: triage every attachment and queue the keepers by priority, so a backlog is parsed
+    # hot requisitions first and the quick text resumes are not stuck behind .doc conversions and scans
+    scheduler = ResumeWorkScheduler()
+    for document in documents:
+        started = time.perf_counter()
+        filename = document['file_name']
+        file_path = document.get('file_path')
+        file_bytes = document.get('file_bytes')
+        file_extension = os.path.splitext(filename)[1].lower()
+        first_page_text = None
+
+        if file_extension in FILE_MAGIC_BYTES and file_bytes is None:
+            with open(file_path, 'rb') as f:
+                file_bytes = f.read()
+        if triage and file_extension in FILE_MAGIC_BYTES:
+            verdict, score, reasons, first_page_text = triage_resume_document(filename, file_extension, file_bytes)
+            triage_counts[verdict] += 1
+            if verdict == 'reject':
+                log.debug("  🚫 Triage rejected '%s' (score %s: %s).", filename, score, '; '.join(reasons) or 'no resume signals',
+                          extra=document_log_fields(document, file_bytes, started, "triage", status="Rejected"))
+                continue
+            if verdict == 'defer':
+                defer_resume_document(document, file_bytes, score, reasons, origin)
+                log.debug("  ⏸️ Triage deferred '%s' (score %s: %s).", filename, score, '; '.join(reasons) or 'weak resume signals',
+                          extra=document_log_fields(document, file_bytes, started, "triage", status="Deferred"))
+                continue
+        elif file_extension in FILE_MAGIC_BYTES:
+            first_page_text = _first_page_text(file_extension, file_bytes)[0]
+
+        priority, priority_reasons = resume_priority(document, first_page_text)
+        lane = resume_work_lane(file_extension, len(file_bytes) if file_bytes is not None else None, first_page_text)
+        scheduler.push(lane, priority, epoch_seconds(document.get('received_time')), document)
+        log.debug("  🚦 '%s' queued in the %s lane with priority %d%s.", filename, lane, priority,
+                  f" ({', '.join(priority_reasons)})" if priority_reasons else "",
+                  extra=document_log_fields(document, file_bytes, started, "schedule", lane=lane, priority=priority))
+
+    for lane, document in scheduler:
+        started = time.perf_counter()
+        parse_started_at = time.time()
+        converted_at = None
+        filename = document['file_name']
+        file_path = document.get('file_path')
+        file_bytes = document.get('file_bytes') # Files on disk are read again rather than held for the whole queue
         file_extension = os.path.splitext(filename)[1].lower()
-        
-        original_file_name_for_excel = os.path.basename(file_path) 
-        original_file_path_for_cleanup = file_path 
-
-        # Retrieve email subject and body for this file
-        file_email_data = email_data_map.get(original_file_name_for_excel, {})
-        email_subject = file_email_data.get('email_subject', "N/A")
-        email_body = file_email_data.get('email_body', "N/A")
-        message_received_time = file_email_data.get('received_time') # Get original received time
-        sender_display_name = file_email_data.get('email_sender_display_name', "N/A") # Get sender display name
 
-        # New logic to handle .doc files
+        # .doc files go through Word in a managed temp directory and come back as in-memory .docx
         if file_extension == '.doc':
             if win32com:
-                converted_docx_path = convert_doc_to_docx(file_path)
-                if converted_docx_path:
-                    file_path = converted_docx_path 
-                    file_extension = '.docx' 
-                else:
-                    print(f"  ❌ Failed to convert .doc file '{filename}'. Skipping.")
+                if file_bytes is None:
+                    with open(file_path, 'rb') as f:
+                        file_bytes = f.read()
+                file_bytes = convert_doc_bytes_to_docx_bytes(filename, file_bytes)
+                if file_bytes is None:
+                    log.error("  ❌ Failed to convert .doc file '%s'. Skipping.", filename,
+                              extra=document_log_fields(document, None, started, "convert"))
                     continue
+                file_path, file_extension = None, '.docx'
+                converted_at = time.time()
             else:
-                print(f"  ⏩ Skipping .doc file '{filename}' as pywin32 (and thus MS Word conversion) is not available.")
+                log.warning("  ⏩ Skipping .doc file '%s' as pywin32 (and thus MS Word conversion) is not available.", filename,
+                            extra=document_log_fields(document, file_bytes, started, "convert"))
                 continue
 
         # Now check if the (possibly converted) file's extension is supported
         if file_extension not in [".pdf", ".docx"]:
-            print(f"  ⏩ Skipping unsupported file type: {filename}")
-            if file_path != original_file_path_for_cleanup and os.path.exists(file_path):
-                try: os.remove(file_path)
-                except Exception as clean_err: print(f"    ❌ Error cleaning up temp file {os.path.basename(file_path)}: {clean_err}")
+            log.debug("  ⏩ Skipping unsupported file type: %s", filename, extra=document_log_fields(document, file_bytes, started, "triage"))
             continue
 
-        print(f"\n  --- Processing: {filename} ---")
-
-        extracted_text = ""
-        pyresparser_data = {}
-        basic_parser_data = {}
-        final_parsed_data = {}
-
-        name_from_original_filename = extract_name_from_filename(original_file_name_for_excel)
-
-        try:
-            parser = ResumeParser(file_path)
-            pyresparser_data = parser.get_extracted_data()
-
-            if pyresparser_data and pyresparser_data.get('mobile_number'):
-                 pyresparser_data["mobile_number"] = re.sub(r'\D', '', str(pyresparser_data["mobile_number"])).strip()
-            
-            if pyresparser_data and pyresparser_data.get('email'):
-                pyresparser_data['email'] = str(pyresparser_data['email']).lower().strip()
+        log.debug("  --- Processing: %s ---", filename, extra=document_log_fields(document, file_bytes, started, "parse"))
 
-        except Exception as e:
-            print(f"  ⚠️ WARNING: Pyresparser failed for {filename}: {e}. Falling back to basic parsing.")
-            pyresparser_data = {}
-        
-        if file_extension == '.pdf':
-            extracted_text = extract_text_from_pdf(file_path)
-        elif file_extension == '.docx':
-            extracted_text = extract_text_from_docx(file_path)
-
-        if not extracted_text:
-            print(f"  ❌ No text extracted from {filename}. Skipping detailed parsing.")
-            if file_path != original_file_path_for_cleanup and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    print(f"    🧹 Cleaned up temporary converted file: {os.path.basename(file_path)}")
-                except Exception as clean_err:
-                    print(f"    ❌ Error cleaning up temporary file {os.path.basename(file_path)}: {clean_err}")
+        record = parse_resume_document(filename, file_extension, document, file_path=file_path, file_bytes=file_bytes)
+        if record is None:
             continue
+        parsed_at = time.time()
 
-        basic_parser_data = parse_resume_data_basic(extracted_text)
-
-        # --- Populate final_parsed_data with best available info ---
-        final_parsed_data = {
-            "Candidate Name": "N/A", 
-            "Skill": "N/A", # Renamed from 'Skills' in basic_parser_data
-            "Total Experience": "N/A", # Renamed from 'Experience'
-            "Email ID": "N/A", 
-            "Phone Number": "N/A", 
-            "Source Date": "N/A", 
-            "Month": "N/A", 
-            "Year": "N/A", 
-            "File Name": original_file_name_for_excel
-        }
-
-        if message_received_time:
-            if not isinstance(message_received_time, datetime):
-                try: message_received_time = datetime(message_received_time.year, message_received_time.month, message_received_time.day, message_received_time.hour, message_received_time.minute, message_received_time.second)
-                except: message_received_time = None
-            if message_received_time:
-                final_parsed_data["Source Date"] = message_received_time.strftime('%Y-%m-%d %H:%M:%S')
-                final_parsed_data["Month"] = message_received_time.strftime('%B')
-                final_parsed_data["Year"] = message_received_time.year
-
-        # --- Name Extraction Logic (Revised with Confidence Scoring and Fuzzy Matching) ---
-        name_candidates_with_scores = [] # List of (name, score, source) tuples
-
-        # 1. From resume parsers (highest confidence)
-        pyres_name = pyresparser_data.get('name')
-        if pyres_name: 
-            name_candidates_with_scores.append((pyres_name, get_name_confidence(pyres_name, "pyresparser"), "pyresparser"))
-
-        basic_name = basic_parser_data.get('Name') 
-        if basic_name:
-            name_candidates_with_scores.append((basic_name, get_name_confidence(basic_name, "basic_parser_resume_text"), "basic_parser_resume_text"))
-
-        # 2. From email sender display name (HIGH CONFIDENCE SOURCE)
-        if sender_display_name and sender_display_name != "N/A":
-            name_candidates_with_scores.append((sender_display_name, get_name_confidence(sender_display_name, "email_sender_display_name"), "email_sender_display_name"))
-
-        # 3. From filename
-        if name_from_original_filename:
-            name_candidates_with_scores.append((name_from_original_filename, get_name_confidence(name_from_original_filename, "filename"), "filename"))
-
-        # 4. From email subject
-        name_from_subject = extract_name_from_email_subject(email_subject)
-        if name_from_subject:
-            name_candidates_with_scores.append((name_from_subject, get_name_confidence(name_from_subject, "email_subject_context"), "email_subject_context"))
-
-        # 5. From email body
-        name_from_body = extract_name_from_email_body(email_body)
-        if name_from_body:
-            name_candidates_with_scores.append((name_from_body, get_name_confidence(name_from_body, "email_body_context"), "email_body_context"))
-
-        # 6. From email ID (lowest confidence)
-        email_id_candidate = pyresparser_data.get('email') or basic_parser_data.get('Email ID')
-        if email_id_candidate and email_id_candidate != "N/A":
-            final_parsed_data["Email ID"] = str(email_id_candidate).lower().strip()
-            name_from_email_id = extract_name_from_email(final_parsed_data["Email ID"])
-            if name_from_email_id:
-                name_candidates_with_scores.append((name_from_email_id, get_name_confidence(name_from_email_id, "email_id"), "email_id"))
-        
-        # Filter out non-plausible names (score 0 indicates not plausible)
-        valid_candidates = [(name, score, source) for name, score, source in name_candidates_with_scores if score > 0]
-        
-        best_name = "N/A"
-        if valid_candidates:
-            # Sort candidates by confidence score (descending), then by length (descending)
-            valid_candidates.sort(key=lambda x: (x[1], len(x[0])), reverse=True)
-            
-            # Select the best name, avoiding fuzzy duplicates
-            selected_best_names_by_group = []
-            
-            # Keep track of names already "covered" by a selected candidate
-            covered_names = set() 
-
-            for current_name, current_score, current_source in valid_candidates:
-                # If this name is already very similar to one we've already considered and chosen (higher confidence), skip
-                is_already_covered = False
-                for existing_covered_name in covered_names:
-                    if fuzz.token_sort_ratio(current_name, existing_covered_name) > 85: # High similarity threshold
-                        is_already_covered = True
-                        break
-                
-                if not is_already_covered:
-                    selected_best_names_by_group.append(current_name)
-                    # For simplicity, just add the current name as representative of its group
-                    covered_names.add(current_name) 
-
-            # After this loop, selected_best_names_by_group will contain the top candidate
-            # from each fuzzy-similar group, ordered by confidence.
-            if selected_best_names_by_group:
-                # The first one is the overall highest confidence, longest, non-fuzzy-duplicate
-                best_name = selected_best_names_by_group[0] 
-
-        final_parsed_data["Candidate Name"] = best_name
-        # --- End Name Extraction Logic ---
-
-
-        pyres_phone_clean = pyresparser_data.get('mobile_number', '')
-        basic_phone_clean = basic_parser_data.get('Phone Number', '')
-
-        if pyres_phone_clean and len(pyres_phone_clean) >= 7:
-            final_parsed_data["Phone Number"] = pyres_phone_clean
-        elif basic_phone_clean and len(basic_phone_clean) >= 7:
-            final_parsed_data["Phone Number"] = basic_phone_clean
-        
-        if final_parsed_data["Phone Number"] != 'N/A' and final_parsed_data["Phone Number"] is not None:
-            final_parsed_data["Phone Number"] = re.sub(r'\D', '', str(final_parsed_data["Phone Number"]))
-            if not final_parsed_data["Phone Number"]:
-                final_parsed_data["Phone Number"] = "N/A"
-
-        pyres_exp = pyresparser_data.get('total_experience')
-        basic_exp = basic_parser_data.get('Experience') # Note: basic_parser_data still uses 'Experience'
-
-        if isinstance(pyres_exp, (int, float)) and pyres_exp > 0:
-            final_parsed_data["Total Experience"] = f"{int(pyres_exp)} years"
-        elif basic_exp != "N/A":
-            final_parsed_data["Total Experience"] = basic_exp
-        else:
-            final_parsed_data["Total Experience"] = "N/A"
-
-        combined_skills_set = set()
-        pyresparser_skills_list = [s.strip() for s in pyresparser_data.get('skills', []) if s.strip()]
-        if pyresparser_skills_list:
-            combined_skills_set.update(pyresparser_skills_list)
-        
-        basic_skills_list = []
-        if isinstance(basic_parser_data.get('Skills'), str) and basic_parser_data.get('Skills') != "N/A":
-            basic_skills_list = [s.strip() for s in basic_parser_data['Skills'].split(',') if s.strip()]
-        if basic_skills_list:
-            combined_skills_set.update(basic_skills_list)
-
-        final_parsed_data["Skill"] = ", ".join(sorted(list(set(combined_skills_set)))) if combined_skills_set else "N/A"
-        
         # --- Apply new duplicate logic ---
         # Rule 2: If Filename AND Skills match existing, DO NOT ADD
-        current_filename_clean = final_parsed_data.get('File Name', '').strip().lower()
-        current_skills_frozenset = frozenset(s.strip().lower() for s in final_parsed_data.get('Skill', '').split(',') if s.strip())
-
-        if (current_filename_clean, current_skills_frozenset) in existing_filename_skills and current_filename_clean and current_skills_frozenset:
-            print(f"  🛑 Skipping: '{filename}' - Duplicate Filename AND Skill found in existing data. Not adding.")
-            if file_path != original_file_path_for_cleanup and os.path.exists(file_path):
-                try: os.remove(file_path)
-                except Exception as clean_err: print(f"    ❌ Error cleaning up temp file {os.path.basename(file_path)}: {clean_err}")
+        filename_skills_key = record.filename_skills_key()
+        if filename_skills_key[0] and filename_skills_key in existing_filename_skills:
+            status_counts['Skipped'] += 1
+            log.debug("  🛑 Skipping: '%s' - Duplicate Filename AND Skill found in existing data. Not adding.", filename,
+                      extra=document_log_fields(document, file_bytes, started, "dedup", status="Skipped"))
             continue 
 
         # Rule 1: If Email OR Phone matches existing, mark as 'Duplicate'
-        current_phone_clean = re.sub(r'\D', '', str(final_parsed_data.get('Phone Number', ''))).strip()
-        current_email_clean = str(final_parsed_data.get('Email ID', '')).strip().lower()
-        
-        is_contact_duplicate = False
-        if current_phone_clean and current_phone_clean != 'n/a' and current_phone_clean in existing_phone_emails:
-            is_contact_duplicate = True
-        if current_email_clean and current_email_clean != 'n/a' and current_email_clean in existing_phone_emails:
-            is_contact_duplicate = True
+        is_contact_duplicate = any(key in existing_phone_emails for key in record.contact_keys())
+
+        # Rule 3: near-identical text to an earlier resume (e.g. the same CV re-sent under a new file name)
+        near_duplicate = None
+        if candidate_store is not None:
+            try:
+                near_duplicate = find_near_duplicate(candidate_store, record.text_signature)
+            except sqlite3.Error as e:
+                log.warning("  ⚠️ WARNING: Near-duplicate lookup failed for '%s': %s", filename, e,
+                            extra=document_log_fields(document, file_bytes, started, "dedup"))
+        if near_duplicate:
+            record.near_duplicate_of = near_duplicate['candidate_id']
+            log.debug("  🪞 '%s' is %.0f%% similar to candidate #%s '%s' (%s, %s).", filename, near_duplicate['similarity'] * 100,
+                      near_duplicate['candidate_id'], near_duplicate['candidate_name'], near_duplicate['file_name'],
+                      near_duplicate['source_date'], extra=document_log_fields(document, file_bytes, started, "dedup"))
+        elif record.text_signature is not None:
+            for earlier_file_name, earlier_signature in run_signatures:
+                similarity = signature_similarity(record.text_signature, earlier_signature)
+                if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                    near_duplicate = {'file_name': earlier_file_name}
+                    log.debug("  🪞 '%s' is %.0f%% similar to '%s' from this run.", filename, similarity * 100, earlier_file_name,
+                              extra=document_log_fields(document, file_bytes, started, "dedup"))
+                    break
+        if record.text_signature is not None:
+            run_signatures.append((filename, record.text_signature))
 
         if is_contact_duplicate:
-            final_parsed_data['Status'] = 'Duplicate'
-            print(f"  ⏩ Marked as Duplicate: '{filename}' (Email or Phone matches existing record).")
+            record.status = 'Duplicate'
+            reason = " (Email or Phone matches existing record)"
+        elif near_duplicate:
+            record.status = 'Near Duplicate'
+            reason = ""
         else:
-            final_parsed_data['Status'] = 'New'
-            print(f"  ⭐ Marked as New: '{filename}'.")
+            record.status = 'New'
+            reason = ""
+        status_counts[record.status] += 1
+        log.debug("  %s Marked as %s: '%s'%s.", "⭐" if record.status == 'New' else "⏩", record.status, filename, reason,
+                  extra=document_log_fields(document, file_bytes, started, "dedup", status=record.status))
             
-        resume_data_to_add.append(final_parsed_data)
+        resume_data_to_add.append(record)
+        existing_phone_emails.update(record.contact_keys()) # A later resume of the same contact in this run is a duplicate too
+        latency_rows.append({'file_name': filename, 'received_at': epoch_seconds(document.get('received_time')),
+                             'cycle_started_at': document.get('cycle_started_at'), 'downloaded_at': document.get('downloaded_at'),
+                             'parse_started_at': parse_started_at, 'converted_at': converted_at, 'parsed_at': parsed_at})
         processed_count += 1
-        
-        # Clean up the converted .docx file if it was created for a successfully processed file
-        if file_path != original_file_path_for_cleanup and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                print(f"    🧹 Cleaned up temporary converted file: {os.path.basename(file_path)}")
-            except Exception as clean_err:
-                print(f"    ❌ Error cleaning up temporary file {os.path.basename(file_path)}: {clean_err}")
 
-    
+    if candidate_store is not None:
+        candidate_store.close()
+
+    log.info("  📋 %d file(s): %d new, %d duplicate, %d near duplicate, %d skipped (same file and skills).", len(documents),
+             status_counts['New'], status_counts['Duplicate'], status_counts['Near Duplicate'], status_counts['Skipped'],
+             extra=log_fields(stage="summary", **{f"{status.lower().replace(' ', '_')}_count": count for status, count in status_counts.items()}))
+    scheduler.log_lane_stats()
+    if triage:
+        log.info("  🔎 Triage: %d fully parsed, %d deferred, %d rejected.", triage_counts['accept'], triage_counts['defer'],
+                 triage_counts['reject'], extra=log_fields(stage="triage", **{f"{verdict}_count": count for verdict, count in triage_counts.items()}))
+
+    gazetteer_hits = NAME_RECOGNIZER_COUNTS['gazetteer'] - name_counts_at_start['gazetteer']
+    names_searched = gazetteer_hits + NAME_RECOGNIZER_COUNTS['ner'] - name_counts_at_start['ner']
+    if names_searched:
+        log.info("  🔤 Name fast path: %d of %d resume(s) skipped spaCy NER (%.0f%%).", gazetteer_hits, names_searched,
+                 gazetteer_hits / names_searched * 100)
+        log.info("  ⚙️ Parser cascade: %s.", parser_cascade_summary(parser_stats_at_start))
+
     if processed_count == 0:
-        print("  ℹ️ No new unique resumes processed or added in this run.")
+        log.info("  ℹ️ No new unique resumes processed or added in this run.")
         return
 
-    if resume_data_to_add:
-        new_resumes_df = pd.DataFrame(resume_data_to_add)
-
-        if 'Status' not in existing_df.columns:
-            existing_df['Status'] = 'Existing' 
+    if len(resume_data_to_add):
+        new_resumes_df = resume_data_to_add.to_dataframe()
+        # Row keys tie each row to its row in the workbooks
+        assign_row_keys(new_resumes_df)
+
+        # Add new columns with default 'N/A' for the second workbook ('cadate resume details.xlsx')
+        cadate_excel_file_path = os.path.join(output_directory, CADATE_EXCEL_FILE_NAME)
+        cadate_df = new_resumes_df.copy()
+        for col in CADATE_DETAIL_COLUMNS:
+            if col not in cadate_df.columns: # Only add if it doesn't already exist from primary df
+                cadate_df[col] = 'N/A' # Default value for new columns
+            else:
+                cadate_df[col] = cadate_df[col].fillna('N/A')
+
+        # Journal the rows before touching any workbook: a workbook open in Excel only delays the export.
+        # Only the new rows go into an existing second workbook; a missing one is written from the whole primary sheet.
+        export_job = {
+            'excel_file_path': excel_file_path,
+            'primary_columns': PRIMARY_EXCEL_COLUMNS,
+            'primary_rows': [(row[EXCEL_ROW_KEY_COLUMN], {col: row.get(col) for col in PRIMARY_EXCEL_COLUMNS})
+                             for row in new_resumes_df.to_dict('records')],
+            'cadate_excel_file_path': cadate_excel_file_path,
+            'cadate_columns': CADATE_EXCEL_COLUMNS,
+            'cadate_rows': [(row[EXCEL_ROW_KEY_COLUMN], {col: row.get(col) for col in CADATE_EXCEL_COLUMNS})
+                            for row in cadate_df.to_dict('records')],
+            'updated_rows': {},
+        }
+        # The candidate database goes first, so the latency rows exist before the export thread marks them exported
+        committed_at = None
+        try:
+            with closing(open_candidate_store()) as store:
+                candidate_ids = store_candidates(store, resume_data_to_add, origin=origin)
+                committed_at = time.time()
+                record_ingest_latency(store, [row_key for row_key, _ in export_job['primary_rows']], candidate_ids,
+                                      latency_rows, committed_at)
+            log.info("✅ Recorded %d candidate(s) in %s.", len(resume_data_to_add), CANDIDATE_DB_FILE_NAME)
+        except sqlite3.Error as e:
+            log.error("❌ ERROR: Failed to record candidates in %s: %s", CANDIDATE_DB_FILE_NAME, e)
+
+        get_excel_export_queue().submit(export_job)
+        log.info("✅ Processing complete. %d new row(s) journaled for %s and %s. Total records in %s once exported: %d",
+                 len(export_job['primary_rows']), excel_file_name, CADATE_EXCEL_FILE_NAME, excel_file_name,
+                 existing_count + len(export_job['primary_rows']), extra=log_fields(stage="export"))
+
+        if committed_at is not None:
+            try:
+                with closing(open_candidate_store()) as store:
+                    log_ingest_latency_summary("This run", ingest_latency_summary(store, "committed_at = ?", (committed_at,)))
+                    log_ingest_latency_summary("Today", ingest_latency_summary(store, "day = date('now', 'localtime')"))
+            except sqlite3.Error as e:
+                log.warning("  ⚠️ WARNING: Could not summarize ingestion latency: %s", e)
+    else:
+        log.info("ℹ️ No resume data extracted or added to the Excel file in this run.")
 
-        combined_df = pd.concat([existing_df, new_resumes_df], ignore_index=True)
+def process_resumes_in_folder(folder_path, excel_file_path, downloaded_files_info):
+    """
+    Disk mode: processes the resumes saved in folder_path (matched to their email data by file name),
+    updates the Excel sheet, then deletes the files this run downloaded.
+    """
+    # Create a map from original_file_name to its associated email data
+    email_data_map = {os.path.basename(item['file_path']): item for item in downloaded_files_info}
 
-        combined_df['Phone Number_Clean'] = combined_df['Phone Number'].astype(str).apply(lambda x: re.sub(r'\D', '', x)).str.strip()
-        combined_df['Email ID_Clean'] = combined_df['Email ID'].astype(str).str.lower().str.strip()
+    documents = []
+    for filename in os.listdir(folder_path):
+        file_path = os.path.join(folder_path, filename)
+        if os.path.isfile(file_path):
+            documents.append(dict(email_data_map.get(filename, {}), file_name=filename, file_path=file_path))
+
+    log.info("📂 Reading resumes from: %s", folder_path)
+    process_resume_documents(documents, excel_file_path, origin='outlook') # Only the Outlook backend saves to disk
+
+    log.info("🧹 Cleaning up downloaded files in: %s", folder_path)
+    # Only delete files that were actually downloaded by this run, to avoid deleting other user files
+    downloaded_paths = {d['file_path'] for d in downloaded_files_info}
+    for document in documents:
+        item_path = document['file_path']
+        if item_path not in downloaded_paths:
+            continue
+        try:
+            os.remove(item_path)
+            log.debug("  🗑️ Deleted: %s", os.path.basename(item_path))
+        except Exception as e:
+            log.error("  ❌ Error deleting file %s: %s", item_path, e)
 
-        seen_contacts = set()
-        for idx, row in combined_df.iterrows():
-            is_contact_dup = False
-            phone = row['Phone Number_Clean']
-            email = row['Email ID_Clean']
 
-            if (phone and phone != 'n/a' and phone in seen_contacts) or \
-               (email and email != 'n/a' and email in seen_contacts):
-                is_contact_dup = True
-            
-            if phone and phone != 'n/a': seen_contacts.add(phone)
-            if email and email != 'n/a': seen_contacts.add(email)
-            
-            if is_contact_dup:
-                combined_df.at[idx, '_temp_status'] = 'Duplicate'
-            
-            # Maintain the 'Duplicate' status if it was set by the initial check for new entries
-            if combined_df.at[idx, 'Status'] == 'Duplicate': 
-                combined_df.at[idx, '_temp_status'] = 'Duplicate'
-            
-            # If not yet set, default to 'Existing' for old entries or 'New' for new entries
-            if '_temp_status' not in combined_df.columns or pd.isna(combined_df.at[idx, '_temp_status']):
-                combined_df.at[idx, '_temp_status'] = row['Status']
+# --- Orchestrator for 24/7 Automation ---
+def run_automation_cycle(mail_source=None, mail_source_path=None):
+    log.info("✨✨✨ Starting Automated Resume Processing Cycle [%s] ✨✨✨", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    
+    mail_source = mail_source or MAIL_SOURCE
+    downloaded_files_info = [] 
+    log.info("--- Step 1: Downloading Resumes from %s ---", mail_source)
+    cycle_started_at = time.time()
+    try:
+        downloaded_files_info = fetch_resumes_from_mail_source(mail_source, mail_source_path)
+        downloaded_at = time.time()
+        for document in downloaded_files_info: # Stage timestamps for the ingestion latency record
+            document.update(cycle_started_at=cycle_started_at, downloaded_at=downloaded_at)
+        log.info("--- Download Summary: Downloaded %d new resume(s) from %s. ---", len(downloaded_files_info), mail_source,
+                 extra=log_fields(stage="download", resume_count=len(downloaded_files_info)))
+    except Exception as e:
+        log.critical("❌ CRITICAL ERROR: Failed to download resumes from %s: %s", mail_source, e, exc_info=True)
+        downloaded_files_info = [] 
 
+    log.info("--- Step 2: Processing Resumes and Updating Database ---")
+    try:
+        if ATTACHMENTS_IN_MEMORY or mail_source != "outlook": # Only the Outlook backend can save to disk
+            process_resume_documents(downloaded_files_info, output_excel_file, origin=mail_source)
+        else:
+            process_resumes_in_folder(resume_download_folder, output_excel_file, downloaded_files_info)
+    except Exception as e:
+        log.critical("❌ CRITICAL ERROR: Failed to process resumes in folder: %s", e, exc_info=True) 
+    refresh_parquet_export()
+
+    memory = nlp_memory_guard.stats()
+    log.info("🧠 Memory: RSS %s MB (peak %s MB) | %d resume(s) parsed by this process | %d spaCy reload(s)",
+             memory['rss_mb'], memory['peak_rss_mb'], memory['documents'], memory['nlp_reloads'],
+             extra=log_fields(stage="memory", **memory))
+    log.info("✨✨✨ Automated Resume Processing Cycle Finished [%s] ✨✨✨", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+def _long_running_worker(log_queue, log_level, interval_seconds, mail_source, mail_source_path, cycles_done, max_cycles):
+    """Runs processing cycles in a worker process until a recycle is due (or max_cycles in total have run)."""
+    global _log_listener
+    # Records go back to the parent's log listener; a forked worker must not reuse the parent's queue handler
+    _log_listener = None
+    log.handlers.clear()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.setLevel(log_level)
+    log.propagate = False
+    nlp_memory_guard.restart()
+    export_queue = get_excel_export_queue()
+    try:
+        while True:
+            run_automation_cycle(mail_source, mail_source_path)
+            with cycles_done.get_lock():
+                cycles_done.value += 1
+                if max_cycles and cycles_done.value >= max_cycles:
+                    return
+            if nlp_memory_guard.should_recycle():
+                memory = nlp_memory_guard.stats()
+                log.info("♻️ Recycling the worker process after %d resume(s) at %s MB RSS.", memory['documents'], memory['rss_mb'],
+                         extra=log_fields(stage="memory", **memory))
+                return
+            time.sleep(interval_seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        export_queue.stop()
 
-        combined_df['Status'] = combined_df['_temp_status']
-        
-        combined_df.drop(columns=['Phone Number_Clean', 'Email ID_Clean', '_temp_status'], errors='ignore', inplace=True)
-
-        # Ensure consistent column names for the primary Excel output
-        if 'Name' in combined_df.columns and 'Candidate Name' not in combined_df.columns:
-            combined_df.rename(columns={'Name': 'Candidate Name'}, inplace=True)
-        if 'Skills' in combined_df.columns and 'Skill' not in combined_df.columns:
-            combined_df.rename(columns={'Skills': 'Skill'}, inplace=True)
-        if 'Experience' in combined_df.columns and 'Total Experience' not in combined_df.columns:
-            combined_df.rename(columns={'Experience': 'Total Experience'}, inplace=True)
-        
-        # Define the desired order of columns for the PRIMARY Excel file
-        primary_excel_columns_order = [
-            "Source Date", "Month", "Year", "Skill", "Candidate Name", 
-            "Total Experience", "Email ID", "Phone Number", "File Name", "Status"
-        ]
-        
-        # Filter and reorder columns for the primary Excel
-        combined_df = combined_df[[col for col in primary_excel_columns_order if col in combined_df.columns]]
+def run_long_running_mode(interval_seconds=LOOP_INTERVAL_SECONDS, mail_source=None, mail_source_path=None, max_cycles=0):
+    """
+    Runs a processing cycle every interval_seconds until stopped (or max_cycles have run). The cycles run in a
+    worker process that is replaced by a fresh one once it has parsed WORKER_RECYCLE_EVERY_DOCUMENTS resumes or
+    stays above MEMORY_RSS_CEILING_MB, so memory that spaCy and the parsers accumulate goes back to the OS.
+    """
+    log.info("🔁 Running a processing cycle every %gs; worker recycled above %s MB RSS or after %s resume(s).",
+             interval_seconds, MEMORY_RSS_CEILING_MB or "∞", WORKER_RECYCLE_EVERY_DOCUMENTS or "∞")
+    log_queue = multiprocessing.Queue()
+    worker_log_listener = logging.handlers.QueueListener(log_queue, *_log_listener.handlers, respect_handler_level=True)
+    worker_log_listener.start()
+    cycles_done = multiprocessing.Value('i', 0)
+    worker_number, worker = 0, None
+    try:
+        while not max_cycles or cycles_done.value < max_cycles:
+            worker_number += 1
+            worker = multiprocessing.Process(target=_long_running_worker, name=f"resume-worker-{worker_number}",
+                                             args=(log_queue, log.level, interval_seconds, mail_source, mail_source_path,
+                                                   cycles_done, max_cycles))
+            worker.start()
+            log.info("  ▶️ Worker %d started (pid %d).", worker_number, worker.pid, extra=log_fields(stage="loop", worker=worker_number))
+            worker.join()
+            if worker.exitcode != 0:
+                log.error("  ❌ Worker %d exited with code %s; starting a new one in %ds.", worker_number, worker.exitcode, interval_seconds)
+                time.sleep(interval_seconds)
+    except KeyboardInterrupt:
+        if worker is not None:
+            worker.join()
+        log.info("🛑 Stopped after %d cycle(s).", cycles_done.value)
+    finally:
+        worker_log_listener.stop()
+
+
+# --- Bulk Backfill of Archived Resumes ---
+TAR_ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+def convert_doc_bytes_to_docx_bytes(file_name, file_bytes):
+    """Converts an in-memory .doc through Word inside a throwaway temp directory (Word needs real paths)."""
+    with tempfile.TemporaryDirectory(prefix="resume_doc_") as temp_dir:
+        doc_path = os.path.join(temp_dir, "resume.doc")
+        with open(doc_path, 'wb') as f:
+            f.write(file_bytes)
+        docx_path = convert_doc_to_docx(doc_path)
+        if not docx_path:
+            log.error("  ❌ Failed to convert .doc file '%s'.", file_name, extra=log_fields(file_name=file_name, stage="convert"))
+            return None
+        with open(docx_path, 'rb') as f:
+            return f.read()
+
+def backfill_file_paths(paths):
+    """The files under the given folders (walked in sorted order) and the given files themselves."""
+    for root_path in paths:
+        if not os.path.isdir(root_path):
+            yield root_path
+            continue
+        for dir_path, dir_names, file_names in os.walk(root_path):
+            dir_names.sort()
+            for name in sorted(file_names):
+                yield os.path.join(dir_path, name)
 
+def iter_backfill_sources(paths, done_keys=frozenset(), read_contents=True):
+    """
+    Walks the given folders, files, .zip and tar archives and yields one work item per resume
+    not already in done_keys. Archive members are read straight into memory, never extracted to disk.
+    With read_contents=False only the item metadata is produced (used to count work for the ETA); tar
+    archives are skipped then, as listing their members means decompressing all of them. Tar members are
+    yielded with 'from_tar' set so the caller can count them as they stream instead.
+    """
+    for path in backfill_file_paths(paths):
+        lower_path = path.lower()
         try:
-            combined_df.to_excel(excel_file_path, index=False)
-            print(f"\n✅ Processing complete. Data successfully written to {excel_file_path}")
-            print(f"   Total records in {excel_file_name}: {len(combined_df)}")
+            if lower_path.endswith(".zip"):
+                with zipfile.ZipFile(path) as archive:
+                    for member in archive.infolist():
+                        file_extension = os.path.splitext(member.filename)[1].lower()
+                        source_key = f"{path}::{member.filename}"
+                        if member.is_dir() or file_extension not in RESUME_ATTACHMENT_EXTENSIONS or source_key in done_keys:
+                            continue
+                        yield {
+                            'source_key': source_key,
+                            'file_name': os.path.basename(member.filename),
+                            'file_extension': file_extension,
+                            'file_bytes': archive.read(member) if read_contents else None,
+                            'received_time': datetime(*member.date_time)
+                        }
+            elif lower_path.endswith(TAR_ARCHIVE_SUFFIXES):
+                if not read_contents:
+                    continue
+                with tarfile.open(path, mode="r:*") as archive: # Streams members in archive order
+                    for member in archive:
+                        file_extension = os.path.splitext(member.name)[1].lower()
+                        source_key = f"{path}::{member.name}"
+                        if not member.isfile() or file_extension not in RESUME_ATTACHMENT_EXTENSIONS or source_key in done_keys:
+                            continue
+                        yield {
+                            'source_key': source_key,
+                            'file_name': os.path.basename(member.name),
+                            'file_extension': file_extension,
+                            'file_bytes': archive.extractfile(member).read(),
+                            'received_time': datetime.fromtimestamp(member.mtime),
+                            'from_tar': True
+                        }
+            else:
+                file_extension = os.path.splitext(path)[1].lower()
+                if file_extension not in RESUME_ATTACHMENT_EXTENSIONS or path in done_keys:
+                    continue
+                yield {
+                    'source_key': path,
+                    'file_name': os.path.basename(path),
+                    'file_extension': file_extension,
+                    'file_path': path, # Plain files are read by the worker itself
+                    'received_time': datetime.fromtimestamp(os.path.getmtime(path))
+                }
+        except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+            log.error("  ❌ Error reading '%s': %s", path, e, extra=log_fields(file_name=path, stage="backfill"))
+
+_backfill_doc_lock = None
+
+def _init_backfill_worker(doc_lock):
+    global _backfill_doc_lock, _log_listener
+    _backfill_doc_lock = doc_lock
+    nlp_memory_guard.restart()
+    # A forked worker inherits the queue handler but not the listener thread: log warnings straight to the console
+    _log_listener = None
+    log.handlers.clear()
+    console_handler = ConsoleLogHandler(sys.stdout)
+    console_handler.setLevel(logging.WARNING)
+    log.addHandler(console_handler)
+
+def _backfill_parse_worker(item):
+    """Parses one backfill item in a worker process. Returns (source_key, record or None, error or None)."""
+    source_key = item['source_key']
+    try:
+        file_extension = item['file_extension']
+        file_path = item.get('file_path')
+        file_bytes = item.get('file_bytes')
+        if file_extension == '.doc':
+            if win32com is None:
+                return source_key, None, "pywin32 (and thus MS Word conversion) is not available for .doc files"
+            if file_bytes is None:
+                with open(file_path, 'rb') as f:
+                    file_bytes = f.read()
+            with _backfill_doc_lock: # One Word instance at a time; convert_doc_to_docx quits Word when done
+                file_bytes = convert_doc_bytes_to_docx_bytes(item['file_name'], file_bytes)
+            if file_bytes is None:
+                return source_key, None, ".doc to .docx conversion failed"
+            file_extension, file_path = '.docx', None
+
+        record = parse_resume_document(item['file_name'], file_extension, {'received_time': item['received_time']},
+                                       file_path=file_path, file_bytes=file_bytes)
+        return source_key, record, None if record else "no text extracted"
+    except Exception as e:
+        return source_key, None, str(e)
 
-            # --- NEW: Generate 'cadate resume details.xlsx' ---
-            cadate_excel_file_path = os.path.join(output_directory, CADATE_EXCEL_FILE_NAME)
-            
-            # Create a copy from the finalized combined_df
-            cadate_df = combined_df.copy()
-            
-            # Drop 'File Name' column as requested for the second Excel
-            if 'File Name' in cadate_df.columns:
-                cadate_df.drop(columns=['File Name'], inplace=True)
-            
-            # Add new columns with default 'N/A' to cadate_df
-            new_cadate_columns_to_add = [
-                'Source', 'Rec', 'Education', 'NP', 'Current Company', 
-                'CCTC', 'ECTC', 'Current Location', 'Current Status', 'Kishore Comment'
-            ]
-            for col in new_cadate_columns_to_add:
-                if col not in cadate_df.columns: # Only add if it doesn't already exist from primary df
-                    cadate_df[col] = 'N/A' # Default value for new columns
-
-            # Define the exact order of columns for the SECOND Excel file
-            cadate_columns_order = [
-                "Source Date", "Month", "Year", "Source", "Rec", "Skill", 
-                "Candidate Name", "Total Experience", "Email ID", "Phone Number", "Status", 
-                "Education", "NP", "Current Company", "CCTC", "ECTC", "Current Location", 
-                "Current Status", "Kishore Comment"
-            ]
+def _format_duration(seconds):
+    return str(timedelta(seconds=int(seconds)))
 
-            # Reorder and select columns for cadate_df
-            # This ensures only the requested columns are present and in the specified order.
-            # Any columns from combined_df that are not in cadate_columns_order will be excluded from cadate_df.
-            cadate_df = cadate_df[[col for col in cadate_columns_order if col in cadate_df.columns]]
-            
-            cadate_df.to_excel(cadate_excel_file_path, index=False)
-            print(f"✅ Generated additional Excel: {cadate_excel_file_path} (excluding 'File Name' column).")
-            print(f"   Total records in {CADATE_EXCEL_FILE_NAME}: {len(cadate_df)}")
+def run_backfill(paths, workers=None, batch_size=BACKFILL_BATCH_SIZE, checkpoint_path=None):
+    """
+    Imports historical resumes from folders and zip/tar archives into the candidate database.
+    Parsing runs on all cores; each batch is committed in one transaction and then checkpointed,
+    so an interrupted import resumes where it stopped.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or os.path.join(output_directory, BACKFILL_CHECKPOINT_FILE_NAME)
+
+    done_keys = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding='utf-8') as f:
+            done_keys = {line.rstrip('\n') for line in f if line.strip()}
+        log.info("  ↩️ Resuming backfill: %d source(s) already imported according to %s", len(done_keys), checkpoint_path)
+
+    # Tar archives are not counted up front (that would decompress them twice); their resumes join the total as they stream
+    total = sum(1 for _ in iter_backfill_sources(paths, done_keys, read_contents=False))
+    tar_archives = sum(1 for path in backfill_file_paths(paths) if path.lower().endswith(TAR_ARCHIVE_SUFFIXES))
+    log.info("📦 Backfilling %d resume(s)%s from %d location(s) using %d worker process(es).", total,
+             f" plus the resumes of {tar_archives} tar archive(s), counted as they are read" if tar_archives else "", len(paths), workers)
+    if total == 0 and not tar_archives:
+        return
 
-        except Exception as e:
-            print(f"❌ ERROR: Failed to write to Excel files. Primary: {excel_file_path}, Secondary: {CADATE_EXCEL_FILE_NAME}: {e}")
-            traceback.print_exc() # Print full traceback for this critical error
+    _, existing_phone_emails, existing_filename_skills, cold_df = load_existing_database(output_excel_file)
+    add_duplicate_check_keys(zip(cold_df['Phone Number'], cold_df['Email ID'], cold_df['File Name'], cold_df['Skill']) if len(cold_df) else (),
+                             existing_phone_emails, existing_filename_skills) # Not archived until the next processing cycle
+    store = open_candidate_store()
+    existing_phone_emails = IndexedKeySet(existing_phone_emails, store, 'contact')
+    existing_filename_skills = IndexedKeySet(existing_filename_skills, store, 'file_skill')
+
+    counts = {'New': 0, 'Duplicate': 0, 'skipped': 0, 'failed': 0}
+    done = 0
+    start_time = last_report = time.monotonic()
+
+    sources = iter_backfill_sources(paths, done_keys)
+    with closing(store), multiprocessing.Pool(workers, initializer=_init_backfill_worker, initargs=(multiprocessing.Lock(),),
+                                                   maxtasksperchild=BACKFILL_WORKER_MAX_TASKS or None) as pool, \
+            open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+        while True:
+            # Work is pulled one batch at a time so archive contents in flight stay bounded
+            item_batch = list(islice(sources, batch_size))
+            if not item_batch:
+                break
+            total += sum(1 for item in item_batch if item.get('from_tar'))
+
+            batch = CandidateBatch()
+            batch_keys = []
+            for source_key, record, error in pool.imap_unordered(_backfill_parse_worker, item_batch):
+                done += 1
+                if record is None:
+                    counts['failed'] += 1
+                    log.warning("  ⚠️ Could not parse '%s': %s", source_key, error, extra=log_fields(file_name=source_key, stage="parse"))
+                elif record.filename_skills_key()[0] and record.filename_skills_key() in existing_filename_skills:
+                    counts['skipped'] += 1
+                else:
+                    contact_keys = record.contact_keys()
+                    record.status = 'Duplicate' if any(key in existing_phone_emails for key in contact_keys) else 'New'
+                    existing_phone_emails.update(contact_keys)
+                    existing_filename_skills.add(record.filename_skills_key())
+                    counts[record.status] += 1
+                    batch.append(record)
+                    batch_keys.append(source_key)
+
+                now = time.monotonic()
+                if now - last_report >= BACKFILL_PROGRESS_INTERVAL_SECONDS:
+                    last_report = now
+                    rate = done / (now - start_time)
+                    log.info("  ⏱️ %d/%d%s resumes | %.1f resumes/s | ETA %s", done, total, "+" if tar_archives else "", rate, _format_duration((total - done) / rate), extra=log_fields(stage="backfill", done=done, total=total))
+
+            store_candidates(store, batch, origin='backfill', source_keys=batch_keys)
+            # Checkpoint only after the batch is committed; a crash in between just re-imports it (INSERT OR IGNORE)
+            checkpoint.write("".join(item['source_key'] + "\n" for item in item_batch))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+
+    refresh_parquet_export()
+    elapsed = time.monotonic() - start_time
+    log.info("✅ Backfill complete: %d resume(s) in %s (%.1f resumes/s).", done, _format_duration(elapsed), done / max(elapsed, 1e-9))
+    log.info("   New: %d | Duplicate: %d | Skipped (same file and skills): %d | Failed: %d", counts['New'], counts['Duplicate'],
+             counts['skipped'], counts['failed'], extra=log_fields(stage="backfill", **counts))
+
+
+
+# --- Skill Re-tagging ---
+# The Skill of every stored candidate reflects the taxonomy of the day it was parsed. 'retag' diffs SKILL_TAXONOMY
+# against the snapshot in candidates.db and, instead of reparsing, rescans the kept resume texts for the added
+# skills only; removed skills are dropped and renamed ones moved without looking at the text at all.
+def save_skill_taxonomy_snapshot(conn):
+    """Records the current SKILL_TAXONOMY as the one the stored Skill values follow, inside the caller's transaction."""
+    families = {SKILL_NAMES[skill_id]: skill_families for skill_id, skill_families in skill_families_by_id(SKILL_TAXONOMY).items()}
+    conn.execute("DELETE FROM skill_taxonomy")
+    conn.executemany("INSERT INTO skill_taxonomy (skill, families) VALUES (?, ?)",
+                     [(skill, ", ".join(skill_families)) for skill, skill_families in families.items()])
+
+def diff_skill_taxonomy(previous_skills, current_skills, renames=None):
+    """
+    Compares two taxonomies given as skill name lists. Returns {'added': [...], 'removed': [...], 'renamed': [(old, new)]};
+    a skill whose spelling only changed case is renamed, as is every SKILL_RENAMES pair whose old name left and new name came.
+    """
+    previous = {skill.lower(): skill for skill in previous_skills}
+    current = {}
+    for skill in current_skills:
+        current.setdefault(skill.lower(), skill) # First spelling wins, like intern_skill
+    renamed = [(previous[key], current[key]) for key in previous.keys() & current.keys() if previous[key] != current[key]]
+    for old, new in (SKILL_RENAMES if renames is None else renames).items():
+        if old.lower() in previous and old.lower() not in current and new.lower() in current and new.lower() not in previous:
+            renamed.append((previous[old.lower()], current[new.lower()]))
+    renamed_keys = {old.lower() for old, _ in renamed} | {new.lower() for _, new in renamed}
+    return {'added': sorted(current[key] for key in current.keys() - previous.keys() - renamed_keys),
+            'removed': sorted(previous[key] for key in previous.keys() - current.keys() - renamed_keys),
+            'renamed': sorted(renamed)}
+
+def scan_resume_texts(conn, patterns, first_id, last_id):
+    """
+    Searches the stored resume texts of candidates first_id..last_id for (needle, pattern) pairs.
+    Returns [(candidate_id, [indexes of the patterns found])] for the texts with at least one match.
+    """
+    matches = []
+    for candidate_id, text in conn.execute("SELECT candidate_id, text FROM resume_texts WHERE candidate_id BETWEEN ? AND ?",
+                                           (first_id, last_id)):
+        text = zlib.decompress(text).decode('utf-8')
+        # The substring test is a cheap filter; the word-boundary pattern decides
+        found = [index for index, (needle, pattern) in enumerate(patterns) if needle in text and pattern.search(text)]
+        if found:
+            matches.append((candidate_id, found))
+    return matches
+
+_retag_store = None
+_retag_patterns = None
+
+def _init_retag_worker(db_path, skills):
+    global _retag_store, _retag_patterns
+    _retag_store = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    _retag_patterns = [(skill.lower(), taxonomy_skill_pattern(skill)) for skill in skills]
+
+def _retag_scan_worker(id_range):
+    return scan_resume_texts(_retag_store, _retag_patterns, *id_range)
+
+def find_skills_in_resume_texts(conn, db_path, skills, workers=None):
+    """{candidate_id: {skill ID}} for the stored resume texts mentioning any of skills, scanned on all cores when many."""
+    if not skills:
+        return {}
+    first_id, last_id, text_count = conn.execute("SELECT MIN(candidate_id), MAX(candidate_id), COUNT(*) FROM resume_texts").fetchone()
+    if not text_count:
+        return {}
+    skill_ids = [intern_skill(skill) for skill in skills]
+    id_ranges = [(start, min(start + RETAG_CHUNK_SIZE - 1, last_id)) for start in range(first_id, last_id + 1, RETAG_CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers == 1 or text_count < RETAG_MIN_PARALLEL_TEXTS:
+        patterns = [(skill.lower(), taxonomy_skill_pattern(skill)) for skill in skills]
+        results = (scan_resume_texts(conn, patterns, *id_range) for id_range in id_ranges)
+    else:
+        log.info("  🔍 Scanning %d stored resume text(s) for %d skill(s) with %d worker process(es).", text_count, len(skills), workers)
+        pool = multiprocessing.Pool(workers, initializer=_init_retag_worker, initargs=(db_path, list(skills)))
+        results = pool.imap_unordered(_retag_scan_worker, id_ranges)
+    found = {}
+    try:
+        for matches in results:
+            for candidate_id, indexes in matches:
+                found[candidate_id] = {skill_ids[index] for index in indexes}
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return found
+
+def retag_skill_string(skills_str, removed_ids, renamed_ids, added_ids):
+    """
+    A stored Skill value with removed_ids dropped, renamed_ids ({old ID: new ID}, a case-only rename maps an ID to
+    itself) given their new name and added_ids added. Other skills keep their spelling. None when nothing changes.
+    """
+    skills = {}
+    for name in (skills_str or "").split(','):
+        skill_id = intern_skill(name)
+        if skill_id is not None:
+            skills.setdefault(skill_id, name.strip())
+    kept = {skill_id: name for skill_id, name in skills.items() if skill_id not in removed_ids and skill_id not in renamed_ids}
+    new_ids = set(kept) | {renamed_ids[skill_id] for skill_id in skills if skill_id in renamed_ids} | set(added_ids)
+    if set(kept) == set(skills) and new_ids == set(skills):
+        return None
+    names = [kept.get(skill_id) or SKILL_NAMES[skill_id] for skill_id in new_ids]
+    return ", ".join(sorted(names)) if names else "N/A"
+
+def run_skill_retag(workers=None, dry_run=False, db_path=None):
+    """
+    Brings the Skill of the stored candidates (and of their rows in the workbooks) up to date with SKILL_TAXONOMY.
+    Returns the number of candidates whose Skill changed (or would change, with dry_run).
+    """
+    db_path = db_path or os.path.join(output_directory, CANDIDATE_DB_FILE_NAME)
+    started = time.perf_counter()
+    with closing(open_candidate_store(db_path)) as store:
+        previous_families = {skill: families.split(", ") for skill, families in store.execute("SELECT skill, families FROM skill_taxonomy")}
+        diff = diff_skill_taxonomy(previous_families, PREDEFINED_SKILLS)
+        # Skills that moved between families change the rollups of their candidates even when no Skill value changes
+        current_skills = {skill.lower() for skill in PREDEFINED_SKILLS}
+        moved = {SKILL_IDS[skill.lower()] for skill, families in previous_families.items()
+                 if skill.lower() in current_skills and families != SKILL_FAMILIES_BY_ID[SKILL_IDS[skill.lower()]]}
+        if not (diff['added'] or diff['removed'] or diff['renamed'] or moved):
+            log.info("✅ Skill taxonomy unchanged since the last retag; nothing to do.")
+            return 0
+        log.info("🏷️ Taxonomy changes: %d added, %d removed, %d renamed, %d moved between families.", len(diff['added']),
+                 len(diff['removed']), len(diff['renamed']), len(moved))
+        for label, skills in (("Added", diff['added']), ("Removed", diff['removed']),
+                              ("Renamed", [f"{old} -> {new}" for old, new in diff['renamed']])):
+            if skills:
+                log.info("   %s: %s", label, ", ".join(skills))
+
+        # Renamed-to skills are new patterns too: resumes naming the new spelling get the tag as well
+        scanned_skills = diff['added'] + [new for old, new in diff['renamed'] if old.lower() != new.lower()]
+        found = find_skills_in_resume_texts(store, db_path, scanned_skills, workers)
+        removed_ids = {intern_skill(skill) for skill in diff['removed']}
+        renamed_ids = {intern_skill(old): SKILL_IDS[new.lower()] for old, new in diff['renamed']}
+        previous_families_by_id = {intern_skill(skill): families for skill, families in previous_families.items()}
+
+        skill_updates, excel_updates, contact_rows = [], {}, []
+        old_rollup_keys, new_rollup_keys = [], []
+        for candidate_id, skill, year, month, source_date, status, total_experience, file_name, email, phone in store.execute(
+                "SELECT id, skill, year, month, source_date, status, total_experience, file_name, email_id, phone_number FROM candidates"):
+            old_ids = skill_ids_from_string(skill)
+            new_skill = retag_skill_string(skill, removed_ids, renamed_ids, found.get(candidate_id, ()))
+            changed = new_skill is not None and new_skill != skill
+            if not changed and not old_ids & moved:
+                continue
+            new_ids = skill_ids_from_string(new_skill) if changed else old_ids
+            old_key = candidate_rollup_key(year, month, source_date, old_ids, status, total_experience, previous_families_by_id)
+            new_key = candidate_rollup_key(year, month, source_date, new_ids, status, total_experience)
+            if old_key != new_key:
+                old_rollup_keys.append(old_key)
+                new_rollup_keys.append(new_key)
+            if changed:
+                skill_updates.append((new_skill, candidate_id))
+                excel_updates[candidate_row_key(file_name, source_date, email, phone)] = {'Skill': new_skill}
+                contact_rows.append((phone, email, file_name, new_skill, candidate_partition(year, month, source_date)))
+        without_text = store.execute("SELECT COUNT(*) FROM candidates WHERE id NOT IN (SELECT candidate_id FROM resume_texts)").fetchone()[0]
+
+        if not dry_run:
+            with store: # One transaction: the Skill values, rollups, duplicate-check keys and snapshot change together
+                store.executemany("UPDATE candidates SET skill = ? WHERE id = ?", skill_updates) # Bumps change_seq for the feeds
+                update_candidate_rollups(store, old_rollup_keys, sign=-1)
+                update_candidate_rollups(store, new_rollup_keys)
+                index_candidate_contacts(store, contact_rows) # The old file+skills keys stay; they can only cause a skip
+                save_skill_taxonomy_snapshot(store)
+
+    elapsed = time.perf_counter() - started
+    log.info("%s %d candidate(s) %s re-tagged in %.2fs; %d rollup count(s) moved.", "🧪" if dry_run else "✅", len(skill_updates),
+             "would be" if dry_run else "were", elapsed, len(old_rollup_keys),
+             extra=log_fields(stage="retag", candidates=len(skill_updates), seconds=round(elapsed, 3)))
+    if without_text and scanned_skills:
+        log.warning("  ⚠️ %d candidate(s) were stored before resume texts were kept and could not be scanned for the added skills; "
+                    "backfill their resumes again to tag them.", without_text)
+    if dry_run or not skill_updates:
+        return len(skill_updates)
+
+    if os.path.exists(output_excel_file): # Rows of the workbooks (the hot months) get the new Skill too
+        cadate_excel_file_path = os.path.join(output_directory, CADATE_EXCEL_FILE_NAME)
+        get_excel_export_queue().submit({
+            'excel_file_path': output_excel_file, 'primary_columns': PRIMARY_EXCEL_COLUMNS, 'primary_rows': [],
+            'cadate_excel_file_path': cadate_excel_file_path if os.path.exists(cadate_excel_file_path) else None,
+            'cadate_columns': [], 'cadate_rows': [], 'updated_rows': excel_updates, 'updated_columns': ["Skill"]})
+    refresh_parquet_export()
+    return len(skill_updates)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Resume processor: Outlook download cycle (default) and maintenance commands.")
+    parser.add_argument("--mail-source", choices=sorted(MAIL_SOURCE_BACKENDS), default=None, help=f"Mail backend for the download cycle (default: {MAIL_SOURCE})")
+    parser.add_argument("--mail-source-path", default=None, help="Folder of .eml files, mbox file or Maildir folder for the file-based backends")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default=None,
+                        help=f"Console log level (default: {LOG_CONSOLE_LEVEL}); DEBUG shows every email, attachment and file")
+    subparsers = parser.add_subparsers(dest="command")
+
+    backfill_parser = subparsers.add_parser("backfill", help="Import archived resume folders and zip/tar files into the candidate database.")
+    backfill_parser.add_argument("paths", nargs="+", help="Folders, resume files, .zip or tar archives to import")
+    backfill_parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: all cores)")
+    backfill_parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Resumes committed per transaction")
+    backfill_parser.add_argument("--checkpoint", default=None, help=f"Checkpoint file (default: {BACKFILL_CHECKPOINT_FILE_NAME} in the output directory)")
+
+    subparsers.add_parser("process-deferred", help="Fully parse the attachments that triage deferred.")
+
+    watch_parser = subparsers.add_parser("watch", help="Parse resumes as soon as they are dropped into folders.")
+    watch_parser.add_argument("folders", nargs="*", help="Drop folders (default: WATCH_FOLDERS or the download folder)")
+    watch_parser.add_argument("--poll", action="store_true", help="Poll the folders instead of using filesystem events")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the local HTTP parse service.")
+    serve_parser.add_argument("--host", default=SERVICE_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    serve_parser.add_argument("--max-batch-size", type=int, default=SERVICE_MAX_BATCH_SIZE, help="Uploads per nlp.pipe batch")
+    serve_parser.add_argument("--max-batch-wait-ms", type=float, default=SERVICE_MAX_BATCH_WAIT_MS, help="Longest wait for a batch to fill")
+
+    latency_parser = subparsers.add_parser("latency", help="Show email-to-row ingestion latency per day from the candidate database.")
+    latency_parser.add_argument("--days", type=int, default=7, help="Number of days to show, today included")
+
+    report_parser = subparsers.add_parser("report", help="Show candidate counts by month, skill family, status and experience band.")
+    report_parser.add_argument("--months", type=int, default=REPORT_MONTHS, help="Months to include, this one included (0 = all)")
+    report_parser.add_argument("--output", default=None, help=f"Summary workbook (default: {REPORT_WORKBOOK_NAME} in the output directory)")
+    report_parser.add_argument("--rebuild", action="store_true", help="Recount the rollups from all stored candidates first")
+
+    parquet_parser = subparsers.add_parser("export-parquet", help="Write the candidate database as Parquet partitioned by year and month.")
+    parquet_parser.add_argument("--output", default=None, help=f"Export folder (default: {PARQUET_EXPORT_FOLDER_NAME} in the output directory)")
+    parquet_parser.add_argument("--full", action="store_true", help="Rewrite every partition, not just the changed ones")
+
+    changes_parser = subparsers.add_parser("export-changes", help="Write the candidates changed since a watermark as JSON lines.")
+    changes_parser.add_argument("--since", type=int, default=0, help="Watermark printed by the previous export-changes (default: everything)")
+    changes_parser.add_argument("--output", default=None, help=f"JSON-lines file (default: {CHANGES_FEED_FILE_NAME} in the output directory)")
+
+    retag_parser = subparsers.add_parser("retag", help="Update the Skill of stored candidates after SKILL_TAXONOMY changes.")
+    retag_parser.add_argument("--workers", type=int, default=None, help="Scanner processes (default: all cores)")
+    retag_parser.add_argument("--dry-run", action="store_true", help="Show the taxonomy changes and how many candidates they touch")
+
+    loop_parser = subparsers.add_parser("loop", help="Run a processing cycle every few minutes in a memory-bounded, recycled worker.")
+    loop_parser.add_argument("--interval", type=float, default=LOOP_INTERVAL_SECONDS, help="Seconds between cycles")
+    loop_parser.add_argument("--cycles", type=int, default=0, help="Stop after this many cycles (default: run until stopped)")
+
+    export_bench_parser = subparsers.add_parser("bench-excel-export", help="Time in-place workbook merges against sheets of growing history.")
+    export_bench_parser.add_argument("--history", type=int, nargs="+", default=[10000, 50000, 100000], help="Rows already in the sheet")
+    export_bench_parser.add_argument("--changed-rows", type=int, default=100, help="Rows appended (and as many updated) per merge")
+    export_bench_parser.add_argument("--compare-rewrite", action="store_true", help="Also time reading and rewriting the whole sheet with pandas")
+
+    docx_bench_parser = subparsers.add_parser("bench-docx-extract", help="Compare the streaming .docx extractor with python-docx.")
+    docx_bench_parser.add_argument("--folder", default=None, help="Folder of .docx resumes (default: synthetic resumes)")
+    docx_bench_parser.add_argument("--documents", type=int, default=50, help="Number of synthetic resumes without --folder")
+
+    cascade_bench_parser = subparsers.add_parser("bench-parser-cascade", help="Compare parsing throughput and fill rate with and without the parser cascade.")
+    cascade_bench_parser.add_argument("--resumes", type=int, default=500, help="Number of synthetic resumes")
+
+    soak_parser = subparsers.add_parser("bench-memory-soak", help="Parse many synthetic resumes and print how memory develops.")
+    soak_parser.add_argument("--resumes", type=int, default=100000)
+    soak_parser.add_argument("--sample-every", type=int, default=5000, help="Print memory every this many resumes")
+    soak_parser.add_argument("--no-reload", action="store_true", help="Never reload spaCy, to compare the memory curve")
+    return parser
+
+
+# --- Watch-folder Mode ---
+class _DropFolderEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.dest_path)
+
+class DropFolderWatcher:
+    """
+    Tracks resume files arriving in drop folders. Paths come in from filesystem events (or a polling
+    rescan), wait in 'pending' until their size and mtime have been stable for debounce_seconds, and
+    are skipped if the manifest already has the same path, size and mtime. clock is the monotonic time source.
+    """
+
+    def __init__(self, folders, manifest_path, debounce_seconds=WATCH_DEBOUNCE_SECONDS, clock=time.monotonic):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.manifest_path = manifest_path
+        self.debounce_seconds = debounce_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.changed = set() # Paths reported since the last tick
+        self.pending = {} # path -> (size, mtime_ns, monotonic time the signature was last seen changing)
+        self.processed = self._load_manifest()
+
+    def _load_manifest(self):
+        processed = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        processed[entry['path']] = (entry['size'], entry['mtime_ns'])
+                    except (ValueError, KeyError):
+                        continue # A torn last line from a crash
+        return processed
+
+    @staticmethod
+    def is_resume_file(path):
+        file_name = os.path.basename(path)
+        if file_name.startswith(('~$', '.')): # Word lock files and hidden/partial files
+            return False
+        return os.path.splitext(file_name)[1].lower() in RESUME_ATTACHMENT_EXTENSIONS
+
+    def notify(self, path):
+        if self.is_resume_file(path):
+            with self.lock:
+                self.changed.add(os.path.abspath(path))
+
+    def rescan(self):
+        """Reports every resume file whose size/mtime differs from the manifest (startup and polling)."""
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError as e:
+                log.warning("  ⚠️ WARNING: Could not list drop folder '%s': %s", folder, e)
+                continue
+            for entry in entries:
+                if not entry.is_file() or not self.is_resume_file(entry.path):
+                    continue
+                stat = entry.stat()
+                path = os.path.abspath(entry.path)
+                if self.processed.get(path) != (stat.st_size, stat.st_mtime_ns) and path not in self.pending:
+                    with self.lock:
+                        self.changed.add(path)
+
+    def take_ready(self):
+        """Moves reported paths into pending and returns [(path, size, mtime_ns)] that have settled."""
+        with self.lock:
+            changed, self.changed = self.changed, set()
+        now = self.clock()
+        for path in changed:
+            self.pending.setdefault(path, (None, None, now))
+
+        ready = []
+        for path, (size, mtime_ns, last_change) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path] # Removed or renamed before it settled
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature != (size, mtime_ns):
+                self.pending[path] = signature + (now,)
+            elif stat.st_size > 0 and now - last_change >= self.debounce_seconds:
+                del self.pending[path]
+                if self.processed.get(path) != signature:
+                    ready.append((path,) + signature)
+        return ready
+
+    def mark_processed(self, ready):
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            for path, size, mtime_ns in ready:
+                self.processed[path] = (size, mtime_ns)
+                f.write(json.dumps({'path': path, 'size': size, 'mtime_ns': mtime_ns,
+                                    'processed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+def run_watch_mode(folders=None, excel_file_path=None, use_events=True, stop_event=None, tick_seconds=0.1):
+    """
+    Parses resumes as they land in the drop folders, typically within a second of the file being
+    closed. Files are never moved or deleted; the manifest is what keeps them from being parsed twice.
+    Each settled batch goes through the whole process_resume_documents, which reloads the duplicate-check
+    keys from the primary workbook first, so that second grows with the hot rows of the workbook.
+    """
+    folders = folders or WATCH_FOLDERS or [resume_download_folder]
+    excel_file_path = excel_file_path or output_excel_file
+    stop_event = stop_event or threading.Event()
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+    watcher = DropFolderWatcher(folders, os.path.join(output_directory, WATCH_MANIFEST_FILE_NAME))
+
+    observer = None
+    if use_events and Observer is not None:
+        observer = Observer()
+        handler = _DropFolderEventHandler(watcher)
+        for folder in watcher.folders:
+            observer.schedule(handler, folder, recursive=False)
+        observer.start()
+        log.info("  👀 Watching %d folder(s) for new resumes (filesystem events). Press Ctrl+C to stop.", len(watcher.folders))
     else:
-        print("\nℹ️ No resume data extracted or added to the Excel file in this run.")
+        hint = "; install 'watchdog' for event-driven watching" if Observer is None else ""
+        log.info("  👀 Watching %d folder(s) for new resumes (polling every %ss%s). Press Ctrl+C to stop.", len(watcher.folders),
+                 WATCH_POLL_INTERVAL_SECONDS, hint)
 
-    print(f"\n🧹 Cleaning up downloaded files in: {folder_path}")
-    for item in os.listdir(folder_path):
-        item_path = os.path.join(folder_path, item)
+    watcher.rescan() # Files dropped while the watcher was not running
+    next_poll = time.monotonic() + WATCH_POLL_INTERVAL_SECONDS
+    try:
+        while not stop_event.is_set():
+            if observer is None and time.monotonic() >= next_poll:
+                watcher.rescan()
+                next_poll = time.monotonic() + WATCH_POLL_INTERVAL_SECONDS
+            ready = watcher.take_ready()
+            if ready:
+                documents = [{'file_name': os.path.basename(path), 'file_path': path,
+                              'received_time': datetime.fromtimestamp(mtime_ns / 1e9)} for path, _, mtime_ns in ready]
+                try:
+                    process_resume_documents(documents, excel_file_path, origin='watch-folder')
+                except Exception as e:
+                    log.error("  ❌ ERROR: Failed to process %d dropped resume(s): %s", len(documents), e, exc_info=True)
+                watcher.mark_processed(ready) # Recorded even on failure so a bad file is not retried forever; touch it to retry
+            stop_event.wait(tick_seconds)
+    except KeyboardInterrupt:
+        log.info("  🛑 Stopping watch mode.")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+# --- Local Parse Service ---
+# python resume_checker.py serve
+#   POST /parse   multipart/form-data with a 'file' field (optional 'email_subject', 'email_body',
+#                 'email_sender_display_name' fields), or the raw file as the body with ?filename=resume.pdf
+#   GET  /stats   p50/p99 latency, throughput, batch sizes and process memory
+#   GET  /health
+# Uploads are parsed by a single worker thread in micro-batches, so spaCy runs once per batch through
+# nlp.pipe and the models stay loaded between requests.
+
+def candidate_store_status(conn, record):
+    """Duplicate status of a parsed record against the candidate database, using the same rules as a run."""
+    # Stored and archived candidates, through the contact index
+    if record.filename_skills_key()[0] and record.filename_skills_key() in IndexedKeySet(set(), conn, 'file_skill'):
+        return "Excluded" # Rule 2: Filename AND Skills match, a run would not add it
+    contact_index = IndexedKeySet(set(), conn, 'contact')
+    if any(key in contact_index for key in record.contact_keys()):
+        return "Duplicate" # Rule 1: Email OR Phone matches
+    near_duplicate = find_near_duplicate(conn, record.text_signature)
+    if near_duplicate:
+        record.near_duplicate_of = near_duplicate['candidate_id']
+        return "Near Duplicate" # Rule 3: near-identical text
+    return "New"
+
+def candidate_record_fields(record):
+    """The sheet columns of a record as a JSON-friendly dict."""
+    fields = {column: getattr(record, attr) for column, attr in RECORD_COLUMNS}
+    fields["Skill"] = record.skill
+    return fields
+
+class ParseJob:
+    __slots__ = ("file_name", "file_bytes", "email_data", "future")
+
+    def __init__(self, file_name, file_bytes, email_data):
+        self.file_name = file_name
+        self.file_bytes = file_bytes
+        self.email_data = email_data
+        self.future = Future()
+
+class ParseMicroBatcher:
+    """Groups concurrent parse requests into batches of up to max_batch_size, waiting at most max_wait_ms."""
+
+    def __init__(self, max_batch_size=SERVICE_MAX_BATCH_SIZE, max_wait_ms=SERVICE_MAX_BATCH_WAIT_MS, db_path=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self.db_path = db_path
+        self.jobs = queue.Queue()
+        self.batch_sizes = deque(maxlen=SERVICE_LATENCY_WINDOW)
+        self.worker = threading.Thread(target=self._run, name="parse-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, file_name, file_bytes, email_data):
+        job = ParseJob(file_name, file_bytes, email_data)
+        self.jobs.put(job)
+        return job.future
+
+    def _run(self):
+        while True:
+            batch = [self.jobs.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.jobs.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batch_sizes.append(len(batch))
+            try:
+                self._parse_batch(batch)
+            except Exception as e:
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+    def _parse_batch(self, batch):
+        prepared = []
+        nlp_texts = []
+        for job in batch:
+            file_extension = os.path.splitext(job.file_name)[1].lower()
+            file_bytes = job.file_bytes
+            if file_extension == '.doc' and win32com:
+                file_bytes = convert_doc_bytes_to_docx_bytes(job.file_name, file_bytes)
+                file_extension = '.docx' if file_bytes else file_extension
+            if file_extension not in ('.pdf', '.docx'):
+                job.future.set_exception(ValueError(f"Unsupported file type '{file_extension}' (expected .pdf or .docx)"))
+                continue
+            text = extract_resume_text(file_extension, file_bytes=file_bytes)
+            if not text:
+                job.future.set_exception(ValueError("No text could be extracted from the file"))
+                continue
+            prepared.append((job, file_extension, file_bytes, text))
+            # Every text the name search sends through spaCy, batched into one nlp.pipe call below
+            document = segment_resume_text(text)
+            if gazetteer_name_from_lines(document.lines):
+                continue # Fast-path name: no NER runs for this upload
+            nlp_texts.append(name_search_text(document))
+            subject = job.email_data.get('email_subject', "N/A")
+            if len(subject) > 10:
+                nlp_texts.append(subject)
+            nlp_texts.append(job.email_data.get('email_body', "N/A")[:1500])
+
+        if not prepared:
+            return
+        if nlp_texts:
+            prime_nlp_docs(nlp_texts, batch_size=self.max_batch_size)
         try:
-            # Only delete files that were actually downloaded by this run
-            # using the downloaded_files_info list to prevent deleting other user files.
-            # Also ensures converted .docx files are cleaned up if their original .doc was processed.
-            if os.path.isfile(item_path):
-                # Check if it was either an original download or a converted file from an original download
-                is_original_download = any(item_path == d['file_path'] for d in downloaded_files_info)
-                is_converted_file = False
-                for d_info in downloaded_files_info:
-                    # Check if this item_path is a .docx that was converted from a .doc in d_info
-                    if d_info['file_path'].endswith('.doc') and os.path.splitext(item_path)[0] == os.path.splitext(d_info['file_path'])[0] and item_path.endswith('.docx'):
-                        is_converted_file = True
-                        break
-
-                if is_original_download or is_converted_file:
-                    os.remove(item_path)
-                    print(f"  🗑️ Deleted: {os.path.basename(item_path)}")
+            with closing(open_candidate_store(self.db_path)) as store:
+                for job, file_extension, file_bytes, text in prepared:
+                    try:
+                        record = parse_resume_document(job.file_name, file_extension, job.email_data,
+                                                       file_bytes=file_bytes, extracted_text=text)
+                        record.status = candidate_store_status(store, record)
+                        job.future.set_result(record)
+                    except Exception as e:
+                        job.future.set_exception(e)
+        finally:
+            _prefetched_nlp_docs.clear()
+
+class ServiceStats:
+    """Rolling request latencies for /stats."""
+
+    def __init__(self, window=SERVICE_LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.finished = deque(maxlen=window) # (finish time, latency seconds)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def record(self, latency_seconds, ok):
+        with self.lock:
+            self.requests += 1
+            self.errors += 0 if ok else 1
+            self.finished.append((time.monotonic(), latency_seconds))
+
+    def snapshot(self, batch_sizes):
+        with self.lock:
+            finished = list(self.finished)
+            requests, errors = self.requests, self.errors
+        percentiles = {q: None if seconds is None else round(seconds * 1000, 1)
+                       for q, seconds in latency_percentiles((latency for _, latency in finished), (50, 99)).items()}
+        window_seconds = finished[-1][0] - finished[0][0] if len(finished) > 1 else 0
+        batch_sizes = list(batch_sizes)
+        return {
+            'requests': requests,
+            'errors': errors,
+            'uptime_seconds': round(time.monotonic() - self.started, 1),
+            'window_requests': len(finished),
+            'p50_ms': percentiles[50],
+            'p99_ms': percentiles[99],
+            'throughput_per_second': round((len(finished) - 1) / window_seconds, 2) if window_seconds else None,
+            'batches': len(batch_sizes),
+            'mean_batch_size': round(sum(batch_sizes) / len(batch_sizes), 2) if batch_sizes else None,
+            **nlp_memory_guard.stats(),
+        }
+
+def parse_upload(content_type, body, query):
+    """Returns (file_name, file_bytes, email_data) from a multipart form or a raw-body upload."""
+    email_data = {}
+    if content_type.startswith('multipart/form-data'):
+        form = BytesParser(policy=policy.HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        file_name, file_bytes = None, None
+        for part in form.iter_parts():
+            field = part.get_param('name', header='content-disposition')
+            if field == 'file':
+                file_name, file_bytes = part.get_filename(), part.get_payload(decode=True)
+            elif field in ('email_subject', 'email_body', 'email_sender_display_name'):
+                email_data[field] = part.get_payload(decode=True).decode('utf-8', errors='replace')
+    else:
+        file_name, file_bytes = query.get('filename', [None])[0], body
+        for field in ('email_subject', 'email_body', 'email_sender_display_name'):
+            if field in query:
+                email_data[field] = query[field][0]
+    if not file_name or not file_bytes:
+        raise ValueError("Upload a 'file' form field, or send the file as the body with ?filename=<name>")
+    return os.path.basename(file_name), file_bytes, email_data
+
+class ParseServiceHandler(BaseHTTPRequestHandler):
+    server_version = "ResumeParseService/1.0"
+
+    def _send_json(self, status_code, payload):
+        data = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/stats':
+            self._send_json(200, self.server.stats.snapshot(self.server.batcher.batch_sizes))
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        url = urlparse(self.path)
+        if url.path != '/parse':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        ok = False
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > SERVICE_MAX_UPLOAD_BYTES:
+                self._send_json(413, {'error': f"Upload larger than {SERVICE_MAX_UPLOAD_BYTES} bytes"})
+                return
+            file_name, file_bytes, email_data = parse_upload(self.headers.get('Content-Type', ''), self.rfile.read(length), parse_qs(url.query))
+            record = self.server.batcher.submit(file_name, file_bytes, email_data).result()
+            ok = True
+            self._send_json(200, {
+                'file_name': file_name,
+                'status': record.status,
+                'fields': candidate_record_fields(record),
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            })
+        except ValueError as e:
+            self._send_json(422, {'error': str(e)})
         except Exception as e:
-            print(f"  ❌ Error deleting file {item_path}: {e}")
+            log.error("  ❌ ERROR: Parse request failed: %s", e, exc_info=True, extra=log_fields(stage="serve"))
+            self._send_json(500, {'error': str(e)})
+        finally:
+            self.server.stats.record(time.perf_counter() - started, ok)
+
+    def log_message(self, format, *args):
+        log.debug("  🌐 %s " + format, self.address_string(), *args) # Access lines only at DEBUG; /stats has the numbers
+
+def build_parse_service(host=SERVICE_HOST, port=SERVICE_PORT, max_batch_size=SERVICE_MAX_BATCH_SIZE,
+                        max_wait_ms=SERVICE_MAX_BATCH_WAIT_MS, db_path=None):
+    server = ThreadingHTTPServer((host, port), ParseServiceHandler)
+    server.daemon_threads = True
+    server.batcher = ParseMicroBatcher(max_batch_size, max_wait_ms, db_path)
+    server.stats = ServiceStats()
+    return server
+
+def run_parse_service(host=SERVICE_HOST, port=SERVICE_PORT, max_batch_size=SERVICE_MAX_BATCH_SIZE, max_wait_ms=SERVICE_MAX_BATCH_WAIT_MS):
+    server = build_parse_service(host, port, max_batch_size, max_wait_ms)
+    log.info("  🌐 Parse service listening on http://%s:%d (batches of up to %d, %s ms wait). Press Ctrl+C to stop.",
+             host, server.server_address[1], max_batch_size, max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("  🛑 Stopping parse service.")
+    finally:
+        server.server_close()
 
 
-# --- Orchestrator for 24/7 Automation ---
-def run_automation_cycle():
-    print(f"\n✨✨✨ Starting Automated Resume Processing Cycle [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ✨✨✨")
-    
-    downloaded_files_info = [] 
-    print("\n--- Step 1: Downloading Resumes from Outlook ---")
-    try:
-        downloaded_files_info = download_resumes_from_outlook(
-            resume_download_folder, 
-            OUTLOOK_MAILBOX_NAME,
-            INBOX_FOLDER,
-            RESUME_KEYWORDS_IN_SUBJECT,
-            RESUME_KEYWORDS_IN_BODY, 
-            RESUME_KEYWORDS_IN_ATTACHMENT_NAME,
-            RESUME_ATTACHMENT_EXTENSIONS
-        )
-        print(f"\n--- Download Summary: Downloaded {len(downloaded_files_info)} new resume(s) from Outlook. ---")
-    except Exception as e:
-        sanitized_error_overall = sanitize_string_for_print(str(e))
-        print(f"\n❌ CRITICAL ERROR: Failed to download resumes from Outlook: {sanitized_error_overall}")
-        traceback.print_exc() 
-        downloaded_files_info = [] 
+# --- Memory Soak Benchmark ---
+SOAK_SKILLS = ["Verilog", "SystemVerilog", "UVM", "STA", "PrimeTime", "DFT", "Scan Insertion", "ATPG", "FPGA", "Vivado",
+               "Analog Layout", "Cadence Virtuoso", "Physical Design", "Innovus", "Python", "Perl", "TCL"]
 
-    print("\n--- Step 2: Processing Resumes and Updating Database ---")
+def build_soak_resume_text(rng, index, skill_count=5):
+    """A synthetic resume whose name, company and project words are new strings, as in a real stream of resumes."""
+    word = lambda: ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+    first, last = word().title(), word().title()
+    return (f"{first} {last}\n{first.lower()}.{last.lower()}{index}@example.com | +91 9{index % 10 ** 9:09d}\n"
+            f"Summary\n{rng.randint(1, 15)} years of experience at {word().title()} {word().title()} Technologies on "
+            f"{' '.join(word() for _ in range(25))}.\n"
+            f"Skills\n{', '.join(rng.sample(SOAK_SKILLS, skill_count)) or 'Team player'}\n"
+            f"Experience\n{word().title()} Semiconductors, {word().title()}: {' '.join(word() for _ in range(40))}\n")
+
+def run_memory_soak_benchmark(resume_count=100000, sample_every=5000, reload_nlp=True, seed=7):
+    """
+    Parses resume_count synthetic resumes in this process and prints RSS and the size of spaCy's string store every
+    sample_every resumes, with the pipeline reloads of NlpMemoryGuard (or, with reload_nlp=False, without them).
+    Memory should level off after the first reload instead of growing with the number of resumes.
+    """
+    guard = NlpMemoryGuard(reload_every=NLP_RELOAD_EVERY_DOCUMENTS if reload_nlp else 0,
+                           reload_growth_mb=NLP_RELOAD_GROWTH_MB if reload_nlp else 0)
+    rng = random.Random(seed)
+    print(f"  ⏱️ Soaking {resume_count} synthetic resume(s), spaCy reloads {'on' if reload_nlp else 'off'}")
+    samples = []
+    started = time.perf_counter()
+    log.disabled = True # Only the memory curve is of interest here
     try:
-        process_resumes_in_folder(resume_download_folder, output_excel_file, downloaded_files_info)
-    except Exception as e:
-        sanitized_error_process = sanitize_string_for_print(str(e))
-        print(f"\n❌ CRITICAL ERROR: Failed to process resumes in folder: {sanitized_error_process}")
-        traceback.print_exc() 
+        for index in range(resume_count):
+            guard.count_document()
+            parse_resume_data_basic(build_soak_resume_text(rng, index))
+            if (index + 1) % sample_every == 0 or index + 1 == resume_count:
+                rss = current_rss_mb()
+                strings = len(nlp.vocab.strings) if hasattr(nlp, 'vocab') else None
+                samples.append((index + 1, rss))
+                print(f"    {index + 1:>9} resumes | RSS {rss if rss is not None else float('nan'):8.1f} MB | "
+                      f"spaCy strings {strings if strings is not None else '?':>9} | reloads {guard.reloads:>4} | "
+                      f"{(index + 1) / (time.perf_counter() - started):7.1f} resumes/s")
+    finally:
+        log.disabled = False
+    measured = [rss for _, rss in samples if rss is not None]
+    if len(measured) >= 2:
+        # RSS saw-tooths between reloads, so compare the peaks of the two halves: flat memory means no growth
+        first_peak, second_peak = max(measured[:len(measured) // 2]), max(measured[len(measured) // 2:])
+        print(f"  📈 Peak RSS {first_peak:.1f} MB in the first half, {second_peak:.1f} MB in the second "
+              f"({second_peak - first_peak:+.1f} MB) over {resume_count} resume(s) in {time.perf_counter() - started:.0f}s")
+
+
+# --- Parser Cascade Benchmark ---
+CASCADE_BENCH_FIELDS = {'name': 'candidate_name', 'email': 'email_id', 'phone': 'phone_number', 'skills': 'skill_ids',
+                        'experience': 'total_experience'}
+
+def build_docx_bytes(text):
+    """A minimal .docx holding text one paragraph per line, for the parsers that read the file itself."""
+    paragraphs = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{xml_escape(line)}</w:t></w:r></w:p>' for line in text.splitlines())
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml',
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                         '<Default Extension="xml" ContentType="application/xml"/>'
+                         '<Override PartName="/word/document.xml" '
+                         'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr('_rels/.rels',
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Target="word/document.xml" '
+                         'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/></Relationships>')
+        archive.writestr('word/document.xml',
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                         f'<w:body>{paragraphs}</w:body></w:document>')
+    return buffer.getvalue()
+
+def run_parser_cascade_benchmark(resume_count=500, seed=7):
+    """
+    Parses resume_count synthetic resumes (0, 1, 2 or 5 taxonomy skills each) in this process, once with the cascade
+    and once with every parser on every resume, and prints the resumes per second of this one core, what each backend
+    did and how many of the cascade fields ended up filled in the candidate records.
+    """
+    global PARSER_CASCADE_ALWAYS_RUN_ALL
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(resume_count):
+        text = build_soak_resume_text(rng, index, skill_count=rng.choice((0, 1, 2, 5)))
+        corpus.append((f"bench_{index}.docx", text, build_docx_bytes(text)))
+    print(f"  ⏱️ Parsing {resume_count} synthetic resume(s) on one core")
+    always_run_all = PARSER_CASCADE_ALWAYS_RUN_ALL
+    log.disabled = True # Per-resume logging would dominate the timings
+    try:
+        parse_resume_document(corpus[0][0], '.docx', {}, file_bytes=corpus[0][2], extracted_text=corpus[0][1]) # Warm-up, untimed
+        for label, run_all in (("cascade", False), ("all parsers", True)):
+            PARSER_CASCADE_ALWAYS_RUN_ALL = run_all
+            stats_at_start = {backend: dict(stats) for backend, stats in PARSER_BACKEND_STATS.items()}
+            filled = Counter()
+            started = time.perf_counter()
+            for filename, text, file_bytes in corpus:
+                record = parse_resume_document(filename, '.docx', {}, file_bytes=file_bytes, extracted_text=text)
+                filled.update(field for field, attr in CASCADE_BENCH_FIELDS.items()
+                              if record is not None and getattr(record, attr) not in ("N/A", frozenset()))
+            seconds = time.perf_counter() - started
+            fill_rates = ", ".join(f"{field} {filled[field] / resume_count:.0%}" for field in CASCADE_BENCH_FIELDS)
+            print(f"    {label:<11} | {resume_count / seconds:7.1f} resumes/s per core | filled: {fill_rates}")
+            print(f"                | {parser_cascade_summary(stats_at_start)}")
+    finally:
+        PARSER_CASCADE_ALWAYS_RUN_ALL = always_run_all
+        log.disabled = False
+
+
+# --- DOCX Extraction Benchmark ---
+def _bench_python_docx_text(docx_path):
+    """The extractor before streaming: python-docx, body paragraphs only."""
+    from docx import Document
+    return "".join(paragraph.text + "\n" for paragraph in Document(docx_path).paragraphs)
+
+def build_bench_docx_corpus(folder, document_count=50, seed=7):
+    """Writes document_count synthetic resumes (a header, paragraphs, a table and a footer) with python-docx."""
+    from docx import Document
+    rng = random.Random(seed)
+    paths = []
+    for index in range(document_count):
+        document = Document()
+        resume_lines = build_soak_resume_text(rng, index).splitlines()
+        document.sections[0].header.paragraphs[0].text = " | ".join(resume_lines[:2])
+        for line in resume_lines[2:] * rng.randint(5, 40):
+            document.add_paragraph(line)
+        table = document.add_table(rows=10, cols=3)
+        for row in table.rows:
+            for cell, skill in zip(row.cells, rng.sample(SOAK_SKILLS, 3)):
+                cell.text = skill
+        document.sections[0].footer.paragraphs[0].text = f"Page 1 of {index + 1}"
+        paths.append(os.path.join(folder, f"resume_{index}.docx"))
+        document.save(paths[-1])
+    return paths
+
+def run_docx_extraction_benchmark(folder=None, document_count=50):
+    """
+    Extracts the text of every .docx in folder (or of document_count synthetic resumes) with the streaming extractor and
+    with the python-docx one it replaced, and prints the time per document, the peak Python memory of the largest
+    document and how much text each one found. Memory is traced in a separate pass, as tracing slows the code down.
+    """
+    try:
+        import docx # noqa: F401 (only the comparison needs python-docx)
+    except ImportError:
+        print("  ❌ The comparison needs python-docx: pip install python-docx")
+        return
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = sorted(glob.glob(os.path.join(folder, "*.docx"))) if folder else build_bench_docx_corpus(scratch, document_count)
+        if not paths:
+            print(f"  ❌ No .docx files in {folder}")
+            return
+        largest = max(paths, key=os.path.getsize)
+        print(f"  ⏱️ Extracting {len(paths)} .docx file(s), largest {os.path.getsize(largest) / 1024:.0f} KB")
+        for label, extractor in (("streaming", extract_text_from_docx), ("python-docx", _bench_python_docx_text)):
+            started = time.perf_counter()
+            characters = sum(len(extractor(path)) for path in paths)
+            seconds = time.perf_counter() - started
+            tracemalloc.start()
+            try:
+                extractor(largest)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            print(f"    {label:<11} | {seconds / len(paths) * 1000:7.1f} ms/document | peak {peak / 2 ** 20:6.2f} MB | "
+                  f"{characters} characters of text")
+
+
+# --- Excel Export Benchmark ---
+def _bench_workbook_row(index):
+    received = datetime(2026, 1, 1) + timedelta(minutes=index)
+    return f"bench-{index}", {
+        "Source Date": received.strftime('%Y-%m-%d %H:%M:%S'), "Month": received.strftime('%B'), "Year": received.year,
+        "Skill": "Python, SystemVerilog, UVM", "Candidate Name": f"Candidate {index}", "Total Experience": "5 years",
+        "Email ID": f"candidate{index}@example.com", "Phone Number": str(9000000000 + index), "File Name": f"resume_{index}.pdf",
+        "Status": "New"}
+
+def _bench_rewrite_workbook(path, new_rows, updated_rows):
+    """The export before in-place merging: read the whole sheet into pandas, change it and write all of it back."""
+    df = pd.read_excel(path)
+    status = df['Status'].copy()
+    for position, key in enumerate(df[EXCEL_ROW_KEY_COLUMN]):
+        if key in updated_rows:
+            status.iloc[position] = updated_rows[key]['Status']
+    df['Status'] = status
+    new_df = pd.DataFrame([dict(values, **{EXCEL_ROW_KEY_COLUMN: key}) for key, values in new_rows])
+    pd.concat([df, new_df], ignore_index=True).to_excel(path, index=False)
+
+def _bench_measure(function, path, work_path, *args):
+    """(seconds, peak traced MB) of function(work_path, *args) on fresh copies of path, timed without tracing."""
+    shutil.copyfile(path, work_path)
+    started = time.perf_counter()
+    function(work_path, *args)
+    seconds = time.perf_counter() - started
+    shutil.copyfile(path, work_path)
+    tracemalloc.start()
+    try:
+        function(work_path, *args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 2 ** 20
 
-    print(f"\n✨✨✨ Automated Resume Processing Cycle Finished [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ✨✨✨\n")
+def run_excel_export_benchmark(history_sizes=(10000, 50000, 100000), changed_rows=100, compare_rewrite=False):
+    """
+    Merges changed_rows new rows and changed_rows status updates into primary workbooks already holding history_sizes
+    rows and prints the time and peak Python memory of each merge (and, with compare_rewrite, of rewriting the whole
+    sheet through pandas). Memory is traced in a second, separate run, as tracing slows the code down.
+    """
+    print(f"  ⏱️ Merging {changed_rows} new and {changed_rows} updated row(s) into the primary workbook")
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for history in history_sizes:
+            path, work_path = os.path.join(folder, f"history_{history}.xlsx"), os.path.join(folder, "work.xlsx")
+            write_rows_to_new_workbook(path, PRIMARY_EXCEL_COLUMNS, (_bench_workbook_row(index) for index in range(history)))
+            new_rows = [_bench_workbook_row(history + index) for index in range(changed_rows)]
+            updated_rows = {f"bench-{index}": {'Status': 'Duplicate'} for index in range(0, history, max(1, history // changed_rows))}
+            seconds, peak_mb = _bench_measure(lambda target: merge_rows_into_workbook(target, PRIMARY_EXCEL_COLUMNS, new_rows, updated_rows),
+                                              path, work_path)
+            line = (f"    {history:>9} rows ({os.path.getsize(path) / 2 ** 20:6.1f} MB) | merge {seconds:6.2f}s, "
+                    f"peak {peak_mb:6.1f} MB")
+            if compare_rewrite:
+                rewrite_seconds, rewrite_peak_mb = _bench_measure(_bench_rewrite_workbook, path, work_path, new_rows, updated_rows)
+                line += f" | full rewrite {rewrite_seconds:6.2f}s, peak {rewrite_peak_mb:7.1f} MB"
+            print(line)
+            results.append((history, seconds, peak_mb))
+    if len(results) >= 2:
+        (first_rows, first_seconds, first_peak), (last_rows, last_seconds, last_peak) = results[0], results[-1]
+        print(f"  📈 {last_rows / first_rows:.0f}x the history: merge time x{last_seconds / first_seconds:.1f}, "
+              f"peak memory x{last_peak / first_peak:.1f}")
 
 
 # --- Main execution block ---
 if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+
     print("\n--- Initializing Resume Processor ---")
     if not os.path.exists(output_directory):
         try:
@@ -1266,7 +5836,7 @@ if __name__ == "__main__":
             print("     Please check directory permissions or path validity.")
             exit()
     
-    if not os.path.exists(resume_download_folder): 
+    if not ATTACHMENTS_IN_MEMORY and not os.path.exists(resume_download_folder): 
         try:
             os.makedirs(resume_download_folder)
             print(f"  ✅ Created resume download folder: {resume_download_folder}")
@@ -1275,7 +5845,44 @@ if __name__ == "__main__":
             print("     Please check directory permissions or path validity.")
             exit()
 
-    print("\n--- Starting processing cycle ---")
-    run_automation_cycle()
+    setup_logging(args.log_level)
+
+    if args.command in (None, "process-deferred", "watch"):
+        get_excel_export_queue() # Starts the export thread, replaying exports a locked workbook held back last run
+
+    if args.command == "backfill":
+        log.info("--- Starting backfill ---")
+        run_backfill(args.paths, workers=args.workers, batch_size=args.batch_size, checkpoint_path=args.checkpoint)
+    elif args.command == "process-deferred":
+        process_deferred_resumes()
+    elif args.command == "watch":
+        run_watch_mode(args.folders, use_events=not args.poll)
+    elif args.command == "serve":
+        run_parse_service(args.host, args.port, args.max_batch_size, args.max_batch_wait_ms)
+    elif args.command == "export-parquet":
+        export_candidates_to_parquet(args.output, full=args.full)
+    elif args.command == "export-changes":
+        export_candidate_changes(args.since, args.output)
+    elif args.command == "retag":
+        run_skill_retag(workers=args.workers, dry_run=args.dry_run)
+    elif args.command == "report":
+        run_sourcing_report(args.months, args.output, args.rebuild)
+    elif args.command == "latency":
+        run_latency_report(args.days)
+    elif args.command == "loop":
+        run_long_running_mode(args.interval, args.mail_source, args.mail_source_path, args.cycles)
+    elif args.command == "bench-excel-export":
+        run_excel_export_benchmark(args.history, args.changed_rows, args.compare_rewrite)
+    elif args.command == "bench-docx-extract":
+        run_docx_extraction_benchmark(args.folder, args.documents)
+    elif args.command == "bench-parser-cascade":
+        run_parser_cascade_benchmark(args.resumes)
+    elif args.command == "bench-memory-soak":
+        run_memory_soak_benchmark(args.resumes, args.sample_every, reload_nlp=not args.no_reload)
+    else:
+        log.info("--- Starting processing cycle ---")
+        run_automation_cycle(args.mail_source, args.mail_source_path)
 
-    print("\nProcessing complete. Exiting.")
\ No newline at end of file
+    if _excel_export_queue is not None:
+        _excel_export_queue.stop()
+    log.info("Processing complete. Exiting.")
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""IMAP stand-in for the tests: serves raw emails through the imaplib.IMAP4 calls the IMAP backend makes."""
+import re
+import threading
+import time
+from datetime import datetime
+
+from resume_checker import EMAIL_PARSER, IMAP_MONTHS, email_received_time
+
+
+class FakeImapServer:
+    """
+    Local IMAP stand-in: serves raw emails to FakeImapConnection objects and counts the commands they send.
+    raw_emails is a list (all in INBOX) or {mailbox name: list}; UIDs are numbered per mailbox, as on a real server.
+    """
+    def __init__(self, raw_emails, latency_seconds=0.0):
+        mailboxes = raw_emails if isinstance(raw_emails, dict) else {"INBOX": raw_emails}
+        self.mailboxes = {name: {str(uid).encode(): raw_email for uid, raw_email in enumerate(emails, start=1)}
+                          for name, emails in mailboxes.items()}
+        self.latency_seconds = latency_seconds
+        self.commands = 0
+        self.connections = 0
+        self.fetch_chunks = [] # UIDs per full-message FETCH
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            self.connections += 1
+        return FakeImapConnection(self)
+
+    def command(self):
+        with self._lock:
+            self.commands += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+class FakeImapConnection:
+    """Implements the imaplib.IMAP4 calls the IMAP backend makes (login, select, uid SEARCH/FETCH, logout)."""
+    def __init__(self, server):
+        self._server = server
+        self._emails = {}
+
+    def login(self, user, password):
+        self._server.command()
+        return 'OK', [b'LOGIN completed']
+
+    def select(self, mailbox_name='INBOX', readonly=False):
+        self._server.command()
+        if mailbox_name.startswith('"'): # Quoted string, as a real server parses it
+            mailbox_name = re.sub(r'\\(.)', r'\1', mailbox_name[1:-1])
+        elif ' ' in mailbox_name: # imaplib sends the name as is: the server sees extra arguments
+            return 'BAD', [b'SELECT: Too many arguments']
+        if mailbox_name not in self._server.mailboxes:
+            return 'NO', [b'Mailbox does not exist']
+        self._emails = self._server.mailboxes[mailbox_name]
+        return 'OK', [str(len(self._emails)).encode()]
+
+    def uid(self, command, *args):
+        self._server.command()
+        if command == 'SEARCH':
+            day, month, year = args[-1].split('-')
+            since = datetime(int(year), IMAP_MONTHS.index(month) + 1, int(day))
+            uids = [uid for uid, raw_email in self._emails.items()
+                    if (email_received_time(EMAIL_PARSER.parsebytes(raw_email, headersonly=True)) or since) >= since]
+            return 'OK', [b' '.join(uids)]
+        if command == 'FETCH':
+            uid_set, fetch_spec = args
+            headers_only = 'HEADER.FIELDS' in fetch_spec
+            if not headers_only:
+                with self._server._lock:
+                    self._server.fetch_chunks.append(len(uid_set.split(b',')))
+            response = []
+            for sequence_number, uid in enumerate(uid_set.split(b','), start=1):
+                raw_email = self._emails.get(uid)
+                if raw_email is None:
+                    continue
+                if headers_only:
+                    headers = EMAIL_PARSER.parsebytes(raw_email, headersonly=True)
+                    payload = f"Content-Type: {headers['Content-Type'] or 'text/plain'}\r\n".encode()
+                    if headers['Message-ID']:
+                        payload += f"Message-ID: {headers['Message-ID']}\r\n".encode()
+                    payload += b"\r\n"
+                else:
+                    payload = raw_email
+                response.append((b'%d (UID %s BODY[] {%d}' % (sequence_number, uid, len(payload)), payload))
+                response.append(b')')
+            return 'OK', response
+        return 'BAD', [f"Unsupported command {command}".encode()]
+
+    def logout(self):
+        self._server.command()
+        return 'BYE', [b'Logging out']
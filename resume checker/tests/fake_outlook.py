@@ -0,0 +1,289 @@
+"""
+Outlook stand-in for the tests and bench_outlook_scan.py.
+
+Mimics the slice of the Outlook object model the scanner uses. Every property read or method call counts as one
+cross-process COM round-trip and can carry a simulated latency, so both scan modes can be exercised and compared
+on machines without Outlook.
+"""
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from resume_checker import OL_TABLE_USER_ITEMS, PR_ATTACH_DATA_BIN, PR_INTERNET_MESSAGE_ID
+
+class FakeComCounter:
+    def __init__(self, latency_seconds=0.0):
+        self.calls = 0
+        self.latency_seconds = latency_seconds
+        self._lock = threading.Lock()
+
+    def hit(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+class FakeOutlookAttachment:
+    def __init__(self, counter, file_name, file_bytes):
+        self._counter = counter
+        self._file_name = file_name
+        self._file_bytes = file_bytes
+
+    @property
+    def FileName(self):
+        self._counter.hit()
+        return self._file_name
+
+    @property
+    def PropertyAccessor(self):
+        self._counter.hit()
+        return self
+
+    def GetProperty(self, schema_name):
+        self._counter.hit()
+        if schema_name != PR_ATTACH_DATA_BIN:
+            raise KeyError(schema_name)
+        return self._file_bytes
+
+    def SaveAsFile(self, path):
+        self._counter.hit()
+        with open(path, 'wb') as f:
+            f.write(self._file_bytes)
+
+class FakeOutlookAttachments:
+    def __init__(self, counter, attachments):
+        self._counter = counter
+        self._attachments = attachments
+
+    @property
+    def Count(self):
+        self._counter.hit()
+        return len(self._attachments)
+
+    def __iter__(self):
+        for attachment in self._attachments:
+            self._counter.hit()
+            yield attachment
+
+class FakeOutlookMailItem:
+    def __init__(self, counter, entry_id, subject, sender_name, body, received_time, attachments=(), message_id=None):
+        self._counter = counter
+        self._entry_id = entry_id
+        self._message_id = message_id or f"<{entry_id}@fake.example>"
+        self._subject = subject
+        self._sender_name = sender_name
+        self._body = body
+        self._received_time = received_time
+        self._attachments = [FakeOutlookAttachment(counter, name, data) for name, data in attachments]
+
+    def _read(self, value):
+        self._counter.hit()
+        return value
+
+    EntryID = property(lambda self: self._read(self._entry_id))
+    Subject = property(lambda self: self._read(self._subject))
+    SenderName = property(lambda self: self._read(self._sender_name))
+    Body = property(lambda self: self._read(self._body))
+    ReceivedTime = property(lambda self: self._read(self._received_time))
+    Attachments = property(lambda self: self._read(FakeOutlookAttachments(self._counter, self._attachments)))
+    PropertyAccessor = property(lambda self: self._read(self))
+
+    def GetProperty(self, schema_name):
+        self._counter.hit()
+        if schema_name != PR_INTERNET_MESSAGE_ID:
+            raise KeyError(schema_name)
+        return self._message_id
+
+    def column_value(self, column):
+        """Value of a Table column, read in bulk without per-property round-trips."""
+        return {"EntryID": self._entry_id, PR_INTERNET_MESSAGE_ID: self._message_id, "Subject": self._subject,
+                "ReceivedTime": self._received_time, "SenderName": self._sender_name}[column]
+
+def _parse_filter_time(filter_string, time_format):
+    match = re.search(r">=\s*'([^']+)'", filter_string)
+    return datetime.strptime(match.group(1), time_format) if match else None
+
+class FakeOutlookItems:
+    def __init__(self, counter, messages):
+        self._counter = counter
+        self._messages = messages
+
+    @property
+    def Count(self):
+        self._counter.hit()
+        return len(self._messages)
+
+    def Sort(self, property_name, descending=False):
+        self._counter.hit()
+        self._messages = sorted(self._messages, key=lambda m: m._received_time, reverse=not descending)
+
+    def Restrict(self, filter_string):
+        self._counter.hit()
+        since = _parse_filter_time(filter_string, '%m/%d/%Y %H:%M %p')
+        return FakeOutlookItems(self._counter, [m for m in self._messages if since is None or m._received_time >= since])
+
+    def __iter__(self):
+        for message in self._messages:
+            self._counter.hit()
+            yield message
+
+class FakeOutlookColumns:
+    def __init__(self, counter):
+        self._counter = counter
+        self.names = []
+
+    def RemoveAll(self):
+        self._counter.hit()
+        self.names = []
+
+    def Add(self, name):
+        self._counter.hit()
+        self.names.append(name)
+
+class FakeOutlookTable:
+    def __init__(self, counter, messages, filter_string):
+        self._counter = counter
+        since_utc = _parse_filter_time(filter_string, '%m/%d/%Y %I:%M %p')
+        since = since_utc.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None) if since_utc else None
+        needs_attachment = '"urn:schemas:httpmail:hasattachment" = 1' in filter_string
+        self._rows = [m for m in messages
+                      if (since is None or m._received_time >= since) and (m._attachments or not needs_attachment)]
+        self._position = 0
+        self._columns = FakeOutlookColumns(counter)
+
+    @property
+    def Columns(self):
+        self._counter.hit()
+        return self._columns
+
+    @property
+    def EndOfTable(self):
+        self._counter.hit()
+        return self._position >= len(self._rows)
+
+    def Sort(self, property_name, descending=False):
+        self._counter.hit()
+        self._rows.sort(key=lambda m: m.column_value(property_name), reverse=descending)
+
+    def GetArray(self, max_rows):
+        self._counter.hit()
+        rows = self._rows[self._position:self._position + max_rows]
+        self._position += len(rows)
+        return tuple(tuple(m.column_value(column) for column in self._columns.names) for m in rows)
+
+class FakeOutlookFolders:
+    def __init__(self, counter, folders):
+        self._counter = counter
+        self._folders = folders
+
+    def Item(self, name):
+        self._counter.hit()
+        for folder in self._folders:
+            if folder.name.lower() == str(name).lower():
+                return folder
+        raise KeyError(f"The attempted operation failed. An object could not be found: {name}")
+
+class FakeOutlookFolder:
+    def __init__(self, counter, messages, folder_path="\\\\Fake Mailbox\\Inbox"):
+        self._counter = counter
+        self._messages = messages
+        self._folder_path = folder_path
+        self.name = folder_path.rsplit("\\", 1)[-1]
+        self.subfolders = []
+
+    @property
+    def Folders(self):
+        self._counter.hit()
+        return FakeOutlookFolders(self._counter, self.subfolders)
+
+    @property
+    def FolderPath(self):
+        self._counter.hit()
+        return self._folder_path
+
+    @property
+    def Items(self):
+        self._counter.hit()
+        return FakeOutlookItems(self._counter, list(self._messages))
+
+    def GetTable(self, filter_string="", table_contents=OL_TABLE_USER_ITEMS):
+        self._counter.hit()
+        return FakeOutlookTable(self._counter, self._messages, filter_string)
+
+class FakeOutlookNamespace:
+    """
+    Stand-in for the MAPI namespace; pass as download_resumes_from_outlook(..., outlook_namespace=...).
+    messages fill the default Inbox of "Fake Mailbox". stores adds more mailboxes as
+    {mailbox name: {"Inbox" or "Inbox/Subfolder": [message dicts]}}; entry IDs must be unique across all of them,
+    while a message_id repeated in two folders makes those copies of one email.
+    """
+    def __init__(self, messages, latency_seconds=0.0, stores=None):
+        self.counter = FakeComCounter(latency_seconds)
+        self._by_entry_id = {}
+        self._stores = []
+        for store_name, folders in {"Fake Mailbox": {"Inbox": messages}, **(stores or {})}.items():
+            store = FakeOutlookFolder(self.counter, [], f"\\\\{store_name}")
+            self._stores.append(store)
+            for folder_path, folder_messages in folders.items():
+                parent = store
+                for name in folder_path.split("/"):
+                    folder = next((f for f in parent.subfolders if f.name == name), None)
+                    if folder is None:
+                        folder = FakeOutlookFolder(self.counter, [], f"{parent._folder_path}\\{name}")
+                        parent.subfolders.append(folder)
+                    parent = folder
+                items = [FakeOutlookMailItem(self.counter, **message) for message in folder_messages]
+                parent._messages.extend(items)
+                self._by_entry_id.update((m._entry_id, m) for m in items)
+        self._inbox = self._stores[0].subfolders[0]
+
+    @property
+    def Folders(self):
+        self.counter.hit()
+        return FakeOutlookFolders(self.counter, self._stores)
+
+    def GetDefaultFolder(self, folder_type):
+        self.counter.hit()
+        return self._inbox
+
+    def GetItemFromID(self, entry_id):
+        self.counter.hit()
+        return self._by_entry_id[entry_id]
+
+def build_fake_inbox_messages(message_count, now=None):
+    """
+    A deterministic inbox mix: mostly mail without attachments, some with non-resume attachments,
+    roughly one in ten carrying a resume, and a tail of messages older than the scan window.
+    """
+    now = now or datetime.now()
+    messages = []
+    for i in range(message_count):
+        received_time = now - timedelta(minutes=i * 2) if i < message_count * 0.8 else now - timedelta(days=3, minutes=i)
+        kind = i % 10
+        if kind == 0:
+            subject, attachments = f"Application for Engineer role #{i}", [(f"Candidate_{i}_Resume.pdf", b"%PDF-1.4 fake resume")]
+        elif kind in (1, 2):
+            subject, attachments = f"Invoice {i}", [(f"invoice_{i}.pdf", b"%PDF-1.4 fake invoice"), (f"logo_{i}.png", b"\x89PNG")]
+        else:
+            subject, attachments = f"Weekly update {i}", []
+        messages.append({
+            'entry_id': f"{i:08X}", 'subject': subject, 'sender_name': f"Sender {i}",
+            'body': f"Hello team, message number {i}. " * 40, 'received_time': received_time, 'attachments': attachments,
+        })
+    return messages
+
+def build_fake_store_layout(messages, store_count):
+    """
+    Spreads a fake inbox over store_count mailboxes, round-robin. Every resume email is also copied (same Message-ID,
+    new entry ID) into a requisition subfolder of the next mailbox, as when an alias and a shared mailbox both get it.
+    Returns (stores for FakeOutlookNamespace, folder specs to scan).
+    """
+    stores = {f"Fake Store {i + 1}": {"Inbox": [], "Inbox/Req-1042": []} for i in range(store_count)}
+    names = list(stores)
+    for i, message in enumerate(messages):
+        stores[names[i % store_count]]["Inbox"].append(message)
+        if any(name.lower().endswith("resume.pdf") for name, _ in message['attachments']):
+            copy = dict(message, entry_id=f"{message['entry_id']}-copy", message_id=f"<{message['entry_id']}@fake.example>")
+            stores[names[(i + 1) % store_count]]["Inbox/Req-1042"].append(copy)
+    return stores, [f"{name}/{folder}" for name in names for folder in stores[name]]
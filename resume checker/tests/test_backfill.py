@@ -0,0 +1,71 @@
+"""Tests for importing archived resumes ('backfill') and resuming an interrupted import."""
+
+import logging
+import sqlite3
+import tarfile
+
+import pytest
+
+import resume_checker
+from resume_checker import build_docx_bytes, iter_backfill_sources, run_backfill
+
+
+def resume_docx(name, skill):
+    return build_docx_bytes(f"{name}\n{name.split()[0].lower()}@example.com | +91 98765 4321{len(name) % 10}\n"
+                            f"Summary\n5 years of experience.\nSkills\n{skill}\n")
+
+
+@pytest.fixture
+def archive_folder(tmp_path, monkeypatch):
+    """Two resumes in a folder and one in a tar.gz archive; the output directory is a temporary one."""
+    folder = tmp_path / "archive"
+    folder.mkdir()
+    (folder / "ann.docx").write_bytes(resume_docx("Ann Rao", "Verilog"))
+    (folder / "bob.docx").write_bytes(resume_docx("Bob Iyer", "UVM"))
+    (tmp_path / "cat.docx").write_bytes(resume_docx("Cat Nair", "STA"))
+    with tarfile.open(folder / "old.tar.gz", "w:gz") as archive:
+        archive.add(tmp_path / "cat.docx", "2019/cat.docx")
+    output = tmp_path / "output"
+    output.mkdir()
+    monkeypatch.setattr(resume_checker, "output_directory", str(output))
+    monkeypatch.setattr(resume_checker, "output_excel_file", str(output / "Resume_Database.xlsx"))
+    return folder
+
+
+def stored_source_keys(folder):
+    with sqlite3.connect(folder.parent / "output" / resume_checker.CANDIDATE_DB_FILE_NAME) as conn:
+        return sorted(key.replace(str(folder), "") for key, in conn.execute("SELECT source_key FROM candidates"))
+
+
+def test_an_interrupted_backfill_resumes_with_the_remaining_resumes(archive_folder, monkeypatch):
+    store_candidates = resume_checker.store_candidates
+    stored_batches = []
+
+    def crash_after_one_batch(conn, batch, origin, source_keys=None):
+        if stored_batches:
+            raise RuntimeError("simulated crash")
+        stored_batches.append(list(source_keys))
+        return store_candidates(conn, batch, origin, source_keys)
+
+    monkeypatch.setattr(resume_checker, "store_candidates", crash_after_one_batch)
+    with pytest.raises(RuntimeError):
+        run_backfill([str(archive_folder)], workers=1, batch_size=1)
+    assert stored_source_keys(archive_folder) == ["/ann.docx"]
+
+    parsed = []
+    monkeypatch.setattr(resume_checker, "store_candidates",
+                        lambda conn, batch, origin, source_keys=None: parsed.extend(source_keys) or store_candidates(conn, batch, origin, source_keys))
+    run_backfill([str(archive_folder)], workers=1, batch_size=1)
+
+    assert [key.replace(str(archive_folder), "") for key in parsed] == ["/bob.docx", "/old.tar.gz::2019/cat.docx"]
+    assert stored_source_keys(archive_folder) == ["/ann.docx", "/bob.docx", "/old.tar.gz::2019/cat.docx"]
+
+
+def test_tar_archives_are_counted_while_they_stream(archive_folder, caplog):
+    assert [item['file_name'] for item in iter_backfill_sources([str(archive_folder)], read_contents=False)] == ["ann.docx", "bob.docx"]
+    caplog.set_level(logging.INFO, logger="resume_checker")
+
+    run_backfill([str(archive_folder)], workers=1, batch_size=2)
+
+    assert "Backfilling 2 resume(s) plus the resumes of 1 tar archive(s), counted as they are read" in caplog.text
+    assert "Backfill complete: 3 resume(s)" in caplog.text
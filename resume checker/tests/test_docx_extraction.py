@@ -0,0 +1,77 @@
+"""Tests for the streaming .docx text extractor (extract_text_from_docx)."""
+
+import io
+
+import docx
+from docx.oxml import parse_xml
+
+from resume_checker import extract_text_from_docx
+
+TEXT_BOX_PARAGRAPH = (
+    '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<w:r><mc:AlternateContent>'
+    '<mc:Choice Requires="wps"><w:drawing><wps:wsp><wps:txbx><w:txbxContent>'
+    '<w:p><w:r><w:t>Notice period: 30 days</w:t></w:r></w:p>'
+    '</w:txbxContent></wps:txbx></wps:wsp></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:shape><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>Notice period: 30 days</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></v:shape></w:pict></mc:Fallback>'
+    '</mc:AlternateContent></w:r></w:p>')
+
+
+def docx_stream(document):
+    stream = io.BytesIO()
+    document.save(stream)
+    stream.seek(0)
+    return stream
+
+
+def text_lines(document):
+    return [line for line in extract_text_from_docx(docx_stream(document)).splitlines() if line]
+
+
+def test_header_body_table_and_footer_come_out_in_reading_order():
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "Ravi Kumar | ravi@example.com"
+    document.add_paragraph("Summary")
+    table = document.add_table(rows=2, cols=2)
+    table.cell(0, 0).text, table.cell(0, 1).text = "Location", "Bengaluru"
+    table.cell(1, 0).text, table.cell(1, 1).text = "Notice Period", "30 days"
+    document.add_paragraph("Experience")
+    document.sections[0].footer.paragraphs[0].text = "References on request"
+
+    assert text_lines(document) == ["Ravi Kumar | ravi@example.com", "Summary", "Location | Bengaluru",
+                                    "Notice Period | 30 days", "Experience", "References on request"]
+
+
+def test_a_nested_table_stays_inside_its_cell():
+    document = docx.Document()
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Skills"
+    inner = table.cell(0, 1).add_table(rows=1, cols=2)
+    inner.cell(0, 0).text, inner.cell(0, 1).text = "Verilog", "UVM"
+    document.add_paragraph("Experience")
+
+    assert text_lines(document) == ["Skills | Verilog | UVM", "Experience"]
+
+
+def test_a_text_box_is_read_once():
+    document = docx.Document()
+    document.add_paragraph("Summary")
+    document.element.body.insert(len(document.element.body) - 1, parse_xml(TEXT_BOX_PARAGRAPH)) # Before the sectPr
+    document.add_paragraph("Experience")
+
+    assert text_lines(document) == ["Summary", "Notice period: 30 days", "Experience"]
+
+
+def test_a_repeated_header_is_kept_once():
+    document = docx.Document()
+    section = document.sections[0]
+    section.different_first_page_header_footer = True
+    section.header.paragraphs[0].text = "Ravi Kumar"
+    section.first_page_header.paragraphs[0].text = "Ravi Kumar"
+    document.add_paragraph("Summary")
+
+    assert text_lines(document) == ["Ravi Kumar", "Summary"]
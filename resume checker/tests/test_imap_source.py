@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+import resume_checker
+from tests.fake_imap import FakeImapServer
+
+
+def make_email(index, with_resume=True, message_id=None):
+    message = EmailMessage()
+    message['Subject'] = f"Application for Engineer role #{index}" if with_resume else f"Weekly update {index}"
+    message['From'] = f"Candidate {index} <candidate{index}@example.com>"
+    message['Date'] = format_datetime((datetime.now() - timedelta(minutes=index)).astimezone())
+    message['Message-ID'] = message_id or f"<message-{index}@example.com>"
+    message.set_content("Please find my resume attached.")
+    if with_resume:
+        message.add_attachment(b"%PDF-1.4 resume " + str(index).encode(), maintype='application', subtype='pdf',
+                               filename=f"Candidate_{index}_Resume.pdf")
+    return message.as_bytes()
+
+
+def since_yesterday():
+    return datetime.now() - timedelta(days=1)
+
+
+def test_fetches_candidates_in_chunks():
+    server = FakeImapServer([make_email(i) for i in range(7)] + [make_email(100 + i, with_resume=False) for i in range(5)])
+    records = resume_checker.fetch_imap_resumes(since_yesterday(), connection_factory=server.connect, connections=2, chunk_size=3,
+                                                mailboxes=["INBOX"])
+    assert sorted(record['file_name'] for record in records) == sorted(f"Candidate_{i}_Resume.pdf" for i in range(7))
+    assert sorted(server.fetch_chunks) == [1, 3, 3] # Emails without attachments are never fetched
+
+
+def test_same_message_id_in_two_mailboxes_is_fetched_once():
+    shared = make_email(1, message_id="<shared@example.com>")
+    server = FakeImapServer({"INBOX": [shared, make_email(2)], "Sent Items": [shared, make_email(3)]})
+    records = resume_checker.fetch_imap_resumes(since_yesterday(), connection_factory=server.connect, connections=2, chunk_size=10,
+                                                mailboxes=["INBOX", "Sent Items"])
+    assert sorted(record['file_name'] for record in records) == [f"Candidate_{i}_Resume.pdf" for i in (1, 2, 3)]
+    assert sum(server.fetch_chunks) == 3
+
+
+def test_failed_connection_still_closes_the_folder_timing():
+    server = FakeImapServer([make_email(i) for i in range(4)])
+    opened = []
+
+    def connect_once():
+        if opened:
+            raise ConnectionError("too many connections")
+        opened.append(True)
+        return server.connect()
+
+    _, folder_stats = asyncio.run(resume_checker._scan_imap_mailboxes_async(["INBOX"], since_yesterday(), connect_once,
+                                                                           connections=2, chunk_size=1))
+    stats = folder_stats["INBOX"]
+    assert stats['failed']
+    assert stats['open_chunks'] == 0
+    assert stats['seconds'] > 0
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import resume_checker
+from tests.fake_outlook import FakeOutlookNamespace, build_fake_inbox_messages, build_fake_store_layout
+
+
+def scan_fake_inbox(tmp_path, messages, scan_mode, stores=None, folder_specs=("Fake Mailbox/Inbox",), store_threads=None):
+    """Runs the Outlook scanner over a fake inbox (or fake mailboxes). Returns (resume records, COM calls made)."""
+    namespace = FakeOutlookNamespace(messages, stores=stores)
+    found = resume_checker.download_resumes_from_outlook(
+        str(tmp_path), "Fake Mailbox", "Inbox", resume_checker.RESUME_KEYWORDS_IN_SUBJECT, resume_checker.RESUME_KEYWORDS_IN_BODY,
+        resume_checker.RESUME_KEYWORDS_IN_ATTACHMENT_NAME, resume_checker.RESUME_ATTACHMENT_EXTENSIONS, in_memory=True,
+        scan_mode=scan_mode, outlook_namespace=namespace, folder_specs=list(folder_specs), store_threads=store_threads)
+    return found, namespace.counter.calls
+
+
+def attachment_keys(records):
+    return sorted((record['file_name'], record['received_time'], record['email_subject'], record['file_bytes']) for record in records)
+
+
+def test_table_and_items_scans_find_the_same_attachments(tmp_path):
+    messages = build_fake_inbox_messages(300)
+    items_found, _ = scan_fake_inbox(tmp_path, messages, "items")
+    table_found, _ = scan_fake_inbox(tmp_path, messages, "table")
+
+    since = datetime.now() - timedelta(days=1)
+    expected = [message for message in messages if message['received_time'] >= since
+                and any(name.endswith("Resume.pdf") for name, _ in message['attachments'])]
+    assert len(items_found) == len(expected) > 0
+    assert attachment_keys(table_found) == attachment_keys(items_found)
+
+
+def test_table_scan_makes_fewer_com_calls(tmp_path):
+    messages = build_fake_inbox_messages(300)
+    _, items_calls = scan_fake_inbox(tmp_path, messages, "items")
+    _, table_calls = scan_fake_inbox(tmp_path, messages, "table")
+    assert table_calls * 2 < items_calls
+
+
+@pytest.mark.parametrize("scan_mode", ["items", "table"])
+@pytest.mark.parametrize("store_threads", [1, 3])
+def test_copies_in_several_stores_are_read_once(tmp_path, scan_mode, store_threads):
+    messages = build_fake_inbox_messages(300)
+    stores, folder_specs = build_fake_store_layout(messages, 3)
+    copies = sum(len(folders["Inbox/Req-1042"]) for folders in stores.values())
+    single_store_found, _ = scan_fake_inbox(tmp_path, messages, scan_mode)
+
+    found, _ = scan_fake_inbox(tmp_path, [], scan_mode, stores=stores, folder_specs=folder_specs, store_threads=store_threads)
+    assert copies > 0
+    assert len(found) == len({record['file_name'] for record in found}) # Every email once, whichever folder won
+    assert attachment_keys(found) == attachment_keys(single_store_found)
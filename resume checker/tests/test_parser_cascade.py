@@ -0,0 +1,38 @@
+"""Tests for the parser cascade: pyresparser only runs when the in-house parser leaves a field weak."""
+
+import pytest
+
+import resume_checker
+
+RESUME_HEAD = "Ravi Kumar Sharma\nravi.sharma@example.com | +91 98765 43210\nSummary\n5 years of experience in verification.\n"
+
+
+@pytest.fixture
+def pyresparser_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resume_checker, "run_pyresparser", lambda filename, *args: calls.append(filename) or {})
+    monkeypatch.setattr(resume_checker, "PARSER_CASCADE_ALWAYS_RUN_ALL", False)
+    return calls
+
+
+def test_a_single_skill_is_confident_enough(pyresparser_calls):
+    skipped_before = resume_checker.PARSER_BACKEND_STATS['pyresparser']['skipped']
+
+    record = resume_checker.parse_resume_document("ravi.docx", ".docx", {}, extracted_text=RESUME_HEAD + "Skills\nUVM\n")
+
+    assert pyresparser_calls == []
+    assert resume_checker.PARSER_BACKEND_STATS['pyresparser']['skipped'] == skipped_before + 1
+    assert record.skill == "UVM"
+
+
+def test_a_resume_without_skills_runs_pyresparser(pyresparser_calls):
+    resume_checker.parse_resume_document("ravi.docx", ".docx", {}, extracted_text=RESUME_HEAD + "Skills\nTeam player\n")
+
+    assert pyresparser_calls == ["ravi.docx"]
+
+
+def test_skills_threshold_matches_one_skill():
+    one_skill = resume_checker.basic_field_confidences({'Skill IDs': frozenset({1})})['skills']
+
+    assert one_skill >= resume_checker.PARSER_CASCADE_MIN_CONFIDENCE['skills']
+    assert resume_checker.basic_field_confidences({'Skill IDs': frozenset()})['skills'] < resume_checker.PARSER_CASCADE_MIN_CONFIDENCE['skills']
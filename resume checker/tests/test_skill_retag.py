@@ -0,0 +1,93 @@
+"""Tests for re-tagging stored candidates after SKILL_TAXONOMY changes ('retag')."""
+
+import logging
+import zlib
+from contextlib import closing
+
+import resume_checker
+from resume_checker import (CandidateBatch, CandidateRecord, diff_skill_taxonomy, intern_skill, open_candidate_store,
+                            retag_skill_string, run_skill_retag, skill_ids_from_names, store_candidates)
+
+
+def test_diff_finds_added_and_removed_skills():
+    diff = diff_skill_taxonomy(["Verilog", "Legacy Tool"], ["Verilog", "UVM"], renames={})
+
+    assert diff == {'added': ["UVM"], 'removed': ["Legacy Tool"], 'renamed': []}
+
+
+def test_diff_treats_a_case_only_change_as_a_rename():
+    diff = diff_skill_taxonomy(["verilog", "UVM"], ["Verilog", "UVM"], renames={})
+
+    assert diff == {'added': [], 'removed': [], 'renamed': [("verilog", "Verilog")]}
+
+
+def test_diff_follows_skill_renames_pairs():
+    diff = diff_skill_taxonomy(["PnR", "STA"], ["Place and Route", "STA"], renames={"PnR": "Place and Route"})
+
+    assert diff == {'added': [], 'removed': [], 'renamed': [("PnR", "Place and Route")]}
+
+
+def test_diff_ignores_a_rename_whose_old_name_is_still_listed(monkeypatch):
+    monkeypatch.setattr(resume_checker, "SKILL_RENAMES", {"PnR": "Place and Route"}) # Used when renames is not given
+
+    assert diff_skill_taxonomy(["PnR"], ["PnR", "Place and Route"]) == {'added': ["Place and Route"], 'removed': [], 'renamed': []}
+    assert diff_skill_taxonomy(["PnR"], ["Place and Route"])['renamed'] == [("PnR", "Place and Route")]
+
+
+def test_retag_adds_and_removes_skills():
+    legacy_id, uvm_id = intern_skill("Legacy Tool"), intern_skill("UVM")
+
+    assert retag_skill_string("Verilog", set(), {}, {uvm_id}) == "UVM, Verilog"
+    assert retag_skill_string("Legacy Tool, Verilog", {legacy_id}, {}, ()) == "Verilog"
+    assert retag_skill_string("Legacy Tool", {legacy_id}, {}, ()) == "N/A"
+
+
+def test_retag_renames_skills_and_keeps_the_other_spellings():
+    pnr_id, place_and_route_id, verilog_id = intern_skill("PnR"), intern_skill("Place and Route"), intern_skill("Verilog")
+
+    assert retag_skill_string("PnR, uvm", set(), {pnr_id: place_and_route_id}, ()) == "Place and Route, uvm"
+    assert retag_skill_string("verilog", set(), {verilog_id: verilog_id}, ()) == "Verilog" # Case-only rename
+
+
+def test_retag_returns_none_when_nothing_changes():
+    legacy_id, uvm_id = intern_skill("Legacy Tool"), intern_skill("UVM")
+
+    assert retag_skill_string("UVM, Verilog", {legacy_id}, {}, ()) is None
+    assert retag_skill_string("UVM", set(), {}, {uvm_id}) is None
+    assert retag_skill_string("N/A", {legacy_id}, {}, ()) is None
+
+
+def store_candidate(store, file_name, skills, resume_text):
+    record = CandidateRecord(file_name)
+    record.skill_ids = skill_ids_from_names(skills)
+    record.email_id = f"{file_name.split('.')[0]}@example.com"
+    record.source_date, record.month, record.year = "2026-10-01 09:00:00", "October", 2026
+    record.resume_text = zlib.compress(resume_text.encode('utf-8'))
+    batch = CandidateBatch()
+    batch.append(record)
+    return store_candidates(store, batch, origin='test')[0]
+
+
+def test_dry_run_reports_the_changes_and_writes_nothing(tmp_path, caplog):
+    db_path = str(tmp_path / "candidates.db")
+    with closing(open_candidate_store(db_path)) as store: # Snapshots the current taxonomy
+        uvm_candidate = store_candidate(store, "ann.pdf", ["Verilog"], "ann\nverilog and uvm testbenches\n")
+        store_candidate(store, "bob.pdf", ["Legacy Tool", "SPI"], "bob\nlegacy tool, spi\n")
+        store_candidate(store, "cat.pdf", ["SPI"], "cat\nspi drivers\n")
+        with store: # The taxonomy the stored Skill values were tagged with
+            store.execute("UPDATE candidates SET skill = 'verilog' WHERE id = ?", (uvm_candidate,))
+            store.execute("UPDATE skill_taxonomy SET skill = 'verilog' WHERE skill = 'Verilog'")
+            store.execute("DELETE FROM skill_taxonomy WHERE skill = 'UVM'")
+            store.execute("INSERT INTO skill_taxonomy (skill, families) VALUES ('Legacy Tool', 'DV')")
+            store.execute("UPDATE skill_taxonomy SET families = 'DV' WHERE skill = 'SPI'")
+        stored_before = store.execute("SELECT id, skill FROM candidates ORDER BY id").fetchall()
+        snapshot_before = sorted(store.execute("SELECT skill, families FROM skill_taxonomy").fetchall())
+    caplog.set_level(logging.INFO, logger="resume_checker")
+
+    changed = run_skill_retag(workers=1, dry_run=True, db_path=db_path)
+
+    assert changed == 2 # Ann gains UVM under the new spelling of Verilog; Bob loses Legacy Tool; Cat only moved family
+    assert "1 added, 1 removed, 1 renamed, 1 moved between families" in caplog.text
+    with closing(open_candidate_store(db_path)) as store:
+        assert store.execute("SELECT id, skill FROM candidates ORDER BY id").fetchall() == stored_before
+        assert sorted(store.execute("SELECT skill, families FROM skill_taxonomy").fetchall()) == snapshot_before
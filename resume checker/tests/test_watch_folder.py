@@ -0,0 +1,131 @@
+"""Tests for the drop-folder watcher ('watch')."""
+
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import resume_checker
+from resume_checker import DropFolderWatcher, ExcelExportQueue, build_docx_bytes, run_watch_mode
+
+RESUME_TEXT = "Ravi Kumar Sharma\nravi.sharma@example.com | +91 98765 43210\nSummary\n5 years of experience.\nSkills\nUVM, Verilog\n"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def drop_folder(tmp_path):
+    folder = tmp_path / "drop"
+    folder.mkdir()
+    return folder
+
+
+def new_watcher(folder, clock):
+    return DropFolderWatcher([str(folder)], str(folder.parent / "manifest.jsonl"), debounce_seconds=0.4, clock=clock)
+
+
+def test_a_file_still_being_written_waits_until_it_settles(drop_folder):
+    clock = FakeClock()
+    watcher = new_watcher(drop_folder, clock)
+    path = drop_folder / "ravi.docx"
+    path.write_bytes(b"")
+    watcher.notify(str(path))
+
+    assert watcher.take_ready() == []
+    clock.advance(0.5)
+    assert watcher.take_ready() == [] # An empty file is never ready
+    path.write_bytes(b"PK partial")
+    clock.advance(0.3)
+    assert watcher.take_ready() == [] # The size changed: the debounce starts again
+    path.write_bytes(b"PK partial and the rest")
+    clock.advance(0.3)
+    assert watcher.take_ready() == []
+    clock.advance(0.3)
+    assert watcher.take_ready() == []
+    clock.advance(0.1)
+    assert [(os.path.basename(ready_path), size) for ready_path, size, _ in watcher.take_ready()] == [("ravi.docx", 23)]
+
+
+def test_a_stable_file_is_ready_after_the_debounce(drop_folder):
+    clock = FakeClock()
+    watcher = new_watcher(drop_folder, clock)
+    (drop_folder / "ravi.docx").write_bytes(b"PK resume")
+    (drop_folder / "~$ravi.docx").write_bytes(b"lock") # Word's lock file is not a resume
+    watcher.rescan()
+
+    assert watcher.take_ready() == []
+    clock.advance(0.39)
+    assert watcher.take_ready() == []
+    clock.advance(0.01)
+    assert [os.path.basename(path) for path, _, _ in watcher.take_ready()] == ["ravi.docx"]
+    assert watcher.take_ready() == []
+
+
+def test_a_file_in_the_manifest_is_not_processed_again(drop_folder):
+    clock = FakeClock()
+    watcher = new_watcher(drop_folder, clock)
+    path = drop_folder / "ravi.docx"
+    path.write_bytes(b"PK resume")
+    watcher.rescan()
+    watcher.take_ready()
+    clock.advance(0.4)
+    ready = watcher.take_ready()
+    assert len(ready) == 1
+    watcher.mark_processed(ready)
+
+    restarted = new_watcher(drop_folder, clock) # Reads the manifest
+    restarted.rescan()
+    restarted.notify(str(path)) # An event for the same file, e.g. it was opened and closed again
+    restarted.take_ready()
+    clock.advance(0.4)
+    assert restarted.take_ready() == []
+
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9)) # Touched: parse it again
+    restarted.rescan()
+    restarted.take_ready()
+    clock.advance(0.4)
+    assert [os.path.basename(ready_path) for ready_path, _, _ in restarted.take_ready()] == ["ravi.docx"]
+
+
+def test_a_dropped_resume_is_a_row_within_a_second(drop_folder, tmp_path, monkeypatch):
+    output = tmp_path / "output"
+    output.mkdir()
+    monkeypatch.setattr(resume_checker, "output_directory", str(output))
+    export_queue = ExcelExportQueue(str(output / resume_checker.EXPORT_JOURNAL_FILE_NAME))
+    monkeypatch.setattr(resume_checker, "_excel_export_queue", export_queue)
+    stop_event = threading.Event()
+    watcher_thread = threading.Thread(target=run_watch_mode, kwargs={
+        'folders': [str(drop_folder)], 'excel_file_path': str(output / "Resume_Database.xlsx"), 'use_events': False,
+        'stop_event': stop_event})
+    watcher_thread.start()
+    try:
+        (drop_folder / ".Ravi_Resume.docx").write_bytes(build_docx_bytes(RESUME_TEXT))
+        os.replace(drop_folder / ".Ravi_Resume.docx", drop_folder / "Ravi_Resume.docx") # Arrives complete, as a finished copy does
+
+        deadline = time.monotonic() + 10
+        latency = None
+        while latency is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            try:
+                with sqlite3.connect(output / resume_checker.CANDIDATE_DB_FILE_NAME) as conn:
+                    latency = conn.execute("SELECT total_seconds FROM ingest_latency_seconds WHERE file_name = 'Ravi_Resume.docx'").fetchone()
+            except sqlite3.OperationalError:
+                pass # Not created yet
+    finally:
+        stop_event.set()
+        watcher_thread.join()
+        export_queue.stop()
+
+    assert latency is not None
+    assert latency[0] < 1.0 # Arrival (the file's mtime) to the committed candidate row
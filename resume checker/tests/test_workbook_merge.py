@@ -0,0 +1,175 @@
+"""Tests for merging rows into the recruiters' workbooks in place (merge_rows_into_workbook)."""
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import PatternFill
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from resume_checker import (EXCEL_ROW_KEY_COLUMN, EXCEL_ROW_KEY_SOURCE_COLUMNS, candidate_row_key, iter_workbook_rows,
+                            merge_rows_into_workbook)
+
+COLUMNS = ["Candidate Name", "Email ID", "Status"]
+
+
+def write_workbook(path, names, build=None):
+    """A workbook keyed like the pipeline's: one row per name, Row Key 'key-<name>'."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(COLUMNS + ["Comment", EXCEL_ROW_KEY_COLUMN])
+    for name in names:
+        sheet.append([name, f"{name.lower()}@example.com", "New", None, f"key-{name}"])
+    if build:
+        build(workbook, sheet)
+    workbook.save(path)
+    return path
+
+
+def sheet_values(path):
+    return [list(row) for row in load_workbook(path).active.iter_rows(values_only=True)]
+
+
+def test_dropping_rows_moves_row_addressed_parts(tmp_path):
+    def decorate(workbook, sheet):
+        sheet["A5"].hyperlink = "https://example.com/dana"
+        sheet.merge_cells("B6:C6")
+        sheet.conditional_formatting.add("A2:A6", CellIsRule(operator="equal", formula=['"Eve"'],
+                                                             fill=PatternFill("solid", fgColor="FFFF00")))
+        validation = DataValidation(type="list", formula1='"New,Duplicate"')
+        validation.add("C2:C6")
+        sheet.add_data_validation(validation)
+        sheet.auto_filter.ref = "A1:E6"
+        workbook.defined_names["Candidates"] = DefinedName("Candidates", attr_text="Sheet!$A$2:$E$6")
+
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann", "Bob", "Cat", "Dana", "Eve"], decorate)
+
+    appended, updated, removed = merge_rows_into_workbook(str(path), COLUMNS, [], {}, drop_keys={"key-Ann", "key-Bob"})
+
+    assert (appended, updated, removed) == (0, 0, 2)
+    workbook = load_workbook(path)
+    sheet = workbook.active
+    assert [row[0] for row in sheet.iter_rows(values_only=True)] == ["Candidate Name", "Cat", "Dana", "Eve"]
+    assert sheet.max_row == 4
+    assert [str(merged) for merged in sheet.merged_cells.ranges] == ["B4:C4"]
+    assert sheet["A3"].hyperlink.target == "https://example.com/dana"
+    assert [str(formatting.sqref) for formatting in sheet.conditional_formatting] == ["A2:A4"]
+    assert [str(validation.sqref) for validation in sheet.data_validations.dataValidation] == ["C2:C4"]
+    assert sheet.auto_filter.ref == "A1:E4"
+    assert workbook.defined_names["Candidates"].attr_text == "Sheet!$A$2:$E$4"
+
+
+def test_parts_left_on_no_row_are_removed(tmp_path):
+    def decorate(workbook, sheet):
+        sheet["A2"].hyperlink = "https://example.com/ann"
+        sheet.merge_cells("B3:C3")
+
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann", "Bob", "Cat"], decorate)
+
+    merge_rows_into_workbook(str(path), COLUMNS, [], {}, drop_keys={"key-Ann", "key-Bob"})
+
+    sheet = load_workbook(path).active
+    assert [row[0] for row in sheet.iter_rows(values_only=True)] == ["Candidate Name", "Cat"]
+    assert not sheet.merged_cells.ranges
+    assert sheet["A2"].hyperlink is None
+
+
+def test_sheet_with_formulas_keeps_its_rows(tmp_path):
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann", "Bob", "Cat"], lambda workbook, sheet: sheet.__setitem__("D4", "=A2"))
+
+    appended, updated, removed = merge_rows_into_workbook(str(path), COLUMNS, [], {}, drop_keys={"key-Ann"})
+
+    assert removed == 0
+    assert [row[0] for row in sheet_values(path)] == ["Candidate Name", "Ann", "Bob", "Cat"]
+    assert load_workbook(path).active["D4"].value == "=A2"
+
+
+def test_new_rows_are_appended_after_the_existing_ones(tmp_path):
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann", "Bob"])
+
+    appended, updated, removed = merge_rows_into_workbook(
+        str(path), COLUMNS, [("key-Cat", {"Candidate Name": "Cat", "Email ID": "cat@example.com", "Status": "New"})], {})
+
+    assert (appended, updated, removed) == (1, 0, 0)
+    assert sheet_values(path)[1:] == [["Ann", "ann@example.com", "New", None, "key-Ann"],
+                                      ["Bob", "bob@example.com", "New", None, "key-Bob"],
+                                      ["Cat", "cat@example.com", "New", None, "key-Cat"]]
+
+
+def test_a_row_already_in_the_sheet_is_only_updated(tmp_path):
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann", "Bob"])
+
+    appended, updated, _ = merge_rows_into_workbook(
+        str(path), COLUMNS, [("key-Bob", {"Candidate Name": "Robert", "Email ID": "bob@example.com", "Status": "Duplicate"})], {})
+
+    assert (appended, updated) == (0, 1)
+    # Status is pipeline-owned; the name a recruiter may have corrected is left alone
+    assert sheet_values(path)[1:] == [["Ann", "ann@example.com", "New", None, "key-Ann"],
+                                      ["Bob", "bob@example.com", "Duplicate", None, "key-Bob"]]
+
+
+def test_recruiter_columns_and_styles_survive_the_merge(tmp_path):
+    def decorate(workbook, sheet):
+        sheet["D2"] = "Call back Monday"
+        sheet["C2"].fill = PatternFill("solid", fgColor="FFFF00")
+        sheet["A3"].fill = PatternFill("solid", fgColor="00FF00")
+        sheet.column_dimensions["D"].width = 42
+        sheet.freeze_panes = "A2"
+
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann", "Bob"], decorate)
+
+    merge_rows_into_workbook(str(path), COLUMNS, [("key-Cat", {"Candidate Name": "Cat", "Status": "New"})],
+                             {"key-Ann": {"Status": "Duplicate", "Candidate Name": "Not Ann"}})
+
+    sheet = load_workbook(path).active
+    assert [sheet["A2"].value, sheet["C2"].value, sheet["D2"].value] == ["Ann", "Duplicate", "Call back Monday"]
+    assert sheet["C2"].fill.fgColor.rgb == "00FFFF00" # The rewritten cell keeps its style
+    assert sheet["A3"].fill.fgColor.rgb == "0000FF00"
+    assert sheet.column_dimensions["D"].width == 42
+    assert sheet.freeze_panes == "A2"
+    assert sheet["A4"].value == "Cat"
+
+
+def test_shared_string_and_inline_cells_read_alike(tmp_path):
+    # openpyxl stores text as shared strings; rows appended by the merge hold inline strings
+    path = write_workbook(tmp_path / "db.xlsx", ["Ann"])
+    merge_rows_into_workbook(str(path), COLUMNS, [("key-Bob", {"Candidate Name": "Bob & Co <Ltd>", "Status": "New"})], {})
+
+    rows = [values for _, values in iter_workbook_rows(str(path), ("Candidate Name", "Status", EXCEL_ROW_KEY_COLUMN))]
+    assert rows == [{"Candidate Name": "Ann", "Status": "New", EXCEL_ROW_KEY_COLUMN: "key-Ann"},
+                    {"Candidate Name": "Bob & Co <Ltd>", "Status": "New", EXCEL_ROW_KEY_COLUMN: "key-Bob"}]
+
+    # Keys stored either way are matched: both rows update instead of being appended again
+    appended, updated, _ = merge_rows_into_workbook(str(path), COLUMNS, [], {"key-Ann": {"Status": "Duplicate"},
+                                                                            "key-Bob": {"Status": "Duplicate"}})
+    assert (appended, updated) == (0, 2)
+    assert [row[2] for row in sheet_values(path)[1:]] == ["Duplicate", "Duplicate"]
+
+
+def test_legacy_sheet_gets_a_hidden_row_key_column(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(EXCEL_ROW_KEY_SOURCE_COLUMNS) + ["Status"])
+    sheet.append(["ann.pdf", "2026-10-01 09:00:00", "ann@example.com", 9876543210, "New"])
+    path = tmp_path / "legacy.xlsx"
+    workbook.save(path)
+    ann_key = candidate_row_key("ann.pdf", "2026-10-01 09:00:00", "ann@example.com", 9876543210)
+
+    merge_rows_into_workbook(str(path), list(EXCEL_ROW_KEY_SOURCE_COLUMNS) + ["Status"], [], {ann_key: {"Status": "Duplicate"}})
+
+    sheet = load_workbook(path).active
+    assert [cell.value for cell in sheet[1]] == list(EXCEL_ROW_KEY_SOURCE_COLUMNS) + ["Status", EXCEL_ROW_KEY_COLUMN]
+    assert [sheet["E2"].value, sheet["F2"].value] == ["Duplicate", ann_key]
+    assert sheet.column_dimensions["F"].hidden
+
+
+def test_a_missing_workbook_is_written_from_the_new_rows(tmp_path):
+    path = tmp_path / "new.xlsx"
+
+    appended, updated, removed = merge_rows_into_workbook(
+        str(path), COLUMNS, [("key-Ann", {"Candidate Name": "Ann", "Email ID": "ann@example.com", "Status": "New"})], {})
+
+    assert (appended, updated, removed) == (1, 0, 0)
+    sheet = load_workbook(path).active
+    assert [list(row) for row in sheet.iter_rows(values_only=True)] == [COLUMNS + [EXCEL_ROW_KEY_COLUMN],
+                                                                        ["Ann", "ann@example.com", "New", "key-Ann"]]
+    assert sheet.column_dimensions["D"].hidden